@@ -0,0 +1,17 @@
+from flask import Blueprint
+from backend.controladores.controlador_diagnostico import ControladorDiagnostico
+
+# Definición del Blueprint para los puntos de diagnóstico del proceso
+diagnostico_bp = Blueprint('diagnostico_bp', __name__)
+
+# Punto de acceso con las estadísticas del caché del catálogo de productos
+diagnostico_bp.route('/v1/diagnostico/catalogo', methods=['GET'])(ControladorDiagnostico.estadisticas_catalogo)
+
+# Punto de acceso con los contadores del canal de eventos (SSE) de las listas
+diagnostico_bp.route('/v1/diagnostico/eventos', methods=['GET'])(ControladorDiagnostico.estadisticas_eventos)
+
+# Punto de acceso con el estado de los pools de conexiones a la base de datos
+diagnostico_bp.route('/v1/diagnostico/pool', methods=['GET'])(ControladorDiagnostico.estado_pool)
+
+# Punto de acceso con el desglose del tiempo de arranque del proceso
+diagnostico_bp.route('/v1/diagnostico/arranque', methods=['GET'])(ControladorDiagnostico.tiempos_arranque)
@@ -6,5 +6,20 @@ listas_compras_bp = Blueprint('listas_compras_bp', __name__)
 # Punto de API para crear nuevas listas de compras
 listas_compras_bp.route('/v1/listascompras', methods=['POST'])(ControladorListaCompras.crear_lista_compras)
 
+# Punto de API para consultar las listas de compras del usuario con su avance
+listas_compras_bp.route('/v1/listascompras', methods=['GET'])(ControladorListaCompras.consultar_listas_compras)
+
+# Punto de API para consultar una lista de compras con sus productos
+listas_compras_bp.route('/v1/listascompras/<int:listaID>', methods=['GET'])(ControladorListaCompras.consultar_lista_compras)
+
 # Punto de API para agregar productos a una lista de compras
-listas_compras_bp.route('/v1/listascompras/<int:listaID>/productos', methods=['POST'])(ControladorListaCompras.agregar_producto_a_lista)
\ No newline at end of file
+listas_compras_bp.route('/v1/listascompras/<int:listaID>/productos', methods=['POST'])(ControladorListaCompras.agregar_producto_a_lista)
+
+# Punto de API para agregar varios productos a una lista de compras en una sola petición
+listas_compras_bp.route('/v1/listascompras/<int:listaID>/productos:bulk', methods=['POST'])(ControladorListaCompras.agregar_productos_a_lista_bulk)
+
+# Punto de API para marcar o desmarcar como comprados varios elementos de una lista
+listas_compras_bp.route('/v1/listascompras/<int:listaID>/productos:comprado', methods=['PATCH'])(ControladorListaCompras.marcar_productos_comprados)
+
+# Punto de API con el canal de eventos (SSE) de una lista de compras
+listas_compras_bp.route('/v1/listascompras/<int:listaID>/eventos', methods=['GET'])(ControladorListaCompras.eventos_lista)
@@ -0,0 +1,8 @@
+from flask import Blueprint
+from backend.controladores.controlador_lote import ControladorLote
+
+# Definición del Blueprint para ejecutar varias operaciones en una sola petición
+lote_bp = Blueprint('lote_bp', __name__)
+
+# Punto de acceso de la API para ejecutar un lote de operaciones
+lote_bp.route('/v1/batch', methods=['POST'])(ControladorLote.ejecutar_lote)
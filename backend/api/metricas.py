@@ -0,0 +1,8 @@
+from flask import Blueprint
+from backend.controladores.controlador_diagnostico import ControladorDiagnostico
+
+# Definición del Blueprint para las métricas de Prometheus (separado del diagnóstico, que puede no registrarse)
+metricas_bp = Blueprint('metricas_bp', __name__)
+
+# Punto de acceso para Prometheus con las métricas de las peticiones
+metricas_bp.route('/metrics', methods=['GET'])(ControladorDiagnostico.metricas)
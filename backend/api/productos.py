@@ -7,10 +7,19 @@ productos_bp = Blueprint('productos_bp', __name__)
 # Punto de acceso de la API para agregar productos
 productos_bp.route('/v1/productos', methods=['POST'])(ControladorProductos.agregar_producto)
 
+# Punto de acceso de la API para importar productos de forma masiva (CSV o NDJSON)
+productos_bp.route('/v1/productos:importar', methods=['POST'])(ControladorProductos.importar_catalogo)
+
+# Punto de acceso de la API para exportar el catálogo completo como flujo (NDJSON, CSV o JSON)
+productos_bp.route('/v1/productos:exportar', methods=['GET'])(ControladorProductos.exportar_catalogo)
+
 # Puntos de acceso de la API para consultar productos
 productos_bp.route('/v1/productos', methods=['GET'])(ControladorProductos.consultar_productos)
 productos_bp.route('/v1/productos/<int:productoID>', methods=['GET'])(ControladorProductos.consultar_producto_por_id)
 
+# Punto de acceso de la API para buscar productos por nombre (autocompletado)
+productos_bp.route('/v1/productos/buscar', methods=['GET'])(ControladorProductos.buscar_productos)
+
 # Punto de acceso de la API para actualizar productos
 productos_bp.route('/v1/productos/<int:productoID>', methods=['PUT'])(ControladorProductos.actualizar_producto)
 
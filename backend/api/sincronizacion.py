@@ -0,0 +1,8 @@
+from flask import Blueprint
+from backend.controladores.controlador_sincronizacion import ControladorSincronizacion
+
+# Definición del Blueprint para la sincronización incremental de los clientes
+sincronizacion_bp = Blueprint('sincronizacion_bp', __name__)
+
+# Punto de acceso con los cambios desde el último cursor de sincronización
+sincronizacion_bp.route('/v1/sync', methods=['GET'])(ControladorSincronizacion.sincronizar)
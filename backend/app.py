@@ -1,16 +1,21 @@
-from backend.app import crear_app, db
+import time
+_inicio_importaciones = time.perf_counter()
+
+from backend.app import crear_app, arrancar
 from flask_cors import CORS  # Importar CORS para manejar el intercambio de recursos de origen cruzado
 
+_duracion_importaciones = time.perf_counter() - _inicio_importaciones
+
 # Crear una instancia de la aplicación con el entorno de desarrollo
 app = crear_app('desarrollo')
+app.extensions['arranque'].registrar('importaciones', _duracion_importaciones)
 
 # Aplicar middleware CORS a la aplicación para permitir solicitudes de origen cruzado
 CORS(app)
 
-# Crear tablas de base de datos dentro del contexto de la aplicación
-with app.app_context():
-    db.drop_all()  # Now you can drop all tables
-    db.create_all()  # And create them again
+# Verificar la revisión del esquema (las migraciones solo se aplican si está desactualizado) y construir
+# el índice de búsqueda de productos antes de atender peticiones
+arrancar(app)
 
 
 # Definir una ruta raíz que devuelva un saludo
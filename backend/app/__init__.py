@@ -4,18 +4,108 @@ from .modelos import db
 from os import getenv  
 from dotenv import load_dotenv  
 from flask_jwt_extended import JWTManager  
+from flask_migrate import Migrate
+from backend.servicios.hashing import servicio_hash
+from backend.servicios.catalogo import cache_catalogo
+from backend.servicios.replicas import enrutador_replicas
+from backend.servicios.metricas import metricas_peticiones
+from backend.servicios.consultas_sql import contabilidad_sql
+from backend.servicios.perfilador import perfilador_peticiones
+from .comandos import registrar_comandos
+from .serializacion import ProveedorJSON
+from .arranque import MedidorArranque, arrancar
+from . import eventos_listas  # Mantiene los contadores de las listas de compras
+from . import eventos_sincronizacion  # Registra las eliminaciones para /v1/sync
 
 # Importar los blueprints (componentes) de la aplicación
 from backend.api.usuarios import usuarios_bp
 from backend.api.productos import productos_bp
 from backend.api.listacompras import listas_compras_bp
+from backend.api.lote import lote_bp
+from backend.api.diagnostico import diagnostico_bp
+from backend.api.metricas import metricas_bp
+from backend.api.sincronizacion import sincronizacion_bp
+
+# Directorio con las migraciones versionadas del esquema (Alembic)
+DIRECTORIO_MIGRACIONES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migraciones')
 
 # Definir la función para crear y configurar la instancia de la aplicación Flask
 def crear_app(environment=None):
+    # Medir cada fase del arranque; el desglose se publica en /v1/diagnostico/arranque
+    medidor = MedidorArranque()
+    with medidor.fase('configuracion'):
+        app = _configurar_app(environment)
+    app.extensions['arranque'] = medidor
+    # Medir la latencia de las peticiones; se registra primero para cubrir los demás hooks
+    metricas_peticiones.init_app(app)
+    # Contar las sentencias SQL y el tiempo en la base de datos de cada petición (detecta N+1)
+    contabilidad_sql.init_app(app)
+    # Perfilar peticiones a pedido (solo donde la configuración lo permite; nunca en Produccion)
+    perfilador_peticiones.init_app(app)
+
+    with medidor.fase('base_de_datos'):
+        # Registrar las réplicas de lectura como binds adicionales (antes de crear los engines)
+        enrutador_replicas.init_app(app)
+        # Inicializar la base de datos con la instancia de la aplicación Flask
+        db.init_app(app)
+        # Inicializar Flask-Migrate para aplicar las migraciones del esquema (flask db upgrade)
+        Migrate(app, db, directory=DIRECTORIO_MIGRACIONES, render_as_batch=True)
+
+    with medidor.fase('servicios'):
+        # Inicializar el servicio de hash de contraseñas (pool de procesos y límite de admisión)
+        servicio_hash.init_app(app)
+        # Inicializar el caché del catálogo de productos (versión compartida entre workers)
+        cache_catalogo.init_app(app)
+
+    with medidor.fase('rutas'):
+        # Registrar blueprints (componentes) con la instancia de la aplicación Flask
+        app.register_blueprint(usuarios_bp)
+        app.register_blueprint(productos_bp)
+        app.register_blueprint(listas_compras_bp)
+        app.register_blueprint(lote_bp)
+        # Los puntos de diagnóstico y /metrics sin token no piden autenticación: solo existen donde la
+        # configuración lo permite
+        if app.config['METRICAS_TOKEN'] or app.config['METRICAS_PUBLICAS']:
+            app.register_blueprint(metricas_bp)
+        if app.config['DIAGNOSTICO_HABILITADO']:
+            app.register_blueprint(diagnostico_bp)
+        app.register_blueprint(sincronizacion_bp)
+
+        # Inicializar Flask-JWT-Extended con la instancia de la aplicación Flask
+        JWTManager(app)
+
+        # Registrar los comandos de línea de comandos (por ejemplo: flask importar-productos)
+        registrar_comandos(app)
+
+    return app  # Devolver la instancia de la aplicación Flask configurada
+
+def crear_app_servidor(environment=None):
+    """
+    Crea la aplicación y la deja lista para atender peticiones: verifica el esquema según
+    ARRANQUE_ESQUEMA (sin DDL si ya está en la última revisión) y construye el índice de búsqueda.
+    """
+    app = crear_app(environment)
+    arrancar(app)
+    return app
+
+_entorno_cargado = False
+
+def cargar_entorno():
+    """
+    Carga las variables del archivo .env, si está presente. Es el único lugar que lee el archivo y lo
+    hace una sola vez por proceso; debe llamarse antes de importar backend.config.db_config.
+    """
+    global _entorno_cargado
+    if not _entorno_cargado:
+        load_dotenv()
+        _entorno_cargado = True
+
+# Crea la aplicación y carga la configuración del entorno
+def _configurar_app(environment):
     app = Flask(__name__)  # Crear una nueva instancia de la aplicación Flask
 
     # Cargar las variables de entorno desde un archivo .env, si está presente
-    load_dotenv()
+    cargar_entorno()
     # Si se proporciona un nombre de entorno, configurarlo como una variable de entorno
     if(environment != None):
         os.environ['ENTORNO_FLASK'] = environment
@@ -37,15 +127,6 @@ def crear_app(environment=None):
 
     # Cargar la configuración del objeto config seleccionado en la instancia de la aplicación Flask
     app.config.from_object(Config)
-    # Inicializar la base de datos con la instancia de la aplicación Flask
-    db.init_app(app)
-
-    # Registrar blueprints (componentes) con la instancia de la aplicación Flask
-    app.register_blueprint(usuarios_bp)
-    app.register_blueprint(productos_bp)
-    app.register_blueprint(listas_compras_bp)
-
-    # Inicializar Flask-JWT-Extended con la instancia de la aplicación Flask
-    JWTManager(app)
-    
-    return app  # Devolver la instancia de la aplicación Flask configurada
\ No newline at end of file
+    # Proveedor JSON de la aplicación (orjson si está disponible)
+    app.json = ProveedorJSON(app)
+    return app
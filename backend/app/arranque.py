@@ -0,0 +1,121 @@
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from alembic.util import CommandError
+from flask import current_app
+from flask_migrate import upgrade
+from backend.servicios.busqueda import indice_productos
+from .modelos import db
+
+# Modos de ARRANQUE_ESQUEMA
+VERIFICAR = 'verificar'  # Migrar solo si la revisión guardada no es la última
+EXIGIR = 'exigir'        # Nunca ejecutar DDL; fallar si la base no está en la última revisión
+OMITIR = 'omitir'        # No consultar la revisión del esquema
+MODOS_ESQUEMA = (VERIFICAR, EXIGIR, OMITIR)
+
+class EsquemaDesactualizado(RuntimeError):
+    """
+    Se lanza en modo `exigir` cuando la base de datos no está en la última revisión de las migraciones.
+    """
+
+class MedidorArranque:
+    """
+    MedidorArranque registra cuánto tarda cada fase del arranque del proceso, en el orden en que ocurren.
+    """
+
+    def __init__(self):
+        self.fases = OrderedDict()
+        self.esquema = None
+
+    @contextmanager
+    def fase(self, nombre):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(nombre, time.perf_counter() - inicio)
+
+    def registrar(self, nombre, segundos):
+        self.fases[nombre] = self.fases.get(nombre, 0) + segundos
+
+    def a_dict(self):
+        return {
+            "fases_ms": {nombre: round(segundos * 1000, 2) for nombre, segundos in self.fases.items()},
+            "total_ms": round(sum(self.fases.values()) * 1000, 2),
+            "esquema": self.esquema,
+        }
+
+    def resumen(self):
+        fases = ", ".join(f"{nombre}={segundos * 1000:.1f}ms" for nombre, segundos in self.fases.items())
+        return f"Arranque en {sum(self.fases.values()) * 1000:.1f}ms ({fases}); esquema: {self.esquema}"
+
+def _scripts():
+    return ScriptDirectory(current_app.extensions['migrate'].directory)
+
+def revisiones_cabeza():
+    """
+    Revisiones finales de las migraciones versionadas, leídas de los scripts sin tocar la base de datos.
+    """
+    return set(_scripts().get_heads())
+
+def revisiones_guardadas():
+    """
+    Revisiones registradas en la tabla alembic_version (vacía si la base nunca se migró).
+    """
+    with db.engine.connect() as conexion:
+        return set(MigrationContext.configure(conexion).get_current_heads())
+
+def preparar_esquema(modo=VERIFICAR):
+    """
+    Deja el esquema en la última revisión según el modo, sin ejecutar DDL cuando ya está al día.
+
+    Con varios workers, las migraciones deben aplicarse una vez antes del despliegue (flask db upgrade)
+    y los workers arrancar con `exigir`, para que ninguno ejecute DDL mientras otros atienden peticiones.
+
+    Retorna:
+        'al_dia', 'migrado', 'adelantado' (la base tiene una revisión más nueva que este código, como
+        durante un reinicio escalonado) u 'omitido'.
+    """
+    if modo not in MODOS_ESQUEMA:
+        raise ValueError(f"ARRANQUE_ESQUEMA debe ser uno de {', '.join(MODOS_ESQUEMA)}")
+    if modo == OMITIR:
+        return 'omitido'
+
+    cabezas = revisiones_cabeza()
+    guardadas = revisiones_guardadas()
+    if guardadas == cabezas:
+        return 'al_dia'
+    if guardadas and not all(_revision_conocida(revision) for revision in guardadas):
+        # Otra versión del código ya migró la base; este proceso no debe tocar el esquema
+        return 'adelantado'
+    if modo == EXIGIR:
+        raise EsquemaDesactualizado(
+            f"La base de datos está en {sorted(guardadas) or 'ninguna revisión'} y se esperaba {sorted(cabezas)}. "
+            "Aplica las migraciones con 'flask db upgrade' antes de arrancar.")
+
+    upgrade()
+    return 'migrado'
+
+def _revision_conocida(revision):
+    try:
+        return _scripts().get_revision(revision) is not None
+    except CommandError:
+        return False
+
+def arrancar(app):
+    """
+    Prepara el esquema y el índice de búsqueda antes de atender peticiones, midiendo cada fase.
+
+    Retorna:
+        El MedidorArranque con el desglose de tiempos, también disponible en /v1/diagnostico/arranque.
+    """
+    medidor = app.extensions['arranque']
+    with app.app_context():
+        with medidor.fase('esquema'):
+            medidor.esquema = preparar_esquema(app.config.get('ARRANQUE_ESQUEMA', VERIFICAR))
+        with medidor.fase('indice_busqueda'):
+            indice_productos.construir_desde_bd()
+    app.logger.info(medidor.resumen())
+    return medidor
@@ -0,0 +1,85 @@
+import os
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from backend.servicios.importacion import importar_productos
+from backend.servicios.perfilador import firmar_perfilado, CABECERA_PERFILAR
+from .modelos import db
+from backend.controladores.controlador_sincronizacion import limite_poda
+from .eventos_listas import recontar_listas
+from .eventos_sincronizacion import podar_eliminaciones
+
+# Formato de importación deducido de la extensión del archivo
+FORMATOS_POR_EXTENSION = {
+    '.csv': 'csv',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
+
+@click.command('importar-productos')
+@click.argument('archivo', type=click.File('rb'))
+@click.option('--formato', type=click.Choice(['csv', 'ndjson']), default=None, help="Formato del archivo; por defecto se deduce de la extensión.")
+@click.option('--tamano-lote', type=int, default=None, help="Productos por transacción (IMPORTACION_TAMANO_LOTE por defecto).")
+@with_appcontext
+def comando_importar_productos(archivo, formato, tamano_lote):
+    """
+    Importa productos al catálogo desde un archivo CSV o NDJSON.
+    """
+    formato = formato or FORMATOS_POR_EXTENSION.get(os.path.splitext(archivo.name)[1].lower())
+    if formato is None:
+        raise click.UsageError("No se pudo deducir el formato del archivo, usa --formato")
+
+    def mostrar_progreso(resultado):
+        click.echo(f"{resultado.filas} filas leídas, {resultado.importados} importadas, {resultado.total_errores} errores")
+
+    resultado = importar_productos(archivo, formato,
+                                   tamano_lote=tamano_lote or current_app.config['IMPORTACION_TAMANO_LOTE'],
+                                   al_progresar=mostrar_progreso)
+
+    for error in resultado.errores:
+        click.echo(f"Fila {error['fila']}: {error['error']}", err=True)
+    click.echo(f"Importación terminada: {resultado.importados} productos en {resultado.lotes} lotes, {resultado.total_errores} errores")
+
+@click.command('reconciliar-contadores')
+@with_appcontext
+def comando_reconciliar_contadores():
+    """
+    Recalcula TotalItems, Comprados y Completa de todas las listas de compras desde producto_lista.
+    """
+    desfasadas = recontar_listas(db.session.connection())
+    db.session.commit()
+    click.echo(f"Contadores reconciliados: {desfasadas} listas corregidas")
+
+@click.command('podar-eliminaciones')
+@with_appcontext
+def comando_podar_eliminaciones():
+    """
+    Borra los tombstones de /v1/sync más antiguos que SINCRONIZACION_RETENCION_DIAS.
+    """
+    ahora = db.session.query(db.func.now()).scalar()
+    borrados = podar_eliminaciones(db.session.connection(),
+                                   limite_poda(ahora, current_app.config['SINCRONIZACION_RETENCION_DIAS']))
+    db.session.commit()
+    click.echo(f"Tombstones borrados: {borrados}")
+
+@click.command('firmar-perfilado')
+@click.argument('metodo')
+@click.argument('ruta')
+@with_appcontext
+def comando_firmar_perfilado(metodo, ruta):
+    """
+    Imprime la cabecera X-Perfilar que pide perfilar una petición (METODO RUTA, por ejemplo GET /v1/productos).
+    """
+    secreto = current_app.config.get('PERFILADOR_SECRETO')
+    if not secreto:
+        raise click.UsageError("PERFILADOR_SECRETO no está configurado")
+    click.echo(f"{CABECERA_PERFILAR}: {firmar_perfilado(secreto, metodo, ruta)}")
+
+def registrar_comandos(app):
+    """
+    Registra los comandos de línea de comandos (flask <comando>) de la aplicación.
+    """
+    app.cli.add_command(comando_importar_productos)
+    app.cli.add_command(comando_reconciliar_contadores)
+    app.cli.add_command(comando_podar_eliminaciones)
+    app.cli.add_command(comando_firmar_perfilado)
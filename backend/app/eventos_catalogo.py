@@ -0,0 +1,95 @@
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+from .modelos import db, Producto
+from .sesion import SesionAplicacion, es_savepoint, pendientes_por_transaccion
+from .versiones import VERSION_CATALOGO, incrementar_version
+
+# Funciones interesadas en los cambios confirmados del catálogo de productos
+_suscriptores = []
+
+pendientes_por_transaccion('cambios_catalogo')
+
+def al_cambiar_catalogo(funcion):
+    """
+    Registra una función que se llama después de cada commit que modificó productos.
+
+    La función recibe una lista de tuplas (accion, id, nombre, tipo_medida) con accion en
+    'agregado', 'actualizado' o 'eliminado', o bien None cuando el cambio no se puede detallar
+    (inserciones masivas, tablas recreadas) y el suscriptor debe descartar todo lo que tenga. El
+    segundo argumento es el par (versión anterior, versión confirmada) de la versión compartida del
+    catálogo que avanzó la transacción, o None si no se conoce.
+    """
+    _suscriptores.append(funcion)
+    return funcion
+
+def notificar_cambio_masivo():
+    """
+    Avisa a los suscriptores que el catálogo cambió por una vía que no pasa por el ORM.
+    """
+    _notificar(None)
+
+def _notificar(cambios, versiones=None):
+    for funcion in _suscriptores:
+        funcion(cambios, versiones)
+
+def _registrar(accion):
+    def registrar(mapper, conexion, producto):
+        sesion = object_session(producto)
+        if sesion is not None:
+            sesion.info.setdefault('cambios_catalogo', []).append(
+                (accion, producto.id, producto.nombre, producto.tipo_medida))
+    return registrar
+
+def _avanzar_version(mapper, conexion, producto):
+    # La versión compartida se incrementa una vez por flush, en la misma transacción y antes de escribir
+    # la fila: Producto.secuencia (y el tombstone de una eliminación) toman la versión nueva
+    sesion = object_session(producto)
+    if sesion is None:
+        incrementar_version(conexion, VERSION_CATALOGO)
+    elif not sesion.info.get('version_catalogo_incrementada'):
+        version = incrementar_version(conexion, VERSION_CATALOGO)
+        sesion.info['version_catalogo_incrementada'] = True
+        # Rango de versiones de la transacción, para que los suscriptores sepan si vieron todo lo anterior
+        desde, _ = sesion.info.get('versiones_catalogo', (version - 1, None))
+        sesion.info['versiones_catalogo'] = (desde, version)
+
+def _avanzar_version_si_cambia(mapper, conexion, producto):
+    # before_update también se llama para objetos marcados como modificados sin cambios reales
+    sesion = object_session(producto)
+    if sesion is None or sesion.is_modified(producto, include_collections=False):
+        _avanzar_version(mapper, conexion, producto)
+
+event.listen(Producto, 'before_insert', _avanzar_version)
+event.listen(Producto, 'before_update', _avanzar_version_si_cambia)
+event.listen(Producto, 'before_delete', _avanzar_version)
+event.listen(Producto, 'after_insert', _registrar('agregado'))
+event.listen(Producto, 'after_update', _registrar('actualizado'))
+event.listen(Producto, 'after_delete', _registrar('eliminado'))
+
+@event.listens_for(SesionAplicacion, 'after_flush')
+def _despues_de_flush(sesion, contexto):
+    sesion.info.pop('version_catalogo_incrementada', None)
+
+@event.listens_for(SesionAplicacion, 'after_commit')
+def _despues_de_commit(sesion):
+    # Un savepoint confirmado todavía puede perderse con la transacción externa
+    if es_savepoint(sesion):
+        return
+    cambios = sesion.info.pop('cambios_catalogo', None)
+    versiones = sesion.info.pop('versiones_catalogo', None)
+    if cambios:
+        _notificar(cambios, versiones)
+
+@event.listens_for(SesionAplicacion, 'after_soft_rollback')
+def _despues_de_rollback(sesion, transaccion_previa):
+    # Los cambios de un savepoint revertido los descarta la sesión; los anteriores siguen pendientes.
+    # Los savepoints no publican nada, así que una transacción revertida no dejó cambios que deshacer
+    if transaccion_previa.nested:
+        return
+    sesion.info.pop('versiones_catalogo', None)
+    sesion.info.pop('cambios_catalogo', None)
+
+@event.listens_for(db.metadata, 'after_create')
+@event.listens_for(db.metadata, 'after_drop')
+def _despues_de_ddl(metadata, conexion, **kwargs):
+    notificar_cambio_masivo()
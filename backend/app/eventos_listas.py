@@ -0,0 +1,212 @@
+from sqlalchemy import event, inspect, update, select, func, case
+from sqlalchemy.orm import object_session
+from sqlalchemy.orm.attributes import NO_VALUE
+from .modelos import Usuario, ListaCompra, ProductoLista
+from .sesion import SesionAplicacion, es_savepoint, pendientes_por_transaccion
+from .serializacion import serializar
+from .versiones import avanzar_secuencias_usuarios
+
+# Atributos de ListaCompra que cambian junto con los contadores
+ATRIBUTOS_CONTADORES = ['total_items', 'comprados', 'completa', 'actualizado_en', 'secuencia']
+
+# Funciones interesadas en los cambios confirmados de los elementos de las listas
+_suscriptores = []
+pendientes_por_transaccion('eventos_listas')
+
+def al_confirmar_eventos_lista(funcion):
+    """
+    Registra una función que se llama después de cada commit que modificó elementos de listas.
+
+    La función recibe una lista de tuplas (id_lista, tipo, datos) en el orden en que ocurrieron.
+    """
+    _suscriptores.append(funcion)
+    return funcion
+
+def registrar_evento_lista(sesion, id_lista, tipo, datos):
+    """
+    Anota un evento de una lista; se publica solo si la transacción se confirma.
+    """
+    sesion.info.setdefault('eventos_listas', []).append((id_lista, tipo, datos))
+
+_listas = ListaCompra.__table__
+_items = ProductoLista.__table__
+_usuarios = Usuario.__table__
+
+# Secuencia de cambios vigente del dueño de la lista (ver eventos_sincronizacion); quien modifica los
+# elementos ya la incrementó en la transacción, así que la lista queda marcada con el mismo valor
+_secuencia_dueno = select(_usuarios.c.SecuenciaCambios).where(_usuarios.c.IDUsuario == _listas.c.IDUsuario).scalar_subquery()
+
+def ajustar_contadores(conexion, id_lista, total_items=0, comprados=0):
+    """
+    Suma los deltas a los contadores de una lista y recalcula Completa en la misma sentencia.
+
+    Completa se asigna primero para que use los valores anteriores de los contadores en todos los
+    motores (MySQL evalúa las asignaciones de izquierda a derecha con los valores ya actualizados).
+    """
+    if not total_items and not comprados:
+        return
+    completa = case(((_listas.c.Comprados + comprados) == (_listas.c.TotalItems + total_items), True), else_=False)
+    conexion.execute(
+        update(_listas).where(_listas.c.IDLista == id_lista).ordered_values(
+            (_listas.c.Completa, completa),
+            (_listas.c.TotalItems, _listas.c.TotalItems + total_items),
+            (_listas.c.Comprados, _listas.c.Comprados + comprados),
+            (_listas.c.Secuencia, _secuencia_dueno),
+        )
+    )
+
+def recontar_listas(conexion, ids_listas=None):
+    """
+    Recalcula los contadores desde producto_lista. Sin `ids_listas` se recalculan todas las listas.
+
+    Retorna:
+        La cantidad de listas cuyos contadores estaban desfasados.
+    """
+    total = select(func.count(_items.c.IDProductoLista)).where(_items.c.IDLista == _listas.c.IDLista).scalar_subquery()
+    comprados = select(func.coalesce(func.sum(case((_items.c.Comprado == True, 1), else_=0)), 0)).where(
+        _items.c.IDLista == _listas.c.IDLista).scalar_subquery()
+    completa = case((_listas.c.Comprados == _listas.c.TotalItems, True), else_=False)
+
+    filtro = [] if ids_listas is None else [_listas.c.IDLista.in_(ids_listas)]
+    contadores_desfasados = (_listas.c.TotalItems != total) | (_listas.c.Comprados != comprados)
+    # Los dueños de las listas que se van a corregir avanzan su secuencia para que /v1/sync informe la corrección
+    completa_real = case((comprados == total, True), else_=False)
+    avanzar_secuencias_usuarios(conexion, select(_listas.c.IDUsuario).where(*filtro).where(
+        contadores_desfasados | (_listas.c.Completa != completa_real)))
+    # Solo se tocan las filas desfasadas para no cambiar ActualizadoEn de las listas correctas
+    desfasadas = conexion.execute(
+        update(_listas).where(*filtro).where(contadores_desfasados)
+        .values(TotalItems=total, Comprados=comprados, Secuencia=_secuencia_dueno)
+    ).rowcount
+    conexion.execute(
+        update(_listas).where(*filtro).where(_listas.c.Completa != completa)
+        .values(Completa=completa, ActualizadoEn=_listas.c.ActualizadoEn, Secuencia=_secuencia_dueno)
+    )
+    return desfasadas
+
+def _deltas(sesion):
+    return sesion.info.setdefault('deltas_listas', {})
+
+def _sumar(sesion, id_lista, total_items, comprados):
+    delta = _deltas(sesion).setdefault(id_lista, [0, 0])
+    delta[0] += total_items
+    delta[1] += comprados
+
+def _recontar_despues(sesion, id_lista):
+    sesion.info.setdefault('recontar_listas', set()).add(id_lista)
+
+def _valor_anterior(estado, atributo):
+    # Valor confirmado de un atributo, o NO_VALUE si no estaba cargado
+    historial = estado.attrs[atributo].history
+    if historial.deleted:
+        return historial.deleted[0]
+    if historial.unchanged:
+        return historial.unchanged[0]
+    return NO_VALUE
+
+def _cargar_valor_anterior(item, valor, anterior, iniciador):
+    return valor
+
+# Con active_history el ORM carga el valor anterior al asignar, aunque el atributo estuviera expirado,
+# así los deltas se calculan sin volver a contar la lista
+for _atributo in (ProductoLista.id_lista, ProductoLista.comprado):
+    event.listen(_atributo, 'set', _cargar_valor_anterior, active_history=True, retval=True)
+
+@event.listens_for(ProductoLista, 'after_insert')
+def _al_insertar(mapper, conexion, item):
+    sesion = object_session(item)
+    if sesion is not None:
+        _sumar(sesion, item.id_lista, 1, 1 if item.comprado else 0)
+        registrar_evento_lista(sesion, item.id_lista, 'producto_agregado', serializar(item))
+
+@event.listens_for(ProductoLista, 'after_delete')
+def _al_eliminar(mapper, conexion, item):
+    sesion = object_session(item)
+    if sesion is None:
+        return
+    estado = inspect(item)
+    id_lista = _valor_anterior(estado, 'id_lista')
+    comprado = _valor_anterior(estado, 'comprado')
+    if id_lista is NO_VALUE:
+        # La fila ya no existe y no se conoce su lista; reconciliar-contadores la corrige
+        return
+    registrar_evento_lista(sesion, id_lista, 'producto_eliminado', {'id': item.id})
+    if comprado is NO_VALUE:
+        _recontar_despues(sesion, id_lista)
+    else:
+        _sumar(sesion, id_lista, -1, -1 if comprado else 0)
+
+@event.listens_for(ProductoLista, 'after_update')
+def _al_actualizar(mapper, conexion, item):
+    sesion = object_session(item)
+    if sesion is None:
+        return
+    estado = inspect(item)
+    cambio_lista = estado.attrs.id_lista.history.has_changes()
+    cambio_comprado = estado.attrs.comprado.history.has_changes()
+    if not cambio_lista and not cambio_comprado:
+        return
+
+    lista_anterior = _valor_anterior(estado, 'id_lista')
+    comprado_anterior = _valor_anterior(estado, 'comprado')
+    if cambio_lista:
+        if lista_anterior is not NO_VALUE:
+            registrar_evento_lista(sesion, lista_anterior, 'producto_eliminado', {'id': item.id})
+        registrar_evento_lista(sesion, item.id_lista, 'producto_agregado', {'id': item.id, 'comprado': item.comprado})
+    else:
+        registrar_evento_lista(sesion, item.id_lista, 'producto_comprado' if item.comprado else 'producto_desmarcado',
+                               {'id': item.id, 'comprado': item.comprado})
+
+    if lista_anterior is NO_VALUE or comprado_anterior is NO_VALUE:
+        # Sin el valor anterior no se puede calcular el delta: se recuentan las listas afectadas
+        if lista_anterior is not NO_VALUE:
+            _recontar_despues(sesion, lista_anterior)
+        _recontar_despues(sesion, item.id_lista)
+        return
+    _sumar(sesion, lista_anterior, -1, -1 if comprado_anterior else 0)
+    _sumar(sesion, item.id_lista, 1, 1 if item.comprado else 0)
+
+@event.listens_for(SesionAplicacion, 'after_flush')
+def _aplicar_deltas(sesion, contexto):
+    deltas = sesion.info.pop('deltas_listas', None) or {}
+    recontar = sesion.info.pop('recontar_listas', None) or set()
+    if not deltas and not recontar:
+        return
+    conexion = sesion.connection()
+    for id_lista, (total_items, comprados) in deltas.items():
+        if id_lista not in recontar:
+            ajustar_contadores(conexion, id_lista, total_items, comprados)
+    if recontar:
+        recontar_listas(conexion, recontar)
+    sesion.info.setdefault('listas_modificadas', set()).update(deltas.keys() | recontar)
+
+@event.listens_for(SesionAplicacion, 'after_commit')
+def _publicar_eventos(sesion):
+    # Un savepoint confirmado todavía puede perderse con la transacción externa
+    if es_savepoint(sesion):
+        return
+    eventos = sesion.info.pop('eventos_listas', None)
+    if eventos:
+        for funcion in _suscriptores:
+            funcion(eventos)
+
+@event.listens_for(SesionAplicacion, 'after_soft_rollback')
+def _descartar_eventos(sesion, transaccion_previa):
+    # Los eventos de una transacción revertida nunca ocurrieron; los de un savepoint revertido los
+    # descarta la sesión
+    if transaccion_previa.nested:
+        return
+    sesion.info.pop('eventos_listas', None)
+
+@event.listens_for(SesionAplicacion, 'after_flush_postexec')
+def _expirar_listas(sesion, contexto):
+    expirar_listas(sesion, sesion.info.pop('listas_modificadas', ()))
+
+def expirar_listas(sesion, ids_listas):
+    """
+    Expira los contadores de las listas cargadas en la sesión para que se relean de la base de datos.
+    """
+    for id_lista in ids_listas:
+        lista = sesion.identity_map.get(inspect(ListaCompra).identity_key_from_primary_key([id_lista]))
+        if lista is not None:
+            sesion.expire(lista, ATRIBUTOS_CONTADORES)
@@ -0,0 +1,87 @@
+from sqlalchemy import event, insert, select, delete
+from sqlalchemy.orm import object_session
+from .modelos import Producto, ListaCompra, ProductoLista, Eliminacion, VERSION_CATALOGO
+from .sesion import SesionAplicacion
+from .versiones import avanzar_secuencia_usuario, leer_version
+
+# Las filas de listas y elementos se marcan con la secuencia de cambios de su dueño y las de productos con
+# la versión del catálogo (ver eventos_catalogo). Ambas se incrementan dentro de la transacción que hace
+# el cambio y se confirman en orden, así que /v1/sync puede pedir "todo lo posterior a la secuencia N"
+# sin perder las transacciones que se confirman tarde.
+
+_eliminaciones = Eliminacion.__table__
+_listas = ListaCompra.__table__
+
+def secuencia_de_usuario(sesion, conexion, id_usuario):
+    """
+    Secuencia con la que se marcan los cambios de un usuario en el flush en curso: se incrementa la
+    primera vez que se pide en cada flush.
+    """
+    secuencias = sesion.info.setdefault('secuencias_usuarios', {})
+    if id_usuario not in secuencias:
+        secuencias[id_usuario] = avanzar_secuencia_usuario(conexion, id_usuario)
+    return secuencias[id_usuario]
+
+def _dueno_lista(sesion, conexion, id_lista):
+    duenos = sesion.info.setdefault('duenos_listas', {})
+    if id_lista not in duenos:
+        duenos[id_lista] = conexion.execute(select(_listas.c.IDUsuario).where(_listas.c.IDLista == id_lista)).scalar()
+    return duenos[id_lista]
+
+def podar_eliminaciones(conexion, antes_de):
+    """
+    Borra los tombstones anteriores a `antes_de`.
+
+    Retorna:
+        La cantidad de registros borrados.
+    """
+    return conexion.execute(delete(_eliminaciones).where(_eliminaciones.c.EliminadoEn < antes_de)).rowcount
+
+@event.listens_for(ListaCompra, 'before_insert')
+def _lista_insertada(mapper, conexion, lista):
+    lista.secuencia = secuencia_de_usuario(object_session(lista), conexion, lista.id_usuario)
+
+@event.listens_for(ListaCompra, 'before_update')
+def _lista_actualizada(mapper, conexion, lista):
+    sesion = object_session(lista)
+    if sesion.is_modified(lista, include_collections=False):
+        lista.secuencia = secuencia_de_usuario(sesion, conexion, lista.id_usuario)
+
+@event.listens_for(ProductoLista, 'before_insert')
+def _elemento_insertado(mapper, conexion, item):
+    sesion = object_session(item)
+    item.secuencia = secuencia_de_usuario(sesion, conexion, _dueno_lista(sesion, conexion, item.id_lista))
+
+@event.listens_for(ProductoLista, 'before_update')
+def _elemento_actualizado(mapper, conexion, item):
+    sesion = object_session(item)
+    if sesion.is_modified(item, include_collections=False):
+        item.secuencia = secuencia_de_usuario(sesion, conexion, _dueno_lista(sesion, conexion, item.id_lista))
+
+@event.listens_for(Producto, 'after_delete')
+def _producto_eliminado(mapper, conexion, producto):
+    # Los productos son globales: el registro no pertenece a ningún usuario. La versión del catálogo ya
+    # se incrementó en before_delete
+    conexion.execute(insert(_eliminaciones).values(Tabla='productos', IDRegistro=producto.id, IDUsuario=None,
+                                                   Secuencia=leer_version(conexion, VERSION_CATALOGO)))
+
+@event.listens_for(ListaCompra, 'after_delete')
+def _lista_eliminada(mapper, conexion, lista):
+    secuencia = secuencia_de_usuario(object_session(lista), conexion, lista.id_usuario)
+    conexion.execute(insert(_eliminaciones).values(Tabla='listas_compras', IDRegistro=lista.id,
+                                                   IDUsuario=lista.id_usuario, Secuencia=secuencia))
+
+@event.listens_for(ProductoLista, 'after_delete')
+def _elemento_eliminado(mapper, conexion, item):
+    # Los elementos se eliminan antes que su lista, así que la fila de la lista todavía existe
+    sesion = object_session(item)
+    propietario = _dueno_lista(sesion, conexion, item.id_lista)
+    conexion.execute(insert(_eliminaciones).values(Tabla='producto_lista', IDRegistro=item.id, IDUsuario=propietario,
+                                                   Secuencia=secuencia_de_usuario(sesion, conexion, propietario)))
+
+@event.listens_for(SesionAplicacion, 'after_flush')
+def _despues_de_flush(sesion, contexto):
+    # El flush siguiente vuelve a incrementar: después de un rollback a un savepoint los valores
+    # guardados podrían ya no existir
+    sesion.info.pop('secuencias_usuarios', None)
+    sesion.info.pop('duenos_listas', None)
@@ -1,8 +1,26 @@
 from datetime import datetime, timezone
 from flask_sqlalchemy import SQLAlchemy
-import bcrypt
+from backend.servicios.hashing import servicio_hash
+from .sesion import SesionAplicacion
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": SesionAplicacion})
+
+# Nombre de la versión del catálogo de productos en versiones_datos
+VERSION_CATALOGO = 'catalogo'
+
+class VersionDatos(db.Model):
+    """
+    Versión de un conjunto de datos compartido entre procesos (por ejemplo, el catálogo de productos).
+    Se incrementa en la misma transacción que el cambio, así que cualquier worker, en cualquier host,
+    ve la versión nueva al mismo tiempo que los datos nuevos.
+    """
+    __tablename__ = 'versiones_datos'
+    nombre = db.Column('Nombre', db.String(30), primary_key=True)
+    valor = db.Column('Valor', db.Integer, nullable=False, default=0)
+
+# Versión vigente del catálogo, para marcar las filas de productos que cambia cada transacción
+_version_catalogo = db.func.coalesce(
+    db.select(VersionDatos.valor).where(VersionDatos.nombre == VERSION_CATALOGO).scalar_subquery(), 0)
 
 class Usuario(db.Model):
     __tablename__ = 'usuarios'
@@ -10,42 +28,77 @@ class Usuario(db.Model):
     nombre_usuario = db.Column('NombreUsuario', db.String(50), nullable=False, unique=True)
     hash_contrasena = db.Column('HashContrasena', db.String(255), nullable=False)
     creado_en = db.Column('CreadoEn', db.DateTime, nullable=False, default=db.func.now())
-    actualizado_en = db.Column('ActualizadoEn', db.DateTime, nullable=False, default=db.func.now(), onupdate=db.func.now())
+    actualizado_en = db.Column('ActualizadoEn', db.DateTime, nullable=False, default=db.func.now(), onupdate=db.func.now(), index=True)
+    # Secuencia de cambios de los datos del usuario (listas y sus elementos) para /v1/sync: cada
+    # transacción que los modifica la incrementa y marca las filas con el valor nuevo
+    secuencia_cambios = db.Column('SecuenciaCambios', db.Integer, nullable=False, default=0, server_default='0')
     # Add cascade="all, delete-orphan" for cascading deletes
     listas_compras = db.relationship('ListaCompra', backref='usuario', lazy=True, cascade="all, delete-orphan")
 
+    # El trabajo de bcrypt se delega al servicio de hash para no bloquear los hilos de peticiones
     def hashear_contrasena(self, contrasena_original):
-        self.hash_contrasena = bcrypt.hashpw(contrasena_original.encode('utf-8'), bcrypt.gensalt())
+        self.hash_contrasena = servicio_hash.hashear(contrasena_original)
 
     def verificar_contrasena(self, contrasena):
-        return bcrypt.checkpw(contrasena.encode('utf-8'), self.hash_contrasena.encode('utf-8'))
+        return servicio_hash.verificar(contrasena, self.hash_contrasena)
 
 class Producto(db.Model):
     __tablename__ = 'productos'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True, name='IDProducto')
-    nombre = db.Column('Nombre', db.String(100), nullable=False)
+    nombre = db.Column('Nombre', db.String(100), nullable=False, index=True)
     tipo_medida = db.Column('TipoMedida', db.String(50), nullable=False)
     creado_en = db.Column('CreadoEn', db.DateTime, nullable=False, default=db.func.now())
-    actualizado_en = db.Column('ActualizadoEn', db.DateTime, nullable=False, default=db.func.now(), onupdate=db.func.now())
+    actualizado_en = db.Column('ActualizadoEn', db.DateTime, nullable=False, default=db.func.now(), onupdate=db.func.now(), index=True)
+    # Versión del catálogo con la que se insertó o modificó el producto (ver eventos_catalogo)
+    secuencia = db.Column('Secuencia', db.Integer, nullable=False, default=_version_catalogo, onupdate=_version_catalogo,
+                          server_default='0', index=True)
     listas_productos = db.relationship('ProductoLista', backref='producto', lazy=True)
 
 class ListaCompra(db.Model):
     __tablename__ = 'listas_compras'
+    __table_args__ = (db.Index('ix_listas_compras_IDUsuario_Secuencia', 'IDUsuario', 'Secuencia'),)
     id = db.Column(db.Integer, primary_key=True, autoincrement=True, name='IDLista')
-    id_usuario = db.Column('IDUsuario', db.Integer, db.ForeignKey('usuarios.IDUsuario'), nullable=False)
+    id_usuario = db.Column('IDUsuario', db.Integer, db.ForeignKey('usuarios.IDUsuario'), nullable=False, index=True)
     nombre = db.Column('Nombre', db.String(100), nullable=False)
     completa = db.Column('Completa', db.Boolean, nullable=False, default=True)
+    # Contadores de elementos mantenidos en la misma transacción que los cambios de producto_lista
+    # (ver eventos_listas); Completa se deriva de ellos: comprados == total_items
+    total_items = db.Column('TotalItems', db.Integer, nullable=False, default=0, server_default='0')
+    comprados = db.Column('Comprados', db.Integer, nullable=False, default=0, server_default='0')
+    # Valor de usuarios.SecuenciaCambios de la última transacción que modificó la lista (ver eventos_sincronizacion)
+    secuencia = db.Column('Secuencia', db.Integer, nullable=False, default=0, server_default='0')
     creado_en = db.Column('CreadoEn', db.DateTime, nullable=False, default=db.func.now())
-    actualizado_en = db.Column('ActualizadoEn', db.DateTime, nullable=False, default=db.func.now(), onupdate=db.func.now())
+    actualizado_en = db.Column('ActualizadoEn', db.DateTime, nullable=False, default=db.func.now(), onupdate=db.func.now(), index=True)
     # Add cascade="all, delete-orphan" for cascading deletes
     productos = db.relationship('ProductoLista', backref='lista_compra', lazy=True, cascade="all, delete-orphan")
 
 class ProductoLista(db.Model):
     __tablename__ = 'producto_lista'
+    # Índice compuesto para las búsquedas por lista y por (lista, producto)
+    __table_args__ = (db.Index('ix_producto_lista_IDLista_IDProducto', 'IDLista', 'IDProducto'),
+                      db.Index('ix_producto_lista_IDLista_Secuencia', 'IDLista', 'Secuencia'))
     id = db.Column(db.Integer, primary_key=True, autoincrement=True, name='IDProductoLista')
     id_producto = db.Column('IDProducto', db.Integer, db.ForeignKey('productos.IDProducto'), nullable=False)
     id_lista = db.Column('IDLista', db.Integer, db.ForeignKey('listas_compras.IDLista'), nullable=False)
     cantidad = db.Column('Cantidad', db.Integer, nullable=False)
     comprado = db.Column('Comprado', db.Boolean, nullable=False, default=False)
+    # Valor de usuarios.SecuenciaCambios del dueño de la lista en la última transacción que modificó el elemento
+    secuencia = db.Column('Secuencia', db.Integer, nullable=False, default=0, server_default='0')
     creado_en = db.Column('CreadoEn', db.DateTime, nullable=False, default=db.func.now())
-    actualizado_en = db.Column('ActualizadoEn', db.DateTime, nullable=False, default=db.func.now(), onupdate=db.func.now())
+    actualizado_en = db.Column('ActualizadoEn', db.DateTime, nullable=False, default=db.func.now(), onupdate=db.func.now(), index=True)
+
+class Eliminacion(db.Model):
+    """
+    Registro (tombstone) de una fila eliminada, para que la sincronización incremental pueda informar
+    las eliminaciones. IDUsuario es nulo para las filas globales (productos del catálogo); Secuencia es
+    la versión del catálogo o la SecuenciaCambios del usuario de la transacción que eliminó la fila.
+    Se conservan SINCRONIZACION_RETENCION_DIAS (flask podar-eliminaciones).
+    """
+    __tablename__ = 'eliminaciones'
+    __table_args__ = (db.Index('ix_eliminaciones_IDUsuario_Secuencia', 'IDUsuario', 'Secuencia'),)
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True, name='IDEliminacion')
+    tabla = db.Column('Tabla', db.String(30), nullable=False)
+    id_registro = db.Column('IDRegistro', db.Integer, nullable=False)
+    id_usuario = db.Column('IDUsuario', db.Integer, nullable=True, index=True)
+    eliminado_en = db.Column('EliminadoEn', db.DateTime, nullable=False, default=db.func.now(), index=True)
+    secuencia = db.Column('Secuencia', db.Integer, nullable=False, default=0, server_default='0')
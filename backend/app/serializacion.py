@@ -0,0 +1,134 @@
+from datetime import date, datetime
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+from .modelos import Producto, ListaCompra, ProductoLista, Usuario
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional; sin él se usa el módulo json de la biblioteca estándar
+    orjson = None
+
+class ProveedorJSON(DefaultJSONProvider):
+    """
+    Proveedor JSON de Flask que usa orjson cuando está instalado y la configuración lo permite
+    (JSON_USAR_ORJSON). La salida es equivalente a la del proveedor por defecto: las fechas pasan por
+    el mismo `default` y las llaves se ordenan igual.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.usar_orjson = orjson is not None and app.config.get('JSON_USAR_ORJSON', True)
+
+    def _opciones_orjson(self):
+        opciones = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_SUBCLASS | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            opciones |= orjson.OPT_SORT_KEYS
+        return opciones
+
+    def dumps_bytes(self, obj):
+        """
+        Serializa directamente a bytes, sin pasar por str cuando se usa orjson.
+        """
+        if self.usar_orjson:
+            return orjson.dumps(obj, default=self.default, option=self._opciones_orjson())
+        return super().dumps(obj).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if self.usar_orjson and not kwargs:
+            return self.dumps_bytes(obj).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.usar_orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if self.usar_orjson and not self._app.debug:
+            return self._app.response_class(self.dumps_bytes(obj), mimetype=self.mimetype)
+        return super().response(obj)
+
+def _fecha_iso(valor):
+    return valor.isoformat() if isinstance(valor, (date, datetime)) else valor
+
+class Serializador:
+    """
+    Serializador declara una vez la forma de salida de un modelo y la compila en una función que
+    construye el diccionario con accesos directos a atributos (sin getattr dinámico por campo).
+
+    Funciona tanto con instancias del ORM como con filas proyectadas (Row) que tengan esos atributos.
+    """
+
+    def __init__(self, campos, fechas=()):
+        self.campos = tuple(campos)
+        self.fechas = frozenset(fechas)
+        self.a_dict = self._compilar(self.campos)
+        self._subconjuntos = {}
+
+    def _compilar(self, campos):
+        for campo in campos:
+            if not campo.isidentifier():
+                raise ValueError(f"Campo inválido para serializar: {campo}")
+        partes = []
+        for campo in campos:
+            acceso = f"o.{campo}"
+            if campo in self.fechas:
+                acceso = f"_fecha_iso({acceso})"
+            partes.append(f"{campo!r}: {acceso}")
+        codigo = f"def a_dict(o):\n    return {{{', '.join(partes)}}}\n"
+        espacio = {'_fecha_iso': _fecha_iso}
+        exec(codigo, espacio)
+        return espacio['a_dict']
+
+    def muchos(self, objetos):
+        a_dict = self.a_dict
+        return [a_dict(objeto) for objeto in objetos]
+
+    def a_bytes(self, objeto):
+        """
+        Codifica un objeto directamente a JSON en bytes con el proveedor de la aplicación.
+        """
+        return current_app.json.dumps_bytes(self.a_dict(objeto))
+
+    def muchos_a_bytes(self, objetos):
+        return current_app.json.dumps_bytes(self.muchos(objetos))
+
+    def con_campos(self, campos):
+        """
+        Devuelve un serializador compilado para un subconjunto de los campos (proyecciones con `fields`).
+
+        Los campos se deduplican y se ordenan según la declaración del serializador: la llave del caché
+        no depende de cómo los escribió el cliente, así que solo hay tantos subconjuntos compilados como
+        combinaciones de campos válidos.
+        """
+        pedidos = set(campos)
+        desconocidos = pedidos - set(self.campos)
+        if desconocidos:
+            raise ValueError(f"Campos inválidos: {', '.join(sorted(desconocidos))}")
+        campos = tuple(campo for campo in self.campos if campo in pedidos)
+        if campos == self.campos:
+            return self
+        subconjunto = self._subconjuntos.get(campos)
+        if subconjunto is None:
+            subconjunto = Serializador(campos, self.fechas & pedidos)
+            self._subconjuntos[campos] = subconjunto
+        return subconjunto
+
+# Forma de salida de cada modelo expuesto por la API
+SERIALIZADORES = {
+    Producto: Serializador(['id', 'nombre', 'tipo_medida']),
+    ListaCompra: Serializador(['id', 'nombre', 'completa', 'total_items', 'comprados', 'creado_en', 'actualizado_en'],
+                              fechas=['creado_en', 'actualizado_en']),
+    ProductoLista: Serializador(['id', 'id_lista', 'id_producto', 'cantidad', 'comprado']),
+    Usuario: Serializador(['id', 'nombre_usuario']),
+}
+
+def serializador_de(modelo):
+    return SERIALIZADORES[modelo]
+
+def serializar(objeto):
+    """
+    Convierte una instancia de un modelo en el diccionario que expone la API.
+    """
+    return SERIALIZADORES[type(objeto)].a_dict(objeto)
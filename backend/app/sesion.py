@@ -0,0 +1,79 @@
+import weakref
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+# Llaves de `info` con listas de efectos (eventos SSE, cambios del catálogo) que se publican recién al
+# confirmar la transacción externa
+_PENDIENTES = []
+
+def pendientes_por_transaccion(clave):
+    """
+    Registra una llave de `info` con una lista de efectos pendientes: al revertir un savepoint se
+    descartan solo los que se agregaron dentro de él.
+    """
+    _PENDIENTES.append(clave)
+
+class SesionAplicacion(Session):
+    """
+    Sesión de base de datos de la aplicación.
+
+    Mientras `info['diferir_commit']` está activo, `commit()` solo hace flush: los cambios quedan en
+    la transacción abierta hasta que quien activó la bandera llame a `confirmar()`. Lo usa el
+    endpoint de lotes para ejecutar varios controladores dentro de una sola transacción. Un `rollback()`
+    durante ese tiempo deshace la transacción completa y deja `info['rollback_diferido']` en True para
+    que el lote no informe como confirmado lo que ya se perdió.
+
+    `after_commit` también se dispara al confirmar un savepoint (begin_nested); los suscriptores que
+    publican efectos fuera de la base de datos deben ignorarlo con `es_savepoint(sesion)`.
+
+    Mientras `info['replica']` tiene un engine (lo activa @solo_lectura), las consultas de lectura se
+    envían a esa réplica; los flush y las sentencias de escritura siguen yendo a la base principal, y
+    también las lecturas posteriores a una escritura de la misma transacción (`info['hubo_escrituras']`).
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get('replica')
+        # Después de una escritura en la transacción, las lecturas siguen en la principal para verla
+        if (replica is not None and bind is None and not self._flushing and not self.info.get('hubo_escrituras')
+                and getattr(clause, 'is_select', False)):
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def commit(self):
+        if self.info.get('diferir_commit'):
+            self.flush()
+            return
+        super().commit()
+
+    def rollback(self):
+        if self.info.get('diferir_commit'):
+            self.info['rollback_diferido'] = True
+        super().rollback()
+
+    def confirmar(self):
+        """
+        Confirma la transacción aunque el commit esté diferido.
+        """
+        super().commit()
+
+def es_savepoint(sesion):
+    """
+    Indica si el commit en curso es el de un savepoint y no el de la transacción externa.
+    """
+    return sesion.in_nested_transaction()
+
+@event.listens_for(SesionAplicacion, 'after_transaction_create')
+def _marcar_pendientes(sesion, transaccion):
+    if transaccion.nested:
+        marcas = sesion.info.setdefault('marcas_pendientes', weakref.WeakKeyDictionary())
+        marcas[transaccion] = {clave: len(sesion.info.get(clave) or ()) for clave in _PENDIENTES}
+
+@event.listens_for(SesionAplicacion, 'after_soft_rollback')
+def _descartar_pendientes_del_savepoint(sesion, transaccion_previa):
+    if not transaccion_previa.nested:
+        return
+    marca = sesion.info.get('marcas_pendientes', {}).get(transaccion_previa)
+    for clave, cantidad in (marca or {}).items():
+        pendientes = sesion.info.get(clave)
+        if pendientes is not None:
+            del pendientes[cantidad:]
@@ -0,0 +1,57 @@
+from sqlalchemy import event, insert, select, update
+from .modelos import VersionDatos, Usuario, VERSION_CATALOGO
+
+_versiones = VersionDatos.__table__
+_usuarios = Usuario.__table__
+
+def incrementar_version(conexion, nombre):
+    """
+    Incrementa la versión `nombre` con la conexión de la transacción que hace el cambio.
+
+    El UPDATE bloquea la fila hasta el commit: otra transacción que quiera incrementarla espera, así que
+    las versiones se confirman en orden.
+
+    Retorna:
+        La versión nueva.
+    """
+    resultado = conexion.execute(update(_versiones).where(_versiones.c.Nombre == nombre)
+                                 .values(Valor=_versiones.c.Valor + 1))
+    if resultado.rowcount == 0:
+        # La fila se crea con la migración; este caso solo ocurre en bases creadas de otra forma
+        conexion.execute(insert(_versiones).values(Nombre=nombre, Valor=1))
+    return leer_version(conexion, nombre)
+
+def leer_version(conexion, nombre):
+    """
+    Versión vigente de `nombre` (0 si nunca cambió). Acepta una conexión o una sesión.
+    """
+    return conexion.execute(select(_versiones.c.Valor).where(_versiones.c.Nombre == nombre)).scalar() or 0
+
+def avanzar_secuencia_usuario(conexion, id_usuario):
+    """
+    Incrementa la secuencia de cambios de un usuario en la transacción que modifica sus datos. Igual que
+    las versiones, el bloqueo de la fila hace que las secuencias se confirmen en orden.
+
+    Retorna:
+        La secuencia nueva, con la que se marcan las filas modificadas.
+    """
+    avanzar_secuencias_usuarios(conexion, [id_usuario])
+    return leer_secuencia_usuario(conexion, id_usuario)
+
+def avanzar_secuencias_usuarios(conexion, ids_usuarios):
+    """
+    Incrementa la secuencia de cambios de varios usuarios; `ids_usuarios` es una lista o un SELECT de IDs.
+    """
+    conexion.execute(update(_usuarios).where(_usuarios.c.IDUsuario.in_(ids_usuarios))
+                     .values(SecuenciaCambios=_usuarios.c.SecuenciaCambios + 1,
+                             ActualizadoEn=_usuarios.c.ActualizadoEn))
+
+def leer_secuencia_usuario(conexion, id_usuario):
+    """
+    Secuencia de cambios confirmada (o propia de la transacción en curso) de un usuario.
+    """
+    return conexion.execute(select(_usuarios.c.SecuenciaCambios).where(_usuarios.c.IDUsuario == id_usuario)).scalar() or 0
+
+@event.listens_for(_versiones, 'after_create')
+def _crear_filas(tabla, conexion, **kwargs):
+    conexion.execute(insert(tabla).values(Nombre=VERSION_CATALOGO, Valor=0))
@@ -0,0 +1,165 @@
+"""
+Arnés de los benchmarks de endpoints: envía las peticiones de un escenario con N hilos concurrentes,
+usando el cliente de pruebas de Flask (sin red) o un servidor WSGI real de Werkzeug con conexiones
+HTTP/1.1 persistentes, y resume el throughput y los percentiles de latencia.
+"""
+import http.client
+import json
+import math
+import random
+import threading
+import time
+from werkzeug.serving import make_server, WSGIRequestHandler
+
+MODO_CLIENTE_PRUEBAS = 'prueba'
+MODO_SERVIDOR = 'servidor'
+
+class ClientePruebas:
+    """
+    Envía las peticiones con app.test_client(): mide la aplicación sin el costo de la red.
+    """
+
+    def __init__(self, app):
+        self._cliente = app.test_client()
+
+    def enviar(self, peticion):
+        respuesta = self._cliente.open(peticion.ruta, method=peticion.metodo, json=peticion.cuerpo,
+                                       headers=peticion.cabeceras)
+        respuesta.get_data()
+        respuesta.close()
+        return respuesta.status_code
+
+    def cerrar(self):
+        pass
+
+class _ManejadorHTTP11(WSGIRequestHandler):
+    # HTTP/1.1 permite reutilizar la conexión entre peticiones, como lo hace un cliente real
+    protocol_version = 'HTTP/1.1'
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+class ServidorWSGI:
+    """
+    Servidor Werkzeug con un hilo por conexión, en un puerto libre de 127.0.0.1. Se usa como context manager.
+    """
+
+    def __init__(self, app):
+        self._servidor = make_server('127.0.0.1', 0, app, threaded=True, request_handler=_ManejadorHTTP11)
+        self.puerto = self._servidor.server_port
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, name='servidor-benchmark', daemon=True)
+
+    def __enter__(self):
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._servidor.shutdown()
+        self._hilo.join()
+
+class ClienteHTTP:
+    """
+    Envía las peticiones por una conexión HTTP persistente al servidor indicado.
+    """
+
+    def __init__(self, host, puerto):
+        self._conexion = http.client.HTTPConnection(host, puerto, timeout=60)
+
+    def enviar(self, peticion):
+        cabeceras = dict(peticion.cabeceras)
+        cuerpo = None
+        if peticion.cuerpo is not None:
+            cuerpo = json.dumps(peticion.cuerpo).encode('utf-8')
+            cabeceras['Content-Type'] = 'application/json'
+        try:
+            return self._intercambiar(peticion.metodo, peticion.ruta, cuerpo, cabeceras)
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            # El servidor cerró la conexión persistente; se reintenta una vez con una nueva
+            self._conexion.close()
+            return self._intercambiar(peticion.metodo, peticion.ruta, cuerpo, cabeceras)
+
+    def _intercambiar(self, metodo, ruta, cuerpo, cabeceras):
+        self._conexion.request(metodo, ruta, body=cuerpo, headers=cabeceras)
+        respuesta = self._conexion.getresponse()
+        respuesta.read()
+        return respuesta.status
+
+    def cerrar(self):
+        self._conexion.close()
+
+def percentil(valores_ordenados, porcentaje):
+    """
+    Percentil por rango más cercano de una lista ya ordenada.
+    """
+    if not valores_ordenados:
+        return 0.0
+    posicion = max(math.ceil(porcentaje / 100 * len(valores_ordenados)) - 1, 0)
+    return valores_ordenados[posicion]
+
+def ejecutar(escenario, datos, crear_cliente, concurrencia=1, peticiones=200, calentamiento=10, semilla=42, modo=''):
+    """
+    Ejecuta `peticiones` peticiones del escenario repartidas entre `concurrencia` hilos, cada uno con su
+    propio cliente. Cada hilo envía antes `calentamiento` peticiones que no se miden.
+
+    Retorna:
+        Un dict con throughput (rps), percentiles de latencia en milisegundos y cantidad de errores
+        (respuestas con estado >= 400 o excepciones).
+    """
+    latencias = []
+    errores = [0]
+    candado = threading.Lock()
+    inicio = []
+    barrera = threading.Barrier(concurrencia, action=lambda: inicio.append(time.perf_counter()))
+
+    def trabajar(indice, cantidad):
+        aleatorio = random.Random(semilla * 1000 + indice)
+        cliente = crear_cliente()
+        propias = []
+        fallidas = 0
+        try:
+            for _ in range(calentamiento):
+                try:
+                    cliente.enviar(escenario.armar(datos, aleatorio))
+                except Exception:
+                    # Los errores del calentamiento no se miden, pero no deben dejar a los demás esperando
+                    pass
+            barrera.wait()
+            for _ in range(cantidad):
+                peticion = escenario.armar(datos, aleatorio)
+                comienzo = time.perf_counter()
+                try:
+                    estado = cliente.enviar(peticion)
+                except Exception:
+                    estado = None
+                propias.append(time.perf_counter() - comienzo)
+                if estado is None or estado >= 400:
+                    fallidas += 1
+        finally:
+            cliente.cerrar()
+        with candado:
+            latencias.extend(propias)
+            errores[0] += fallidas
+
+    hilos = [
+        threading.Thread(target=trabajar, args=(indice, peticiones // concurrencia + (1 if indice < peticiones % concurrencia else 0)))
+        for indice in range(concurrencia)
+    ]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio[0] if inicio else 0.0
+
+    latencias.sort()
+    return {
+        "escenario": escenario.nombre,
+        "modo": modo,
+        "concurrencia": concurrencia,
+        "peticiones": len(latencias),
+        "errores": errores[0],
+        "rps": round(len(latencias) / duracion, 2) if duracion else 0.0,
+        "media_ms": round(sum(latencias) / len(latencias) * 1000, 3) if latencias else 0.0,
+        "p50_ms": round(percentil(latencias, 50) * 1000, 3),
+        "p95_ms": round(percentil(latencias, 95) * 1000, 3),
+        "p99_ms": round(percentil(latencias, 99) * 1000, 3),
+    }
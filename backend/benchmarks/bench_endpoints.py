@@ -0,0 +1,126 @@
+"""
+Benchmark de endpoints: genera datos sintéticos deterministas en una base de datos propia y mide el
+throughput y los percentiles de latencia (p50/p95/p99) de los escenarios con distintas concurrencias,
+con el cliente de pruebas de Flask y con un servidor WSGI real.
+
+Uso:
+    python -m backend.benchmarks.bench_endpoints [--escenarios productos,login,lista]
+        [--modos prueba,servidor] [--concurrencia 1,8] [--peticiones 200]
+        [--usuarios 20 --productos 2000 --listas 3 --items 20 --semilla 42]
+        [--guardar base.json] [--comparar base.json --tolerancia 0.15]
+
+Con --comparar el proceso termina con código 1 si algún escenario empeora más que la tolerancia.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from contextlib import nullcontext
+from backend.app import crear_app_servidor
+from backend.benchmarks.arnes import ejecutar, ClientePruebas, ClienteHTTP, ServidorWSGI, MODO_SERVIDOR
+from backend.benchmarks.datos import generar_datos
+from backend.benchmarks.escenarios import ESCENARIOS
+from backend.benchmarks.lineas_base import (TOLERANCIA_POR_DEFECTO, guardar_linea_base, cargar_linea_base,
+                                            comparar)
+
+# Parámetros que definen los datos generados; los resultados solo son comparables si coinciden
+PARAMETROS_DATOS = ('usuarios', 'productos', 'listas', 'items', 'semilla', 'entorno')
+
+VARIABLES_BASE_DE_DATOS = ('URL_BASE_DE_DATOS', 'URL_BASE_DE_DATOS_SANDBOX', 'URL_BASE_DE_DATOS_PRUEBAS')
+
+def _lista(valor):
+    return [parte.strip() for parte in valor.split(',') if parte.strip()]
+
+def _enteros(valor):
+    return [int(parte) for parte in _lista(valor)]
+
+def preparar_entorno(url_base_de_datos):
+    # El benchmark escribe datos: todas las URLs apuntan a su propia base aunque el .env defina otras,
+    # y no se usan réplicas
+    for variable in VARIABLES_BASE_DE_DATOS:
+        os.environ[variable] = url_base_de_datos
+    os.environ['URL_BASE_DE_DATOS_REPLICAS'] = ''
+    os.environ.setdefault('JWT_SECRET_KEY', 'clave-de-benchmark-solo-para-mediciones-locales')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--escenarios', type=_lista, default=['productos', 'catalogo', 'buscar', 'listas', 'lista', 'login'],
+                        help=f"Separados por comas: {', '.join(ESCENARIOS)}")
+    parser.add_argument('--modos', type=_lista, default=['prueba', 'servidor'])
+    parser.add_argument('--concurrencia', type=_enteros, default=[1, 8])
+    parser.add_argument('--peticiones', type=int, default=200, help="Peticiones medidas por escenario y concurrencia")
+    parser.add_argument('--calentamiento', type=int, default=5, help="Peticiones sin medir por hilo")
+    parser.add_argument('--usuarios', type=int, default=20)
+    parser.add_argument('--productos', type=int, default=2000)
+    parser.add_argument('--listas', type=int, default=3, help="Listas por usuario")
+    parser.add_argument('--items', type=int, default=20, help="Elementos por lista")
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--entorno', choices=['staging', 'produccion'], default='staging')
+    parser.add_argument('--base-de-datos', default=None, help="URL de una base vacía; por defecto un SQLite temporal")
+    parser.add_argument('--guardar', metavar='RUTA', help="Guarda los resultados como línea base JSON")
+    parser.add_argument('--comparar', metavar='RUTA', help="Compara contra una línea base JSON")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_POR_DEFECTO)
+    args = parser.parse_args(argv)
+
+    desconocidos = [nombre for nombre in args.escenarios if nombre not in ESCENARIOS]
+    if desconocidos:
+        parser.error(f"Escenarios desconocidos: {', '.join(desconocidos)}")
+
+    with tempfile.TemporaryDirectory() as directorio:
+        preparar_entorno(args.base_de_datos or f"sqlite:///{os.path.join(directorio, 'benchmark.db')}")
+        resultados = correr(args)
+
+    mostrar(resultados)
+    return reportar_comparacion(args, resultados)
+
+def correr(args):
+    # La configuración se lee del entorno al crear la aplicación, después de preparar_entorno
+    app = crear_app_servidor(args.entorno)
+    with app.app_context():
+        datos = generar_datos(args.usuarios, args.productos, args.listas, args.items, args.semilla)
+
+    resultados = []
+    for modo in args.modos:
+        with (ServidorWSGI(app) if modo == MODO_SERVIDOR else nullcontext()) as servidor:
+            if servidor is not None:
+                crear_cliente = lambda: ClienteHTTP('127.0.0.1', servidor.puerto)
+            else:
+                crear_cliente = lambda: ClientePruebas(app)
+            for nombre in args.escenarios:
+                for concurrencia in args.concurrencia:
+                    resultado = ejecutar(ESCENARIOS[nombre], datos, crear_cliente, concurrencia, args.peticiones,
+                                         args.calentamiento, args.semilla, modo)
+                    print(f"  {modo:<9} {nombre:<10} c={concurrencia:<3} {resultado['rps']:>9.1f} rps", file=sys.stderr)
+                    resultados.append(resultado)
+    return resultados
+
+def mostrar(resultados):
+    print(f"{'modo':<9} {'escenario':<10} {'conc':>4} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errores':>8}")
+    for resultado in resultados:
+        print(f"{resultado['modo']:<9} {resultado['escenario']:<10} {resultado['concurrencia']:>4} {resultado['rps']:>9.1f} "
+              f"{resultado['p50_ms']:>9.2f} {resultado['p95_ms']:>9.2f} {resultado['p99_ms']:>9.2f} {resultado['errores']:>8}")
+
+def reportar_comparacion(args, resultados):
+    parametros = {clave: getattr(args, clave) for clave in (
+        'escenarios', 'modos', 'concurrencia', 'peticiones', 'calentamiento') + PARAMETROS_DATOS}
+    codigo = 0
+    if args.comparar:
+        linea_base = cargar_linea_base(args.comparar)
+        diferentes = [clave for clave in PARAMETROS_DATOS if linea_base.get("parametros", {}).get(clave) != parametros[clave]]
+        if diferentes:
+            print(f"Aviso: la línea base se midió con otros datos ({', '.join(diferentes)})", file=sys.stderr)
+        print(f"\nComparación con {args.comparar} (tolerancia {args.tolerancia:.0%})")
+        for comparacion in comparar(resultados, linea_base, args.tolerancia):
+            cambio = "" if comparacion["cambio"] is None else f"{comparacion['cambio']:+.1%}"
+            marca = "REGRESIÓN" if comparacion["regresion"] else ""
+            print(f"  {comparacion['modo']:<9} {comparacion['escenario']:<10} c={comparacion['concurrencia']:<3} "
+                  f"{comparacion['metrica']:<8} {comparacion['base']:>10} -> {comparacion['actual']:<10} {cambio:>8} {marca}")
+            if comparacion["regresion"]:
+                codigo = 1
+    if args.guardar:
+        guardar_linea_base(args.guardar, resultados, parametros)
+        print(f"\nLínea base guardada en {args.guardar}")
+    return codigo
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Microbenchmark de serialización: compara la forma anterior de construir las respuestas (diccionarios
+armados a mano y el proveedor JSON por defecto de Flask) con los serializadores compilados y
+ProveedorJSON (orjson cuando está instalado).
+
+Uso:
+    python -m backend.benchmarks.bench_serializacion [--filas 10000] [--repeticiones 20]
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from backend.app.serializacion import ProveedorJSON, Serializador, orjson
+
+def generar_filas(cantidad):
+    # Filas con los mismos atributos que una proyección de Producto
+    ahora = datetime(2024, 1, 1, 12, 0, 0)
+    return [SimpleNamespace(id=i, nombre=f"Producto {i}", tipo_medida='kg' if i % 2 else 'unidad', actualizado_en=ahora)
+            for i in range(1, cantidad + 1)]
+
+def anterior(proveedor, filas):
+    # Código previo de los controladores: diccionario a mano + json.dumps de la biblioteca estándar
+    productos = [{'id': fila.id, 'nombre': fila.nombre, 'tipo_medida': fila.tipo_medida} for fila in filas]
+    return proveedor.dumps(productos).encode('utf-8')
+
+def compilado(proveedor, serializador, filas):
+    return proveedor.dumps_bytes(serializador.muchos(filas))
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--filas', type=int, default=10000)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    app = Flask(__name__)
+    por_defecto = DefaultJSONProvider(app)
+    proveedor = ProveedorJSON(app)
+    app.config['JSON_USAR_ORJSON'] = False
+    proveedor_estandar = ProveedorJSON(app)
+    serializador = Serializador(['id', 'nombre', 'tipo_medida'])
+    filas = generar_filas(args.filas)
+
+    # Las variantes deben producir el mismo documento (orjson no agrega espacios ni escapa no-ASCII)
+    referencia = json.loads(anterior(por_defecto, filas))
+    assert json.loads(compilado(proveedor, serializador, filas)) == referencia
+    assert json.loads(compilado(proveedor_estandar, serializador, filas)) == referencia
+
+    variantes = [
+        ("anterior (dict a mano + json)", lambda: anterior(por_defecto, filas)),
+        ("compilado + json", lambda: compilado(proveedor_estandar, serializador, filas)),
+    ]
+    if orjson is not None:
+        variantes.append(("compilado + orjson", lambda: compilado(proveedor, serializador, filas)))
+    else:
+        print("orjson no está instalado; se omite esa variante")
+
+    base = None
+    print(f"{args.filas} filas, mediana de {args.repeticiones} repeticiones")
+    for nombre, funcion in variantes:
+        segundos = medir(funcion, args.repeticiones)
+        base = base or segundos
+        print(f"  {nombre:<32} {segundos * 1000:9.3f} ms  {base / segundos:5.2f}x")
+
+if __name__ == '__main__':
+    main()
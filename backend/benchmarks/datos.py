@@ -0,0 +1,100 @@
+"""
+Generador determinista de datos sintéticos para los benchmarks de endpoints: usuarios, catálogo de
+productos y listas de compras con sus elementos. Con la misma semilla y los mismos tamaños sobre una
+base vacía se obtienen siempre las mismas filas (y los mismos IDs).
+"""
+import random
+from dataclasses import dataclass, field
+from flask_jwt_extended import create_access_token
+from sqlalchemy import insert
+from backend.app.modelos import db, Usuario, Producto, ListaCompra, ProductoLista
+from backend.app.eventos_listas import recontar_listas
+from backend.servicios.hashing import servicio_hash
+from backend.servicios.identidad import claims_usuario
+
+# Contraseña de todos los usuarios sintéticos (el escenario de login la necesita en texto plano)
+CONTRASENA = 'benchmark'
+
+ALIMENTOS = ['Leche', 'Pan', 'Arroz', 'Frijol', 'Huevo', 'Queso', 'Manzana', 'Plátano', 'Tomate', 'Cebolla',
+             'Pollo', 'Café', 'Azúcar', 'Harina', 'Aceite', 'Jabón', 'Yogur', 'Avena', 'Atún', 'Pasta']
+VARIANTES = ['entero', 'light', 'orgánico', 'integral', 'familiar', 'chico', 'grande', 'clásico']
+TIPOS_MEDIDA = ['Unidades', 'Kilogramos', 'Litros', 'Gramos', 'Paquetes']
+
+# Filas por sentencia INSERT
+TAMANO_LOTE = 1000
+
+@dataclass
+class DatosSinteticos:
+    """
+    Lo que los escenarios necesitan saber de los datos generados.
+    """
+    usuarios: list                      # Nombres de usuario, en orden de IDUsuario
+    tokens: list                        # Token de acceso de cada usuario (mismo orden)
+    ids_productos: list
+    listas_por_usuario: list            # IDs de las listas de cada usuario (mismo orden)
+    items_por_lista: dict = field(default_factory=dict)  # IDLista -> IDs de sus elementos
+    contrasena: str = CONTRASENA
+
+def generar_datos(usuarios=20, productos=2000, listas_por_usuario=3, items_por_lista=20, semilla=42):
+    """
+    Inserta los datos sintéticos en la base de la aplicación actual, que debe estar vacía.
+
+    El hash de la contraseña se calcula una sola vez con el servicio de hash (el mismo costo de bcrypt
+    que en el registro) y se reutiliza en todos los usuarios.
+
+    Retorna:
+        Un DatosSinteticos con los nombres, tokens e IDs generados.
+    """
+    if db.session.query(Usuario.id).first() is not None or db.session.query(Producto.id).first() is not None:
+        raise ValueError("La base de datos del benchmark debe estar vacía")
+
+    aleatorio = random.Random(semilla)
+    hash_contrasena = servicio_hash.hashear(CONTRASENA)
+    if isinstance(hash_contrasena, bytes):
+        hash_contrasena = hash_contrasena.decode('utf-8')
+
+    nombres = [f"usuario{indice:05d}" for indice in range(1, usuarios + 1)]
+    _insertar(Usuario, [{"nombre_usuario": nombre, "hash_contrasena": hash_contrasena} for nombre in nombres])
+    _insertar(Producto, [
+        {"nombre": f"{aleatorio.choice(ALIMENTOS)} {aleatorio.choice(VARIANTES)} {indice}",
+         "tipo_medida": aleatorio.choice(TIPOS_MEDIDA)}
+        for indice in range(1, productos + 1)
+    ])
+    usuarios_creados = Usuario.query.order_by(Usuario.id).all()
+    ids_productos = [fila.id for fila in Producto.query.with_entities(Producto.id).order_by(Producto.id)]
+
+    _insertar(ListaCompra, [
+        {"nombre": f"Lista {numero} de {usuario.nombre_usuario}", "id_usuario": usuario.id}
+        for usuario in usuarios_creados for numero in range(1, listas_por_usuario + 1)
+    ])
+    listas = ListaCompra.query.with_entities(ListaCompra.id, ListaCompra.id_usuario).order_by(ListaCompra.id).all()
+    elementos = []
+    for lista in listas:
+        for id_producto in aleatorio.sample(ids_productos, min(items_por_lista, len(ids_productos))):
+            elementos.append({"id_lista": lista.id, "id_producto": id_producto,
+                              "cantidad": aleatorio.randint(1, 5), "comprado": aleatorio.random() < 0.3})
+    _insertar(ProductoLista, elementos)
+    # La inserción masiva no pasa por los eventos del ORM: los contadores se calculan al final
+    recontar_listas(db.session.connection())
+    db.session.commit()
+
+    items = {}
+    for fila in ProductoLista.query.with_entities(ProductoLista.id_lista, ProductoLista.id).order_by(ProductoLista.id):
+        items.setdefault(fila.id_lista, []).append(fila.id)
+    listas_de = {usuario.id: [] for usuario in usuarios_creados}
+    for lista in listas:
+        listas_de[lista.id_usuario].append(lista.id)
+
+    return DatosSinteticos(
+        usuarios=nombres,
+        tokens=[create_access_token(identity=usuario.nombre_usuario, additional_claims=claims_usuario(usuario),
+                                    expires_delta=False)
+                for usuario in usuarios_creados],
+        ids_productos=ids_productos,
+        listas_por_usuario=[listas_de[usuario.id] for usuario in usuarios_creados],
+        items_por_lista=items,
+    )
+
+def _insertar(modelo, filas):
+    for inicio in range(0, len(filas), TAMANO_LOTE):
+        db.session.execute(insert(modelo), filas[inicio:inicio + TAMANO_LOTE])
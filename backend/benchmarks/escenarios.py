@@ -0,0 +1,63 @@
+"""
+Escenarios de los benchmarks de endpoints. Cada escenario arma la siguiente petición a partir de los
+datos sintéticos y de un generador aleatorio propio de cada hilo, así que la secuencia de peticiones
+es reproducible.
+"""
+from collections import namedtuple
+from urllib.parse import quote
+from backend.benchmarks.datos import ALIMENTOS
+
+# Petición a enviar: método HTTP, ruta (con query string), cuerpo JSON o None y cabeceras
+Peticion = namedtuple('Peticion', ['metodo', 'ruta', 'cuerpo', 'cabeceras'])
+
+# `armar(datos, aleatorio)` devuelve una Peticion; `escritura` indica si modifica la base de datos
+Escenario = namedtuple('Escenario', ['nombre', 'descripcion', 'armar', 'escritura'])
+
+def _autorizacion(datos, indice):
+    return {'Authorization': f"Bearer {datos.tokens[indice]}"}
+
+def _usuario(datos, aleatorio):
+    return aleatorio.randrange(len(datos.usuarios))
+
+def _productos_paginados(datos, aleatorio):
+    despues = aleatorio.choice(datos.ids_productos)
+    return Peticion('GET', f"/v1/productos?limit=100&after={despues}", None,
+                    _autorizacion(datos, _usuario(datos, aleatorio)))
+
+def _catalogo_completo(datos, aleatorio):
+    return Peticion('GET', "/v1/productos", None, _autorizacion(datos, _usuario(datos, aleatorio)))
+
+def _buscar(datos, aleatorio):
+    termino = aleatorio.choice(ALIMENTOS)[:aleatorio.randint(3, 5)]
+    return Peticion('GET', f"/v1/productos/buscar?q={quote(termino)}&limit=10", None,
+                    _autorizacion(datos, _usuario(datos, aleatorio)))
+
+def _login(datos, aleatorio):
+    nombre = datos.usuarios[_usuario(datos, aleatorio)]
+    return Peticion('POST', "/v1/login", {"nombreUsuario": nombre, "contrasena": datos.contrasena}, {})
+
+def _listas(datos, aleatorio):
+    return Peticion('GET', "/v1/listascompras", None, _autorizacion(datos, _usuario(datos, aleatorio)))
+
+def _lista(datos, aleatorio):
+    indice = _usuario(datos, aleatorio)
+    id_lista = aleatorio.choice(datos.listas_por_usuario[indice])
+    return Peticion('GET', f"/v1/listascompras/{id_lista}", None, _autorizacion(datos, indice))
+
+def _marcar(datos, aleatorio):
+    indice = _usuario(datos, aleatorio)
+    id_lista = aleatorio.choice(datos.listas_por_usuario[indice])
+    items = datos.items_por_lista.get(id_lista) or [0]
+    ids = aleatorio.sample(items, min(5, len(items)))
+    return Peticion('PATCH', f"/v1/listascompras/{id_lista}/productos:comprado",
+                    {"ids": ids, "comprado": aleatorio.random() < 0.5}, _autorizacion(datos, indice))
+
+ESCENARIOS = {escenario.nombre: escenario for escenario in [
+    Escenario('productos', "GET /v1/productos paginado (100 por página)", _productos_paginados, False),
+    Escenario('catalogo', "GET /v1/productos completo (instantánea del catálogo)", _catalogo_completo, False),
+    Escenario('buscar', "GET /v1/productos/buscar por prefijo", _buscar, False),
+    Escenario('login', "POST /v1/login (bcrypt)", _login, False),
+    Escenario('listas', "GET /v1/listascompras del usuario", _listas, False),
+    Escenario('lista', "GET /v1/listascompras/<id> con sus productos", _lista, False),
+    Escenario('marcar', "PATCH /v1/listascompras/<id>/productos:comprado", _marcar, True),
+]}
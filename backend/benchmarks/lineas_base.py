@@ -0,0 +1,64 @@
+"""
+Líneas base de los benchmarks de endpoints: se guardan como JSON para comparar una rama contra ellas.
+"""
+import json
+import platform
+from datetime import datetime, timezone
+
+# Diferencia relativa a partir de la cual un cambio se considera regresión
+TOLERANCIA_POR_DEFECTO = 0.15
+
+def _llave(resultado):
+    return (resultado["escenario"], resultado["modo"], resultado["concurrencia"])
+
+def guardar_linea_base(ruta, resultados, parametros):
+    """
+    Guarda los resultados junto con los parámetros de la corrida y el entorno en que se midieron.
+    """
+    documento = {
+        "creado_en": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "parametros": parametros,
+        "resultados": resultados,
+    }
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(documento, archivo, indent=2, ensure_ascii=False)
+        archivo.write("\n")
+
+def cargar_linea_base(ruta):
+    with open(ruta, encoding='utf-8') as archivo:
+        return json.load(archivo)
+
+def comparar(resultados, linea_base, tolerancia=TOLERANCIA_POR_DEFECTO):
+    """
+    Compara los resultados con los de la línea base del mismo escenario, modo y concurrencia.
+
+    Retorna:
+        Una lista de dicts {escenario, modo, concurrencia, metrica, base, actual, cambio, regresion}, con
+        `cambio` relativo a la base. Es regresión una caída de rps o una suba de p95/p99 mayor que la
+        tolerancia, o cualquier error nuevo.
+    """
+    base = {_llave(resultado): resultado for resultado in linea_base["resultados"]}
+    comparaciones = []
+    for resultado in resultados:
+        anterior = base.get(_llave(resultado))
+        if anterior is None:
+            continue
+        for metrica, mayor_es_mejor in (("rps", True), ("p95_ms", False), ("p99_ms", False)):
+            valor_base, valor = anterior[metrica], resultado[metrica]
+            cambio = (valor - valor_base) / valor_base if valor_base else 0.0
+            empeoro = -cambio if mayor_es_mejor else cambio
+            comparaciones.append({
+                "escenario": resultado["escenario"], "modo": resultado["modo"],
+                "concurrencia": resultado["concurrencia"], "metrica": metrica,
+                "base": valor_base, "actual": valor, "cambio": round(cambio, 4),
+                "regresion": empeoro > tolerancia,
+            })
+        if resultado["errores"] > anterior["errores"]:
+            comparaciones.append({
+                "escenario": resultado["escenario"], "modo": resultado["modo"],
+                "concurrencia": resultado["concurrencia"], "metrica": "errores",
+                "base": anterior["errores"], "actual": resultado["errores"], "cambio": None, "regresion": True,
+            })
+    return comparaciones
@@ -1,8 +1,27 @@
 import os
-from dotenv import load_dotenv
+from backend.servicios.pool import PoolMedido
 
-# Carga variables de entorno
-load_dotenv()
+# Las variables del archivo .env las carga backend.app.cargar_entorno (crear_app, o conftest en las
+# pruebas) antes de importar este módulo
+
+def opciones_pool(tamano, desborde, timeout=30, reciclaje=1800):
+    """
+    Opciones del pool de conexiones para SQLALCHEMY_ENGINE_OPTIONS. Los valores recibidos son los del
+    entorno; las variables DB_POOL_* permiten ajustarlos en cada despliegue.
+
+    Cada worker de Gunicorn tiene su propio pool: workers x (tamaño + desborde) no debe superar el
+    max_connections de la base de datos.
+    """
+    return {
+        'poolclass': PoolMedido,
+        'pool_size': int(os.environ.get('DB_POOL_TAMANO', tamano)),
+        'max_overflow': int(os.environ.get('DB_POOL_DESBORDE', desborde)),
+        # Segundos que una petición espera una conexión libre antes de fallar
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', timeout)),
+        # Reabrir las conexiones antes de que el servidor (wait_timeout) o un proxy las cierre
+        'pool_recycle': int(os.environ.get('DB_POOL_RECICLAJE', reciclaje)),
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') not in ('0', 'false', 'no'),
+    }
 
 class Config(object):
     # Configuración base para la aplicación Flask, incluye claves secretas y conexión a la base de datos.
@@ -18,22 +37,106 @@ class Config(object):
     if SQLALCHEMY_DATABASE_URI is None:
         raise ValueError("No se ha configurado URL_BASE_DE_DATOS para la aplicación Flask. ¿Olvidaste definirlo en tu archivo .env?")
 
+    # Réplicas de lectura (URLs separadas por comas) para los endpoints de solo lectura, y segundos
+    # durante los que un usuario lee de la principal después de escribir para ver sus propios cambios
+    # (el cliente los reenvía con la cookie ultima_escritura o la cabecera X-Ultima-Escritura)
+    REPLICAS_LECTURA = [url.strip() for url in os.environ.get('URL_BASE_DE_DATOS_REPLICAS', '').split(',') if url.strip()]
+    REPLICAS_VENTANA_LECTURA_PROPIA = float(os.environ.get('REPLICAS_VENTANA_LECTURA_PROPIA', 5))
+
+    # Pool de procesos para bcrypt y límite de operaciones de hash admitidas a la vez
+    HASH_PROCESOS = int(os.environ.get('HASH_PROCESOS', 2))
+    HASH_COLA_MAXIMA = int(os.environ.get('HASH_COLA_MAXIMA', 32))
+    HASH_RETRY_AFTER = int(os.environ.get('HASH_RETRY_AFTER', 1))
+
+    # Cantidad de productos insertados por transacción en las importaciones masivas
+    IMPORTACION_TAMANO_LOTE = int(os.environ.get('IMPORTACION_TAMANO_LOTE', 1000))
+
+    # Usar orjson para serializar JSON cuando está instalado (0 fuerza el módulo json estándar)
+    JSON_USAR_ORJSON = os.environ.get('JSON_USAR_ORJSON', '1') not in ('0', 'false', 'no')
+
+    # Máximo de operaciones aceptadas en una sola petición a /v1/batch
+    LOTE_MAXIMO_OPERACIONES = int(os.environ.get('LOTE_MAXIMO_OPERACIONES', 50))
+
+    # Versión compartida del catálogo, para que cada worker detecte los cambios hechos por otros: por
+    # defecto una fila de la base de datos; CATALOGO_ARCHIVO_VERSION la reemplaza por un archivo (solo
+    # sirve entre workers del mismo host). Desactivar CATALOGO_VERSION_COMPARTIDA deja la versión local
+    # al proceso, válido únicamente con un solo worker.
+    CATALOGO_VERSION_COMPARTIDA = os.environ.get('CATALOGO_VERSION_COMPARTIDA', '1') not in ('0', 'false', 'no')
+    CATALOGO_ARCHIVO_VERSION = os.environ.get('CATALOGO_ARCHIVO_VERSION')
+
+    # Registrar los puntos de diagnóstico (/v1/diagnostico/*), que exponen contadores internos sin
+    # autenticación; en producción solo se registran si se piden explícitamente
+    DIAGNOSTICO_HABILITADO = os.environ.get('DIAGNOSTICO_HABILITADO', '1') not in ('0', 'false', 'no')
+
+    # Métricas de las peticiones en /metrics. Con varios workers, METRICAS_DIRECTORIO es un directorio
+    # compartido donde cada proceso deja su instantánea para sumarlas al exportar
+    METRICAS_HABILITADAS = os.environ.get('METRICAS_HABILITADAS', '1') not in ('0', 'false', 'no')
+    METRICAS_DIRECTORIO = os.environ.get('METRICAS_DIRECTORIO')
+    METRICAS_INTERVALO_ESCRITURA = float(os.environ.get('METRICAS_INTERVALO_ESCRITURA', 1))
+    # /metrics no usa JWT: con METRICAS_TOKEN se exige `Authorization: Bearer <token>`; sin token solo se
+    # registra si METRICAS_PUBLICAS lo permite (no en producción, donde se espera una red interna o el token)
+    METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN')
+    METRICAS_PUBLICAS = os.environ.get('METRICAS_PUBLICAS', '1') not in ('0', 'false', 'no')
+
+    # Conteo de sentencias SQL por petición: cabeceras X-DB-Queries/X-DB-Time y detección de N+1
+    # cuando una misma sentencia se ejecuta SQL_UMBRAL_REPETIDAS veces (advertir o fallar)
+    SQL_CONTABILIDAD = os.environ.get('SQL_CONTABILIDAD', '1') not in ('0', 'false', 'no')
+    SQL_CABECERAS = os.environ.get('SQL_CABECERAS', '0') not in ('0', 'false', 'no')
+    SQL_UMBRAL_REPETIDAS = int(os.environ.get('SQL_UMBRAL_REPETIDAS', 10))
+    SQL_ACCION_REPETIDAS = os.environ.get('SQL_ACCION_REPETIDAS', 'advertir')
+
+    # Perfilador de peticiones: todas (PERFILADOR_HABILITADO) o las que traen la cabecera X-Perfilar
+    # firmada con PERFILADOR_SECRETO (flask firmar-perfilado). Los perfiles se guardan en PERFILADOR_DIRECTORIO
+    PERFILADOR_PERMITIDO = True
+    PERFILADOR_HABILITADO = os.environ.get('PERFILADOR_HABILITADO', '0') not in ('0', 'false', 'no')
+    PERFILADOR_SECRETO = os.environ.get('PERFILADOR_SECRETO')
+    PERFILADOR_DIRECTORIO = os.environ.get('PERFILADOR_DIRECTORIO', 'perfiles')
+
+    # Qué hacer con el esquema al arrancar: verificar (migrar solo si no está en la última revisión),
+    # exigir (fallar sin ejecutar DDL; para workers cuando las migraciones se aplican en el despliegue)
+    # u omitir
+    ARRANQUE_ESQUEMA = os.environ.get('ARRANQUE_ESQUEMA', 'verificar')
+
+    # Canal de eventos de las listas (SSE): intervalo de latidos y duración máxima de cada conexión
+    SSE_LATIDO_SEGUNDOS = float(os.environ.get('SSE_LATIDO_SEGUNDOS', 15))
+    SSE_DURACION_MAXIMA = float(os.environ.get('SSE_DURACION_MAXIMA', 300))
+    # Máximo de conexiones SSE abiertas por proceso (0 = sin límite). gunicorn.conf lo fija por debajo
+    # de la cantidad de hilos cuando no hay workers gevent
+    SSE_MAXIMO_CONEXIONES = int(os.environ.get('SSE_MAXIMO_CONEXIONES', 0))
+
+    # Días que se conservan los tombstones de /v1/sync: un cursor más antiguo recibe 410 y el cliente
+    # sincroniza desde cero. `flask podar-eliminaciones` borra los más viejos
+    SINCRONIZACION_RETENCION_DIAS = int(os.environ.get('SINCRONIZACION_RETENCION_DIAS', 30))
+
 class Desarrollo(Config):
     # Configuración específica para el entorno de desarrollo, incluye depuración y registro de SQL.
     DEBUG = True
-    SQLALCHEMY_ECHO = True  # Habilita registro de consultas SQL
+    # El registro de cada consulta SQL es opcional; las cabeceras X-DB-* dan el resumen por petición
+    SQLALCHEMY_ECHO = os.environ.get('SQLALCHEMY_ECHO', '0') not in ('0', 'false', 'no')
+    SQL_CABECERAS = True
 
 class Produccion(Config):
     # Configuración para el entorno de producción, deshabilita la depuración.
     DEBUG = False
+    SQLALCHEMY_ENGINE_OPTIONS = opciones_pool(tamano=10, desborde=10)
+    DIAGNOSTICO_HABILITADO = os.environ.get('DIAGNOSTICO_HABILITADO', '0') not in ('0', 'false', 'no')
+    METRICAS_PUBLICAS = os.environ.get('METRICAS_PUBLICAS', '0') not in ('0', 'false', 'no')
+    # El perfilador nunca se activa en producción, aunque las variables de entorno lo pidan
+    PERFILADOR_PERMITIDO = False
+    PERFILADOR_HABILITADO = False
+    PERFILADOR_SECRETO = None
 
 class Staging(Config):
     # Configuración para el entorno de staging, similar a producción pero puede incluir diferencias menores.
     DEBUG = False
+    SQLALCHEMY_ENGINE_OPTIONS = opciones_pool(tamano=5, desborde=5)
 
 class PruebasEfimeras(Config):
     # Configuración para pruebas efímeras, con base de datos de sandbox.
     TESTING = True
+    HASH_PROCESOS = 0  # Las pruebas calculan el hash en el mismo hilo
+    SQL_CABECERAS = True
+    SQL_ACCION_REPETIDAS = 'fallar'  # Un N+1 hace fallar la prueba que lo provoca
     SQLALCHEMY_DATABASE_URI = os.environ.get('URL_BASE_DE_DATOS_SANDBOX')
     if SQLALCHEMY_DATABASE_URI is None:
         raise ValueError("No se ha configurado URL_BASE_DE_DATOS_SANDBOX para la aplicación Flask. ¿Olvidaste definirlo en tu archivo .env?")
@@ -41,6 +144,9 @@ class PruebasEfimeras(Config):
 class Pruebas(Config):
     # Configuración para el entorno de pruebas, con base de datos específica para pruebas.
     TESTING = True
+    HASH_PROCESOS = 0  # Las pruebas calculan el hash en el mismo hilo
+    SQL_CABECERAS = True
+    SQL_ACCION_REPETIDAS = 'fallar'  # Un N+1 hace fallar la prueba que lo provoca
     SQLALCHEMY_DATABASE_URI = os.environ.get('URL_BASE_DE_DATOS_PRUEBAS')
     if SQLALCHEMY_DATABASE_URI is None:
         raise ValueError("No se ha configurado URL_BASE_DE_DATOS_PRUEBAS para la aplicación Flask. ¿Olvidaste definirlo en tu archivo .env?")
\ No newline at end of file
@@ -0,0 +1,46 @@
+import hashlib
+from datetime import timezone
+from flask import request, current_app
+
+def calcular_etag(*partes):
+    """
+    Calcula un validador fuerte a partir de las partes que identifican la versión de un recurso.
+    """
+    return hashlib.sha1(':'.join(str(parte) for parte in partes).encode('utf-8')).hexdigest()
+
+def _en_utc(fecha):
+    # Las columnas DateTime se guardan sin zona horaria; se interpretan como UTC y sin microsegundos
+    if fecha is None:
+        return None
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    return fecha.replace(microsecond=0)
+
+def respuesta_no_modificada(etag, ultima_modificacion=None):
+    """
+    Devuelve una respuesta 304 si la petición condicional (If-None-Match / If-Modified-Since) indica
+    que el cliente ya tiene esta versión del recurso, o None si hay que enviar el contenido.
+    """
+    # If-None-Match tiene prioridad sobre If-Modified-Since
+    if request.if_none_match:
+        if not request.if_none_match.contains_weak(etag):
+            return None
+    elif request.if_modified_since is None or ultima_modificacion is None:
+        return None
+    elif _en_utc(ultima_modificacion) > request.if_modified_since:
+        return None
+
+    respuesta = current_app.response_class(status=304)
+    agregar_validadores(respuesta, etag, ultima_modificacion)
+    return respuesta
+
+def agregar_validadores(respuesta, etag, ultima_modificacion=None):
+    """
+    Agrega ETag, Last-Modified y Cache-Control a una respuesta para permitir GETs condicionales.
+    """
+    respuesta.set_etag(etag)
+    if ultima_modificacion is not None:
+        respuesta.last_modified = _en_utc(ultima_modificacion)
+    # Los clientes pueden guardar la respuesta pero deben revalidarla en cada uso
+    respuesta.headers['Cache-Control'] = 'private, no-cache'
+    return respuesta
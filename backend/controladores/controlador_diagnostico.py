@@ -0,0 +1,55 @@
+import hmac
+from flask import jsonify, current_app, request, Response
+from backend.servicios.catalogo import cache_catalogo
+from backend.servicios.notificaciones import centro_eventos
+from backend.servicios.pool import estadisticas_pool
+from backend.servicios.metricas import metricas_peticiones
+from backend.app.modelos import db
+
+class ControladorDiagnostico:
+    """
+    ControladorDiagnostico expone contadores internos del proceso para monitoreo.
+    """
+
+    @staticmethod
+    def estadisticas_catalogo():
+        """
+        Devuelve los contadores del caché del catálogo (tasa de aciertos y tiempos de reconstrucción).
+        """
+        return jsonify(cache_catalogo.estadisticas()), 200
+
+    @staticmethod
+    def estadisticas_eventos():
+        """
+        Devuelve los contadores del centro de eventos de las listas (canales, suscriptores conectados).
+        """
+        return jsonify(centro_eventos.estadisticas()), 200
+
+    @staticmethod
+    def estado_pool():
+        """
+        Devuelve el estado de los pools de conexiones (en uso, desborde, tiempos de espera y timeouts).
+        """
+        return jsonify({clave or 'principal': estadisticas_pool(engine) for clave, engine in db.engines.items()}), 200
+
+    @staticmethod
+    def tiempos_arranque():
+        """
+        Devuelve el desglose del tiempo de arranque del proceso por fase y el resultado de la verificación del esquema.
+        """
+        return jsonify(current_app.extensions['arranque'].a_dict()), 200
+
+    @staticmethod
+    def metricas():
+        """
+        Devuelve las métricas de las peticiones (latencia por endpoint, bytes, peticiones en curso) en el
+        formato de texto de Prometheus, sumadas entre los workers que comparten METRICAS_DIRECTORIO.
+
+        Con METRICAS_TOKEN configurado exige `Authorization: Bearer <token>` y responde 401 sin él.
+        """
+        token = current_app.config.get('METRICAS_TOKEN')
+        if token:
+            recibido = request.headers.get('Authorization', '')
+            if not hmac.compare_digest(recibido.encode('utf-8'), f"Bearer {token}".encode('utf-8')):
+                return jsonify({"error": "Token de métricas inválido"}), 401, {'WWW-Authenticate': 'Bearer'}
+        return Response(metricas_peticiones.exportar(), mimetype='text/plain; version=0.0.4')
@@ -1,6 +1,23 @@
 from flask import request, jsonify
+from sqlalchemy import insert, update
+from sqlalchemy.orm import selectinload, joinedload
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from backend.app.modelos import db, ListaCompra, Usuario, Producto, ProductoLista
+from backend.app.modelos import db, ListaCompra, Producto, ProductoLista
+from backend.app.serializacion import serializar, serializador_de
+from backend.app.eventos_listas import ajustar_contadores, expirar_listas, registrar_evento_lista
+from backend.app.versiones import avanzar_secuencia_usuario
+from backend.controladores.paginacion import leer_paginacion
+from backend.controladores.sse import leer_ultimo_evento, respuesta_sse
+from backend.servicios.notificaciones import centro_eventos
+from backend.servicios.replicas import solo_lectura
+from backend.servicios.identidad import obtener_id_usuario_actual
+
+# Campos de la lista en el índice de listas del usuario
+CAMPOS_RESUMEN_LISTA = ['id', 'nombre', 'completa', 'total_items', 'comprados', 'creado_en', 'actualizado_en']
+COLUMNAS_RESUMEN_LISTA = [getattr(ListaCompra, campo) for campo in CAMPOS_RESUMEN_LISTA]
+SERIALIZADOR_RESUMEN_LISTA = serializador_de(ListaCompra).con_campos(CAMPOS_RESUMEN_LISTA)
+
+VALORES_BOOLEANOS = {'1': True, 'true': True, 'si': True, 'sí': True, '0': False, 'false': False, 'no': False}
 
 class ControladorListaCompras:
     """
@@ -16,24 +33,98 @@ class ControladorListaCompras:
         Retorna:
             Una respuesta JSON indicando el éxito o fracaso de la operación.
         """
-        user_id = get_jwt_identity()  # Suponiendo que la identidad es el ID del usuario
         data = request.get_json()
 
         nombre_lista = data.get('nombre')
         if not nombre_lista:
             return jsonify({"error": "El nombre de la lista es requerido"}), 400
         
-        # Obtener el usuario de la base de datos
-        usuario = Usuario.query.filter_by(nombre_usuario=user_id).first()
-        if not usuario:
+        # Obtener el ID del usuario desde el token (o el caché de identidades)
+        id_usuario = obtener_id_usuario_actual()
+        if id_usuario is None:
             return jsonify({"error": "Usuario no encontrado"}), 404
 
-        nueva_lista = ListaCompra(nombre=nombre_lista, id_usuario=usuario.id)
+        nueva_lista = ListaCompra(nombre=nombre_lista, id_usuario=id_usuario)
         db.session.add(nueva_lista)
         db.session.commit()
 
         return jsonify({"mensaje": "Lista de compras creada exitosamente."}), 201
 
+    @staticmethod
+    @jwt_required()
+    @solo_lectura
+    def consultar_listas_compras():
+        """
+        Consulta las listas de compras del usuario con su avance.
+
+        Los contadores `total_items` y `comprados` y el indicador `completa` se leen de la fila de
+        cada lista, donde se mantienen al agregar, quitar o marcar elementos; `actualizado_en` cambia
+        también con esas operaciones.
+
+        Parámetros opcionales (query string):
+            limit / after: paginación por cursor sobre IDLista.
+            completa: true/false para filtrar las listas con todos sus elementos comprados.
+
+        Retorna:
+            {"listas": [...], "next_cursor": ...}
+        """
+        try:
+            limite, despues = leer_paginacion()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        completa = request.args.get('completa')
+        if completa is not None:
+            completa = VALORES_BOOLEANOS.get(completa.lower())
+            if completa is None:
+                return jsonify({"error": "El parámetro completa debe ser true o false"}), 400
+
+        # Los contadores se mantienen en la propia fila de la lista, así que no se recorre producto_lista
+        consulta = ListaCompra.query.with_entities(*COLUMNAS_RESUMEN_LISTA).filter(
+            ListaCompra.id_usuario == obtener_id_usuario_actual()).order_by(ListaCompra.id)
+
+        if despues is not None:
+            consulta = consulta.filter(ListaCompra.id > despues)
+        if completa is not None:
+            consulta = consulta.filter(ListaCompra.completa == completa)
+
+        # Se pide una fila extra para saber si existe una página siguiente
+        filas = consulta.limit(limite + 1).all()
+        siguiente = filas[limite - 1].id if len(filas) > limite else None
+
+        return jsonify({
+            "listas": SERIALIZADOR_RESUMEN_LISTA.muchos(filas[:limite]),
+            "next_cursor": siguiente
+        }), 200
+
+    @staticmethod
+    @jwt_required()
+    @solo_lectura
+    def consultar_lista_compras(listaID):
+        """
+        Consulta una lista de compras del usuario con sus productos.
+
+        La lista se carga con una consulta y sus elementos, junto con el producto de cada uno, con una
+        segunda consulta (selectin + joined), sin importar cuántos elementos tenga la lista.
+
+        Retorna:
+            La lista con un arreglo `productos`, donde cada elemento incluye su `producto`, o 404 si la
+            lista no existe o pertenece a otro usuario.
+        """
+        id_usuario = obtener_id_usuario_actual()
+        lista_compra = ListaCompra.query.options(
+            selectinload(ListaCompra.productos).joinedload(ProductoLista.producto)
+        ).filter_by(id=listaID, id_usuario=id_usuario).first()
+        if not lista_compra:
+            return jsonify({"error": "Lista de compras no encontrada"}), 404
+
+        datos = serializar(lista_compra)
+        datos["productos"] = [
+            dict(serializar(item), producto=serializar(item.producto))
+            for item in sorted(lista_compra.productos, key=lambda item: item.id)
+        ]
+        return jsonify(datos), 200
+
     @staticmethod
     @jwt_required()
     def agregar_producto_a_lista(listaID):
@@ -67,4 +158,140 @@ class ControladorListaCompras:
         db.session.add(nuevo_producto_lista)
         db.session.commit()
 
-        return jsonify({"mensaje": "Producto agregado exitosamente a la lista"}), 201
\ No newline at end of file
+        return jsonify({"mensaje": "Producto agregado exitosamente a la lista"}), 201
+
+    @staticmethod
+    @jwt_required()
+    def agregar_productos_a_lista_bulk(listaID):
+        """
+        Agrega varios productos a una lista de compras en una sola operación.
+
+        Recibe un arreglo de objetos {id_producto, cantidad}. Todos los IDs de producto se validan con
+        una sola consulta IN y las filas válidas se insertan juntas con un único commit.
+
+        Retorna:
+            201 con la cantidad agregada y los errores por elemento, o 400 si ningún elemento es válido.
+        """
+        data = request.get_json()
+        if not isinstance(data, list) or not data:
+            return jsonify({"error": "Se esperaba un arreglo no vacío de productos"}), 400
+
+        # Solo las listas del usuario autenticado; una ajena responde igual que una inexistente
+        lista_compra = ListaCompra.query.with_entities(ListaCompra.id, ListaCompra.id_usuario).filter_by(
+            id=listaID, id_usuario=obtener_id_usuario_actual()).first()
+        if not lista_compra:
+            return jsonify({"error": "Lista de compras no encontrada"}), 404
+
+        errores = []
+        validos = []
+        for indice, item in enumerate(data):
+            if not isinstance(item, dict) or not _es_entero(item.get('id_producto')) or not _es_entero(item.get('cantidad')):
+                errores.append({"indice": indice, "error": "Información proporcionada inválida o incompleta"})
+            elif item['cantidad'] <= 0:
+                errores.append({"indice": indice, "error": "La cantidad debe ser mayor a cero"})
+            else:
+                validos.append((indice, item))
+
+        # Validar todos los productos con una sola consulta
+        ids_pedidos = {item['id_producto'] for _, item in validos}
+        existentes = set()
+        if ids_pedidos:
+            existentes = {fila.id for fila in Producto.query.with_entities(Producto.id).filter(Producto.id.in_(ids_pedidos))}
+
+        filas = []
+        for indice, item in validos:
+            if item['id_producto'] not in existentes:
+                errores.append({"indice": indice, "id_producto": item['id_producto'], "error": "Producto no encontrado"})
+            else:
+                filas.append({"id_lista": listaID, "id_producto": item['id_producto'], "cantidad": item['cantidad'], "comprado": False})
+
+        if not filas:
+            return jsonify({"error": "Ningún producto pudo agregarse a la lista", "errores": errores}), 400
+
+        # Insertar todas las filas en un solo executemany y confirmar una vez
+        # La inserción masiva no pasa por los eventos del ORM: la secuencia de cambios del dueño (para
+        # /v1/sync) y los contadores se ajustan explícitamente
+        secuencia = avanzar_secuencia_usuario(db.session.connection(), lista_compra.id_usuario)
+        for fila in filas:
+            fila["secuencia"] = secuencia
+        db.session.execute(insert(ProductoLista), filas)
+        ajustar_contadores(db.session.connection(), listaID, total_items=len(filas))
+        expirar_listas(db.session, [listaID])
+        registrar_evento_lista(db.session, listaID, 'productos_agregados', {"cantidad": len(filas)})
+        db.session.commit()
+
+        errores.sort(key=lambda error: error["indice"])
+        return jsonify({"mensaje": "Productos agregados exitosamente a la lista", "agregados": len(filas), "errores": errores}), 201
+
+    @staticmethod
+    @jwt_required()
+    def marcar_productos_comprados(listaID):
+        """
+        Marca o desmarca como comprados varios elementos de una lista en una sola operación.
+
+        Recibe {"ids": [IDProductoLista, ...], "comprado": true|false}. Se ejecuta un único UPDATE
+        filtrado por lista, IDs y valor distinto al pedido, sin cargar los elementos; los contadores de
+        la lista se ajustan con la cantidad de filas modificadas.
+
+        Retorna:
+            200 con la cantidad de elementos modificados y los contadores actualizados de la lista.
+        """
+        data = request.get_json()
+        if not isinstance(data, dict) or not isinstance(data.get('comprado'), bool):
+            return jsonify({"error": "Información proporcionada inválida o incompleta"}), 400
+        ids = data.get('ids')
+        if not isinstance(ids, list) or not ids or not all(_es_entero(id_item) for id_item in ids):
+            return jsonify({"error": "Se esperaba un arreglo no vacío de IDs enteros"}), 400
+
+        lista_compra = ListaCompra.query.with_entities(ListaCompra.id).filter_by(
+            id=listaID, id_usuario=obtener_id_usuario_actual()).first()
+        if not lista_compra:
+            return jsonify({"error": "Lista de compras no encontrada"}), 404
+
+        comprado = data['comprado']
+        secuencia = avanzar_secuencia_usuario(db.session.connection(), obtener_id_usuario_actual())
+        # Solo se tocan las filas cuyo valor cambia, así rowcount es el delta exacto de los contadores
+        modificados = db.session.execute(
+            update(ProductoLista)
+            .where(ProductoLista.id_lista == listaID, ProductoLista.id.in_(set(ids)), ProductoLista.comprado != comprado)
+            .values(comprado=comprado, secuencia=secuencia)
+        ).rowcount
+        ajustar_contadores(db.session.connection(), listaID, comprados=modificados if comprado else -modificados)
+        expirar_listas(db.session, [listaID])
+        if modificados:
+            registrar_evento_lista(db.session, listaID, 'productos_marcados', {"ids": sorted(set(ids)), "comprado": comprado})
+        db.session.commit()
+
+        contadores = ListaCompra.query.with_entities(
+            ListaCompra.total_items, ListaCompra.comprados, ListaCompra.completa).filter_by(id=listaID).one()
+        return jsonify({
+            "actualizados": modificados,
+            "total_items": contadores.total_items,
+            "comprados": contadores.comprados,
+            "completa": contadores.completa
+        }), 200
+
+    @staticmethod
+    @jwt_required()
+    def eventos_lista(listaID):
+        """
+        Canal de eventos (Server-Sent Events) con los cambios de los elementos de una lista.
+
+        Publica producto_agregado, producto_eliminado, producto_comprado, producto_desmarcado,
+        productos_agregados y productos_marcados a medida que se confirman. Con Last-Event-ID se
+        reenvían los eventos perdidos desde el historial; si ya no están, se envía `reinicio`.
+        """
+        lista_compra = ListaCompra.query.with_entities(ListaCompra.id).filter_by(
+            id=listaID, id_usuario=obtener_id_usuario_actual()).first()
+        if not lista_compra:
+            return jsonify({"error": "Lista de compras no encontrada"}), 404
+        try:
+            ultimo_id = leer_ultimo_evento(request)
+        except ValueError:
+            return jsonify({"error": "Last-Event-ID debe ser un entero"}), 400
+
+        return respuesta_sse(centro_eventos, listaID, ultimo_id)
+
+def _es_entero(valor):
+    # En JSON true/false llegan como bool, que en Python es subclase de int
+    return isinstance(valor, int) and not isinstance(valor, bool)
@@ -0,0 +1,134 @@
+from flask import request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from werkzeug.test import EnvironBuilder
+from backend.app.modelos import db
+from backend.servicios.consultas_sql import contabilidad_sql
+
+# Blueprints cuyos endpoints pueden invocarse dentro de un lote
+BLUEPRINTS_PERMITIDOS = {'usuarios_bp', 'productos_bp', 'listas_compras_bp'}
+METODOS_PERMITIDOS = {'GET', 'POST', 'PUT', 'PATCH', 'DELETE'}
+
+class ControladorLote:
+    """
+    ControladorLote ejecuta varias operaciones de la API en una sola petición HTTP y una sola transacción.
+    """
+
+    @staticmethod
+    @jwt_required()
+    def ejecutar_lote():
+        """
+        Ejecuta en orden una lista de operaciones contra los endpoints existentes.
+
+        Body:
+            {"operaciones": [{"metodo": "POST", "ruta": "/v1/productos", "cuerpo": {...}}, ...],
+             "atomico": false}
+
+        Cada operación se despacha dentro del mismo proceso, reutilizando la cabecera Authorization del
+        lote. Con `atomico` en true, la primera operación fallida (estado >= 400) deshace todas las
+        anteriores y las restantes no se ejecutan; si no, cada operación fallida se deshace por separado.
+        Si una operación deshace la transacción por su cuenta (db.session.rollback()), todo el lote se
+        pierde: las operaciones restantes no se ejecutan y el lote no se confirma.
+
+        Retorna:
+            Un JSON con el resultado ({estado, cuerpo}) de cada operación y si la transacción se confirmó.
+        """
+        data = request.get_json(silent=True) or {}
+        operaciones = data.get('operaciones')
+        atomico = bool(data.get('atomico', False))
+
+        if not isinstance(operaciones, list) or not operaciones:
+            return jsonify({"error": "Se esperaba una lista no vacía de operaciones"}), 400
+        maximo = current_app.config['LOTE_MAXIMO_OPERACIONES']
+        if len(operaciones) > maximo:
+            return jsonify({"error": f"Un lote admite como máximo {maximo} operaciones"}), 400
+
+        cabeceras = {}
+        if 'Authorization' in request.headers:
+            cabeceras['Authorization'] = request.headers['Authorization']
+
+        sesion = db.session()
+        sesion.info['diferir_commit'] = True
+        resultados = []
+        fallo = False
+        try:
+            for operacion in operaciones:
+                if (atomico and fallo) or sesion.info.get('rollback_diferido'):
+                    resultados.append({"estado": 424, "cuerpo": {"error": "Operación no ejecutada por un fallo anterior en el lote"}})
+                    continue
+
+                # En modo no atómico cada operación tiene su propio savepoint
+                punto = None if atomico else sesion.begin_nested()
+                estado, cuerpo = _despachar(operacion, cabeceras)
+                resultados.append({"estado": estado, "cuerpo": cuerpo})
+
+                if sesion.info.get('rollback_diferido'):
+                    # La operación deshizo la transacción completa, savepoint incluido
+                    fallo = True
+                elif estado >= 400:
+                    fallo = True
+                    if punto is not None:
+                        punto.rollback()
+                elif punto is not None:
+                    punto.commit()
+
+            confirmado = not (atomico and fallo) and not sesion.info.get('rollback_diferido')
+            if confirmado:
+                sesion.confirmar()
+            else:
+                sesion.rollback()
+        except Exception:
+            sesion.rollback()
+            raise
+        finally:
+            sesion.info.pop('diferir_commit', None)
+            sesion.info.pop('rollback_diferido', None)
+
+        return jsonify({"resultados": resultados, "confirmado": confirmado}), 200
+
+def _despachar(operacion, cabeceras):
+    # Ejecuta una operación del lote como una petición interna y devuelve (estado, cuerpo). Se llama
+    # directamente a la vista: los hooks before/after_request (métricas, perfilador, conteo de SQL) solo
+    # corren para la petición del lote, y las sentencias de cada operación se suman a su cuenta
+    if not isinstance(operacion, dict) or not isinstance(operacion.get('ruta'), str):
+        return 400, {"error": "Operación inválida: se requiere una ruta"}
+    metodo = str(operacion.get('metodo', 'GET')).upper()
+    if metodo not in METODOS_PERMITIDOS:
+        return 405, {"error": f"Método no permitido: {metodo}"}
+
+    argumentos = {'path': operacion['ruta'], 'method': metodo, 'headers': cabeceras}
+    if 'cuerpo' in operacion:
+        argumentos['json'] = operacion['cuerpo']
+    entorno = EnvironBuilder(**argumentos).get_environ()
+    contabilidad_sql.compartir_cuenta(entorno)
+
+    with current_app.request_context(entorno) as contexto:
+        peticion = contexto.request
+        if peticion.routing_exception is not None:
+            return peticion.routing_exception.code, {"error": peticion.routing_exception.description}
+        # Solo se admiten endpoints de los blueprints de la API (no lotes anidados)
+        endpoint = peticion.url_rule.endpoint
+        if endpoint.split('.')[0] not in BLUEPRINTS_PERMITIDOS:
+            return 404, {"error": "Ruta no disponible dentro de un lote"}
+
+        try:
+            try:
+                resultado = current_app.view_functions[endpoint](**peticion.view_args)
+            except Exception as e:
+                # Los manejadores de errores de la aplicación (por ejemplo, los de JWT) arman la respuesta
+                resultado = current_app.handle_user_exception(e)
+            respuesta = current_app.make_response(resultado)
+        except Exception as e:
+            current_app.logger.exception("Error en una operación del lote")
+            return 500, {"error": f"Error interno: {e}"}
+
+    if respuesta.is_streamed or respuesta.direct_passthrough:
+        # Las respuestas en flujo (eventos SSE, exportaciones, stream=1) no terminan hasta agotar el
+        # generador: leerlas dejaría abiertas la transacción del lote y su conexión. close() libera lo
+        # que la vista reservó (por ejemplo, el cupo de conexiones SSE)
+        respuesta.close()
+        return 400, {"error": "Las respuestas en flujo no están disponibles dentro de un lote"}
+
+    cuerpo = respuesta.get_json(silent=True)
+    if cuerpo is None:
+        cuerpo = respuesta.get_data(as_text=True)
+    return respuesta.status_code, cuerpo
@@ -1,6 +1,24 @@
-from flask import request, jsonify
+from flask import request, jsonify, current_app
 from flask_jwt_extended import get_jwt_identity, jwt_required
-from backend.app.modelos import db, Producto
+from sqlalchemy import func, select
+from backend.app.modelos import db, Producto, VersionDatos, VERSION_CATALOGO
+from backend.app.serializacion import serializador_de, serializar
+from backend.controladores.paginacion import solicita_paginacion, leer_paginacion, leer_campos
+from backend.controladores.condicional import calcular_etag, respuesta_no_modificada, agregar_validadores
+from backend.controladores.streaming import solicita_flujo, respuesta_en_flujo
+from backend.servicios.importacion import FORMATOS_POR_TIPO, importar_productos
+from backend.servicios.busqueda import indice_productos
+from backend.servicios.catalogo import cache_catalogo, Instantanea
+from backend.servicios.replicas import solo_lectura, en_principal
+
+# Columnas que pueden pedirse mediante el parámetro `fields` en las consultas de productos
+COLUMNAS_PRODUCTO = {
+    'id': Producto.id,
+    'nombre': Producto.nombre,
+    'tipo_medida': Producto.tipo_medida,
+}
+
+SERIALIZADOR_PRODUCTO = serializador_de(Producto)
 
 class ControladorProductos:
     @staticmethod
@@ -27,20 +45,128 @@ class ControladorProductos:
 
     @staticmethod
     @jwt_required()
+    @solo_lectura
     def consultar_productos():
-        # Consultar todos los productos de la base de datos
-        productos = Producto.query.all()
-        # Devolver los productos en formato JSON
-        return jsonify([{'id': prod.id, 'nombre': prod.nombre, 'tipo_medida': prod.tipo_medida} for prod in productos]), 200
+        """
+        Consulta los productos del catálogo.
+
+        Parámetros opcionales (query string):
+            fields: columnas a devolver separadas por comas; solo esas se cargan desde la base de datos.
+            limit / after: paginación por cursor sobre IDProducto. Si se indica alguno, la respuesta
+                se envuelve en {"productos": [...], "next_cursor": ...}.
+            stream: con stream=1 (y sin paginación) el arreglo se escribe mientras se recorre un cursor
+                del servidor, sin cargar todo el catálogo en memoria.
+
+        Admite If-None-Match / If-Modified-Since: si el catálogo no cambió se responde 304 después
+        de una sola consulta agregada, sin cargar los productos. El catálogo completo (sin parámetros)
+        se sirve desde una instantánea ya serializada que solo se reconstruye cuando cambia la versión.
+        """
+        if not request.args:
+            return _respuesta_catalogo_completo()
+
+        try:
+            campos = leer_campos(COLUMNAS_PRODUCTO)
+            paginar = solicita_paginacion()
+            if paginar:
+                limite, despues = leer_paginacion()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        etag, ultima_modificacion = _validador_catalogo()
+        no_modificada = respuesta_no_modificada(etag, ultima_modificacion)
+        if no_modificada is not None:
+            return no_modificada
+
+        # El ID siempre se selecciona porque es la llave del cursor
+        columnas = [Producto.id] + [COLUMNAS_PRODUCTO[campo] for campo in campos if campo != 'id']
+        consulta = db.session.query(*columnas).order_by(Producto.id)
+
+        if not paginar and solicita_flujo(request):
+            respuesta = respuesta_en_flujo(consulta, SERIALIZADOR_PRODUCTO.con_campos(campos).a_dict)
+            return agregar_validadores(respuesta, etag, ultima_modificacion), 200
+
+        if not paginar:
+            # Devolver los productos en formato JSON
+            respuesta = jsonify(SERIALIZADOR_PRODUCTO.con_campos(campos).muchos(consulta))
+            return agregar_validadores(respuesta, etag, ultima_modificacion), 200
+
+        if despues is not None:
+            consulta = consulta.filter(Producto.id > despues)
+        # Se pide una fila extra para saber si existe una página siguiente
+        filas = consulta.limit(limite + 1).all()
+        siguiente = filas[limite - 1].id if len(filas) > limite else None
+
+        respuesta = jsonify({
+            "productos": SERIALIZADOR_PRODUCTO.con_campos(campos).muchos(filas[:limite]),
+            "next_cursor": siguiente
+        })
+        return agregar_validadores(respuesta, etag, ultima_modificacion), 200
+
+    @staticmethod
+    @jwt_required()
+    @solo_lectura
+    def exportar_catalogo():
+        """
+        Exporta el catálogo completo como flujo, sin materializarlo en memoria.
+
+        Parámetros opcionales (query string):
+            formato: 'ndjson' (por defecto), 'csv' o 'json'.
+            fields: columnas a exportar separadas por comas.
+        """
+        formato = request.args.get('formato', 'ndjson')
+        if formato not in ('ndjson', 'csv', 'json'):
+            return jsonify({"error": "Formato no soportado, usa ndjson, csv o json"}), 400
+        try:
+            campos = leer_campos(COLUMNAS_PRODUCTO)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        columnas = [Producto.id] + [COLUMNAS_PRODUCTO[campo] for campo in campos if campo != 'id']
+        consulta = db.session.query(*columnas).order_by(Producto.id)
+        serializador = SERIALIZADOR_PRODUCTO.con_campos(campos)
+        return respuesta_en_flujo(consulta, serializador.a_dict, formato=formato, columnas_csv=campos), 200
 
     @staticmethod
     @jwt_required()
+    @solo_lectura
+    def buscar_productos():
+        """
+        Busca productos por nombre (prefijo y coincidencia aproximada, sin distinguir acentos).
+
+        Parámetros (query string):
+            q: texto a buscar (requerido).
+            limit: cantidad máxima de resultados, entre 1 y 50 (10 por defecto).
+        """
+        consulta = request.args.get('q', '').strip()
+        if not consulta:
+            return jsonify({"error": "El parámetro q es requerido"}), 400
+        try:
+            limite = int(request.args.get('limit', 10))
+        except ValueError:
+            return jsonify({"error": "El parámetro limit debe ser un entero"}), 400
+        if limite < 1 or limite > 50:
+            return jsonify({"error": "El parámetro limit debe estar entre 1 y 50"}), 400
+
+        # El índice vive en memoria del proceso; se construye en el primer uso y se reconstruye cuando la
+        # versión compartida del catálogo cambió en otro proceso, leyendo de la base principal
+        with en_principal():
+            indice_productos.asegurar_construido()
+        return jsonify(indice_productos.buscar(consulta, limite)), 200
+
+    @staticmethod
+    @jwt_required()
+    @solo_lectura
     def consultar_producto_por_id(productoID):
         # Consultar un producto por su ID en la base de datos
         producto = Producto.query.filter_by(id=productoID).first()
         if producto:
+            etag = calcular_etag(producto.id, producto.actualizado_en, producto.nombre, producto.tipo_medida)
+            no_modificada = respuesta_no_modificada(etag, producto.actualizado_en)
+            if no_modificada is not None:
+                return no_modificada
             # Devolver el producto en formato JSON si se encuentra
-            return jsonify({'id': producto.id, 'nombre': producto.nombre, 'tipo_medida': producto.tipo_medida}), 200
+            respuesta = jsonify(serializar(producto))
+            return agregar_validadores(respuesta, etag, producto.actualizado_en), 200
         else:
             # Devolver un mensaje de error si el producto no se encuentra
             return jsonify({"error": "Producto no encontrado"}), 404
@@ -79,3 +205,67 @@ class ControladorProductos:
         db.session.commit()
         
         return jsonify({"mensaje": "Producto eliminado exitosamente."}), 200
+
+    @staticmethod
+    @jwt_required()
+    def importar_catalogo():
+        """
+        Importa productos de forma masiva desde el cuerpo de la petición (CSV o NDJSON).
+
+        El cuerpo se lee de forma incremental y se inserta en lotes de IMPORTACION_TAMANO_LOTE filas,
+        cada uno con su propio commit. El formato se toma del Content-Type o del parámetro `formato`.
+        """
+        formato = request.args.get('formato') or FORMATOS_POR_TIPO.get(request.mimetype)
+        if formato not in ('csv', 'ndjson'):
+            return jsonify({"error": "Formato no soportado, usa text/csv o application/x-ndjson"}), 415
+
+        def registrar_progreso(resultado):
+            current_app.logger.info("Importación de productos: %d filas leídas, %d importadas, %d errores",
+                                    resultado.filas, resultado.importados, resultado.total_errores)
+
+        resultado = importar_productos(request.stream, formato,
+                                       tamano_lote=current_app.config['IMPORTACION_TAMANO_LOTE'],
+                                       al_progresar=registrar_progreso)
+
+        estado = 201 if resultado.importados else 400
+        return jsonify(resultado.a_dict()), estado
+
+
+def _respuesta_catalogo_completo():
+    # La instantánea dura hasta el siguiente cambio del catálogo: se construye desde la base principal
+    with en_principal():
+        if db.session.info.get('diferir_commit') or db.session.info.get('cambios_catalogo'):
+            # Dentro de un lote (o con cambios del catálogo sin confirmar) la transacción puede ver filas
+            # que todavía pueden deshacerse: la respuesta se arma aparte, sin tocar la instantánea compartida
+            instantanea = Instantanea(None, *_construir_instantanea())
+        else:
+            instantanea = cache_catalogo.obtener(_construir_instantanea)
+    no_modificada = respuesta_no_modificada(instantanea.etag, instantanea.ultima_modificacion)
+    if no_modificada is not None:
+        return no_modificada
+    respuesta = current_app.response_class(instantanea.cuerpo, mimetype='application/json')
+    return agregar_validadores(respuesta, instantanea.etag, instantanea.ultima_modificacion), 200
+
+def _construir_instantanea():
+    # Serializa el catálogo completo una sola vez por versión
+    productos = []
+    ultima_modificacion = None
+    a_dict = SERIALIZADOR_PRODUCTO.a_dict
+    consulta = db.session.query(Producto.id, Producto.nombre, Producto.tipo_medida, Producto.actualizado_en).order_by(Producto.id)
+    for fila in consulta:
+        productos.append(a_dict(fila))
+        if ultima_modificacion is None or fila.actualizado_en > ultima_modificacion:
+            ultima_modificacion = fila.actualizado_en
+    cuerpo = current_app.json.dumps_bytes(productos)
+    etag = calcular_etag('catalogo', len(productos), ultima_modificacion, cuerpo)
+    return cuerpo, etag, ultima_modificacion
+
+def _validador_catalogo():
+    # La versión compartida del catálogo (versiones_datos) avanza en la misma transacción que cada
+    # cambio de productos, así que dos ediciones dentro del mismo segundo también cambian el ETag; la
+    # última actualización solo se usa para Last-Modified. Una sola consulta para ambas.
+    # Incluye la query string porque cada combinación de parámetros es una representación distinta.
+    version = select(VersionDatos.valor).where(VersionDatos.nombre == VERSION_CATALOGO).scalar_subquery()
+    version, ultima_modificacion = db.session.query(version, func.max(Producto.actualizado_en)).one()
+    etag = calcular_etag('catalogo', version or 0, request.query_string.decode('utf-8'))
+    return etag, ultima_modificacion
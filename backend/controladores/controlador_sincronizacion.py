@@ -0,0 +1,109 @@
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+from flask import request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from sqlalchemy import func, or_, and_
+from backend.app.modelos import db, Producto, ListaCompra, ProductoLista, Eliminacion, VERSION_CATALOGO
+from backend.app.serializacion import serializador_de
+from backend.app.versiones import leer_version, leer_secuencia_usuario
+from backend.servicios.identidad import obtener_id_usuario_actual
+
+# Los tombstones se borran con un margen adicional a la retención: un tombstone lleva la hora de inicio
+# de su transacción, que puede ser anterior a la del cursor que todavía no lo vio
+MARGEN_PODA = timedelta(hours=1)
+
+class ControladorSincronizacion:
+    """
+    ControladorSincronizacion entrega los cambios ocurridos desde la última sincronización del cliente.
+    """
+
+    @staticmethod
+    @jwt_required()
+    def sincronizar():
+        """
+        Devuelve las filas creadas, modificadas y eliminadas desde el cursor indicado.
+
+        Parámetros opcionales (query string):
+            since: cursor opaco devuelto por la sincronización anterior. Sin él se devuelven todas las
+                filas del usuario y todo el catálogo.
+
+        El cursor guarda la versión del catálogo y la secuencia de cambios del usuario ya entregadas. Cada
+        transacción que escribe incrementa una de ellas y marca sus filas con el valor nuevo; como el
+        incremento bloquea la fila del contador hasta el commit, las secuencias se confirman en orden y
+        leer "mayor que el cursor y hasta el valor confirmado" no pierde las transacciones lentas.
+
+        Retorna:
+            {"productos", "listas", "productos_lista", "eliminados": {tabla: [ids]}, "cursor"}; 410 con
+            "resincronizar": true si el cursor es más antiguo que la retención de los tombstones
+            (SINCRONIZACION_RETENCION_DIAS) y el cliente debe sincronizar desde cero.
+        """
+        try:
+            emitido, desde_catalogo, desde_usuario = _leer_cursor(request.args.get('since'))
+        except ValueError:
+            return jsonify({"error": "Cursor de sincronización inválido"}), 400
+
+        id_usuario = obtener_id_usuario_actual()
+        ahora = db.session.query(func.now()).scalar()
+        retencion = timedelta(days=current_app.config['SINCRONIZACION_RETENCION_DIAS'])
+        if emitido is not None and ahora - emitido > retencion:
+            return jsonify({"error": "El cursor de sincronización expiró, sincroniza sin `since`",
+                            "resincronizar": True}), 410
+
+        # Los techos se leen antes que los cambios: lo que se confirme mientras tanto queda para la próxima
+        hasta_catalogo = leer_version(db.session, VERSION_CATALOGO)
+        hasta_usuario = leer_secuencia_usuario(db.session, id_usuario)
+
+        productos = Producto.query.with_entities(Producto.id, Producto.nombre, Producto.tipo_medida)
+        listas = ListaCompra.query.filter(ListaCompra.id_usuario == id_usuario)
+        items = ProductoLista.query.join(ListaCompra, ProductoLista.id_lista == ListaCompra.id).filter(
+            ListaCompra.id_usuario == id_usuario)
+        eliminados = {}
+
+        if emitido is not None:
+            productos = productos.filter(Producto.secuencia > desde_catalogo, Producto.secuencia <= hasta_catalogo)
+            listas = listas.filter(ListaCompra.secuencia > desde_usuario, ListaCompra.secuencia <= hasta_usuario)
+            items = items.filter(ProductoLista.secuencia > desde_usuario, ProductoLista.secuencia <= hasta_usuario)
+            filas = Eliminacion.query.with_entities(Eliminacion.tabla, Eliminacion.id_registro).filter(or_(
+                and_(Eliminacion.id_usuario.is_(None),
+                     Eliminacion.secuencia > desde_catalogo, Eliminacion.secuencia <= hasta_catalogo),
+                and_(Eliminacion.id_usuario == id_usuario,
+                     Eliminacion.secuencia > desde_usuario, Eliminacion.secuencia <= hasta_usuario),
+            )).order_by(Eliminacion.id)
+            for tabla, id_registro in filas:
+                eliminados.setdefault(tabla, []).append(id_registro)
+
+        return jsonify({
+            "productos": serializador_de(Producto).muchos(productos.order_by(Producto.id)),
+            "listas": serializador_de(ListaCompra).muchos(listas.order_by(ListaCompra.id)),
+            "productos_lista": serializador_de(ProductoLista).muchos(items.order_by(ProductoLista.id)),
+            "eliminados": eliminados,
+            "cursor": _crear_cursor(ahora, hasta_catalogo, hasta_usuario)
+        }), 200
+
+
+def limite_poda(ahora, retencion_dias):
+    """
+    Fecha antes de la cual los tombstones ya no los necesita ningún cursor vigente.
+    """
+    return ahora - timedelta(days=retencion_dias) - MARGEN_PODA
+
+def _crear_cursor(momento, catalogo, usuario):
+    contenido = json.dumps({"t": momento.isoformat(), "c": catalogo, "u": usuario}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(contenido.encode('utf-8')).rstrip(b'=').decode('ascii')
+
+def _leer_cursor(cursor):
+    # Retorna (momento de emisión, versión del catálogo, secuencia del usuario) o (None, 0, 0) si no hay
+    # cursor; ValueError si es inválido
+    if not cursor:
+        return None, 0, 0
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        contenido = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        if 'c' not in contenido:
+            # Cursor por fecha de una versión anterior: no se puede continuar, se pide sincronizar desde cero
+            return datetime.min, 0, 0
+        return datetime.fromisoformat(contenido['t']), int(contenido['c']), int(contenido['u'])
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError) as e:
+        raise ValueError(str(e))
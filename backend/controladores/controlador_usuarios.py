@@ -1,6 +1,7 @@
 from flask import request, jsonify
 from flask_jwt_extended import create_access_token
 from backend.app.modelos import db, Usuario
+from backend.servicios.identidad import claims_usuario
 
 class ControladorUsuarios:
     @staticmethod
@@ -35,5 +36,6 @@ class ControladorUsuarios:
         if usuario is None or not usuario.verificar_contrasena(contrasena):
             return jsonify({"error": "Credenciales incorrectas"}), 401
         
-        token = create_access_token(identity=nombre_usuario)
+        # El IDUsuario viaja en el token para que los controladores no tengan que buscarlo por nombre
+        token = create_access_token(identity=nombre_usuario, additional_claims=claims_usuario(usuario))
         return jsonify({"mensaje": "Inicio de sesión exitoso", "token": token}), 200
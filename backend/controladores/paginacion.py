@@ -0,0 +1,52 @@
+from flask import request
+
+LIMITE_POR_DEFECTO = 100
+LIMITE_MAXIMO = 1000
+
+def solicita_paginacion():
+    """
+    Indica si la petición actual pidió paginación explícita mediante `limit` o `after`.
+    """
+    return 'limit' in request.args or 'after' in request.args
+
+def leer_paginacion():
+    """
+    Lee los parámetros de paginación por cursor (keyset) de la petición actual.
+
+    Retorna:
+        Una tupla (limite, despues) donde `despues` es el último ID visto o None.
+
+    Lanza:
+        ValueError si alguno de los parámetros no es un entero válido.
+    """
+    try:
+        limite = int(request.args.get('limit', LIMITE_POR_DEFECTO))
+        despues = request.args.get('after')
+        despues = int(despues) if despues not in (None, '') else None
+    except ValueError:
+        raise ValueError("Los parámetros limit y after deben ser enteros")
+
+    if limite < 1 or limite > LIMITE_MAXIMO:
+        raise ValueError(f"El parámetro limit debe estar entre 1 y {LIMITE_MAXIMO}")
+    return limite, despues
+
+def leer_campos(permitidos):
+    """
+    Lee el parámetro `fields` (lista separada por comas) y lo valida contra los campos permitidos.
+
+    Retorna:
+        La lista de campos pedidos, sin repetidos y en el orden de `permitidos`, o todos los permitidos
+        si no se especificó.
+
+    Lanza:
+        ValueError si se pide un campo desconocido.
+    """
+    crudo = request.args.get('fields')
+    if not crudo:
+        return list(permitidos)
+
+    campos = [campo.strip() for campo in crudo.split(',') if campo.strip()]
+    desconocidos = [campo for campo in campos if campo not in permitidos]
+    if desconocidos or not campos:
+        raise ValueError(f"Campos inválidos: {', '.join(desconocidos) or crudo}")
+    return [campo for campo in permitidos if campo in campos]
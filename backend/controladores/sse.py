@@ -0,0 +1,80 @@
+import time
+from flask import current_app, jsonify
+
+# Milisegundos que el navegador espera antes de reconectarse (campo retry de SSE)
+REINTENTO_MS = 3000
+
+def leer_ultimo_evento(request):
+    """
+    ID del último evento recibido por el cliente (encabezado Last-Event-ID o parámetro last_event_id),
+    o None si es una conexión nueva.
+
+    Lanza:
+        ValueError si el ID no es un entero.
+    """
+    valor = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    if valor in (None, ''):
+        return None
+    return int(valor)
+
+def respuesta_sse(centro, id_lista, ultimo_id):
+    """
+    Construye una respuesta text/event-stream con los eventos de una lista.
+
+    El generador no conserva el contexto de la petición: la sesión de base de datos se libera al
+    terminar la vista y la conexión abierta solo espera en el centro de eventos. Cada
+    SSE_LATIDO_SEGUNDOS se envía un comentario para mantener viva la conexión, y después de
+    SSE_DURACION_MAXIMA segundos se cierra para que el cliente se reconecte con Last-Event-ID.
+
+    Si el proceso ya tiene SSE_MAXIMO_CONEXIONES conexiones abiertas se responde 503 con Retry-After,
+    para que los suscriptores inactivos no ocupen todos los hilos del worker.
+    """
+    if not centro.abrir_conexion(current_app.config['SSE_MAXIMO_CONEXIONES']):
+        respuesta = jsonify({"error": "Demasiadas conexiones de eventos abiertas, intenta de nuevo más tarde"})
+        respuesta.headers['Retry-After'] = str(REINTENTO_MS // 1000)
+        return respuesta, 503
+
+    dumps = current_app.json.dumps
+    latido = current_app.config['SSE_LATIDO_SEGUNDOS']
+    duracion_maxima = current_app.config['SSE_DURACION_MAXIMA']
+    if ultimo_id is None:
+        ultimo_id = centro.ultimo_id(id_lista)
+    abierta = [True]
+
+    def liberar():
+        # Se llama al terminar el generador y al cerrar la respuesta (aunque el cliente se desconecte
+        # antes de recibir nada); el lugar se libera una sola vez
+        if abierta[0]:
+            abierta[0] = False
+            centro.cerrar_conexion()
+
+    def generar():
+        ultimo = ultimo_id
+        fin = time.monotonic() + duracion_maxima
+        try:
+            yield f"retry: {REINTENTO_MS}\n\n"
+            while True:
+                restante = fin - time.monotonic()
+                if restante <= 0:
+                    return
+                eventos, completos = centro.esperar(id_lista, ultimo, min(latido, restante))
+                if not completos:
+                    # Faltan eventos que ya salieron del historial: el cliente debe recargar la lista
+                    ultimo = centro.ultimo_id(id_lista)
+                    yield f"id: {ultimo}\nevent: reinicio\ndata: {{}}\n\n"
+                    continue
+                if not eventos:
+                    yield ": latido\n\n"
+                    continue
+                for evento in eventos:
+                    yield f"id: {evento.id}\nevent: {evento.tipo}\ndata: {dumps(evento.datos)}\n\n"
+                ultimo = eventos[-1].id
+        finally:
+            liberar()
+
+    respuesta = current_app.response_class(generar(), mimetype='text/event-stream')
+    respuesta.call_on_close(liberar)
+    respuesta.headers['Cache-Control'] = 'no-cache'
+    # Evita que un proxy (nginx) acumule los eventos antes de enviarlos
+    respuesta.headers['X-Accel-Buffering'] = 'no'
+    return respuesta
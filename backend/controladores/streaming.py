@@ -0,0 +1,86 @@
+import csv
+import io
+from flask import current_app, stream_with_context
+from backend.app.modelos import db
+
+# Filas pedidas a la base de datos por cada viaje del cursor del servidor
+TAMANO_LOTE_CURSOR = 500
+
+# Bytes acumulados antes de escribir un fragmento de la respuesta
+TAMANO_FRAGMENTO = 64 * 1024
+
+TIPOS_CONTENIDO = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+def solicita_flujo(request):
+    """
+    Indica si la petición pidió la respuesta en modo flujo (?stream=1).
+    """
+    return request.args.get('stream', '').lower() in ('1', 'true', 'si', 'sí')
+
+def respuesta_en_flujo(consulta, serializar, formato='json', columnas_csv=None):
+    """
+    Construye una respuesta que se genera mientras se recorre la consulta con un cursor del servidor.
+
+    Las filas se leen de a TAMANO_LOTE_CURSOR (yield_per) y se escriben en fragmentos, de modo que la
+    memoria usada por la petición no depende de la cantidad de resultados.
+
+    Parámetros:
+        consulta: select() o Query de SQLAlchemy.
+        serializar: función que convierte una fila en un diccionario.
+        formato: 'json' (un arreglo), 'ndjson' (un objeto por línea) o 'csv'.
+        columnas_csv: encabezados del CSV (requerido con formato 'csv').
+    """
+    escribir = {'json': _fragmentos_json, 'ndjson': _fragmentos_ndjson, 'csv': _fragmentos_csv}[formato]
+
+    def generar():
+        if hasattr(consulta, 'statement'):
+            filas = db.session.execute(consulta.statement.execution_options(yield_per=TAMANO_LOTE_CURSOR))
+        else:
+            filas = db.session.execute(consulta.execution_options(yield_per=TAMANO_LOTE_CURSOR))
+        try:
+            yield from _agrupar(escribir((serializar(fila) for fila in filas), columnas_csv))
+        finally:
+            filas.close()
+
+    return current_app.response_class(stream_with_context(generar()), mimetype=TIPOS_CONTENIDO[formato])
+
+def _agrupar(piezas):
+    # Junta piezas pequeñas en fragmentos de ~TAMANO_FRAGMENTO bytes
+    buffer = []
+    tamano = 0
+    for datos in piezas:
+        buffer.append(datos)
+        tamano += len(datos)
+        if tamano >= TAMANO_FRAGMENTO:
+            yield b''.join(buffer)
+            buffer = []
+            tamano = 0
+    if buffer:
+        yield b''.join(buffer)
+
+def _fragmentos_json(objetos, columnas=None):
+    dumps = current_app.json.dumps_bytes
+    yield b'['
+    for indice, objeto in enumerate(objetos):
+        yield (b',' if indice else b'') + dumps(objeto)
+    yield b']'
+
+def _fragmentos_ndjson(objetos, columnas=None):
+    dumps = current_app.json.dumps_bytes
+    for objeto in objetos:
+        yield dumps(objeto) + b'\n'
+
+def _fragmentos_csv(objetos, columnas):
+    salida = io.StringIO()
+    escritor = csv.DictWriter(salida, fieldnames=columnas, extrasaction='ignore')
+    escritor.writeheader()
+    for objeto in objetos:
+        escritor.writerow(objeto)
+        yield salida.getvalue().encode('utf-8')
+        salida.seek(0)
+        salida.truncate(0)
+    yield salida.getvalue().encode('utf-8')
@@ -0,0 +1,55 @@
+# Configuración de Gunicorn para producción:
+#   flask --app "backend.app:crear_app('produccion')" db upgrade   (una vez por despliegue)
+#   ARRANQUE_ESQUEMA=exigir gunicorn -c backend/gunicorn.conf.py "backend.app:crear_app_servidor('produccion')"
+#
+# Con `exigir` cada worker solo compara la revisión guardada con la de los scripts y nunca ejecuta DDL,
+# así que un reinicio escalonado de los workers es rápido y no compite por migrar el esquema.
+#
+# El canal de eventos de las listas (/v1/listascompras/<id>/eventos) mantiene conexiones abiertas por
+# minutos. Con workers gevent cada conexión inactiva es una greenlet en espera y no un hilo del
+# servidor, así que un worker atiende miles de suscriptores (gevent está en requirements.txt).
+# Sin gevent se usa gthread y cada suscriptor ocupa uno de los hilos del worker: las conexiones de
+# eventos se limitan a la mitad de los hilos (SSE_MAXIMO_CONEXIONES) para que el resto atienda la API.
+import os
+
+try:
+    import gevent  # noqa: F401
+    worker_class = 'gevent'
+except ImportError:
+    worker_class = 'gthread'
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Los eventos se publican en memoria del proceso que atendió la escritura: con más de un worker, un
+# suscriptor solo recibe los cambios hechos a través de su mismo worker
+workers = int(os.environ.get('GUNICORN_WORKERS', 1))
+
+# Conexiones simultáneas por worker gevent / hilos por worker gthread
+worker_connections = int(os.environ.get('GUNICORN_CONEXIONES', 2000))
+threads = int(os.environ.get('GUNICORN_HILOS', 8))
+
+if worker_class == 'gthread':
+    # Los workers heredan el entorno del proceso maestro y leen el límite al crear la aplicación
+    maximo_conexiones = int(os.environ.setdefault('SSE_MAXIMO_CONEXIONES', str(max(threads // 2, 1))))
+    if not 0 < maximo_conexiones < threads:
+        raise RuntimeError(f"Sin gevent, SSE_MAXIMO_CONEXIONES debe estar entre 1 y {threads - 1} "
+                           f"(menos que los {threads} hilos de cada worker)")
+
+# Mayor que SSE_DURACION_MAXIMA para que Gunicorn no corte las conexiones de eventos
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 360))
+
+def on_starting(server):
+    # Con la versión del catálogo local a cada proceso, un worker seguiría sirviendo la instantánea (y
+    # los ETag) anteriores a los cambios hechos por otro
+    sin_version_compartida = (os.environ.get('CATALOGO_VERSION_COMPARTIDA', '1') in ('0', 'false', 'no')
+                              and not os.environ.get('CATALOGO_ARCHIVO_VERSION'))
+    if workers > 1 and sin_version_compartida:
+        raise RuntimeError("Con varios workers el catálogo necesita una versión compartida: no desactives "
+                           "CATALOGO_VERSION_COMPARTIDA o configura CATALOGO_ARCHIVO_VERSION")
+
+    # Las instantáneas de métricas de los workers de una ejecución anterior no deben sumarse a las nuevas
+    directorio = os.environ.get('METRICAS_DIRECTORIO')
+    if directorio and os.path.isdir(directorio):
+        for nombre in os.listdir(directorio):
+            if nombre.startswith('metricas_'):
+                os.remove(os.path.join(directorio, nombre))
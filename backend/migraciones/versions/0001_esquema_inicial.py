@@ -0,0 +1,75 @@
+"""Esquema inicial: usuarios, productos, listas_compras y producto_lista
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-17 10:00:00
+
+Las bases de datos existentes se crearon con db.create_all(); en ese caso las tablas
+ya existen y esta revisión solo se registra como aplicada.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _existe_tabla(nombre):
+    return sa.inspect(op.get_bind()).has_table(nombre)
+
+
+def upgrade():
+    if not _existe_tabla('usuarios'):
+        op.create_table('usuarios',
+            sa.Column('IDUsuario', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('NombreUsuario', sa.String(length=50), nullable=False),
+            sa.Column('HashContrasena', sa.String(length=255), nullable=False),
+            sa.Column('CreadoEn', sa.DateTime(), nullable=False),
+            sa.Column('ActualizadoEn', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('IDUsuario'),
+            sa.UniqueConstraint('NombreUsuario')
+        )
+    if not _existe_tabla('productos'):
+        op.create_table('productos',
+            sa.Column('IDProducto', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('Nombre', sa.String(length=100), nullable=False),
+            sa.Column('TipoMedida', sa.String(length=50), nullable=False),
+            sa.Column('CreadoEn', sa.DateTime(), nullable=False),
+            sa.Column('ActualizadoEn', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('IDProducto')
+        )
+    if not _existe_tabla('listas_compras'):
+        op.create_table('listas_compras',
+            sa.Column('IDLista', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('IDUsuario', sa.Integer(), nullable=False),
+            sa.Column('Nombre', sa.String(length=100), nullable=False),
+            sa.Column('Completa', sa.Boolean(), nullable=False),
+            sa.Column('CreadoEn', sa.DateTime(), nullable=False),
+            sa.Column('ActualizadoEn', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['IDUsuario'], ['usuarios.IDUsuario']),
+            sa.PrimaryKeyConstraint('IDLista')
+        )
+    if not _existe_tabla('producto_lista'):
+        op.create_table('producto_lista',
+            sa.Column('IDProductoLista', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('IDProducto', sa.Integer(), nullable=False),
+            sa.Column('IDLista', sa.Integer(), nullable=False),
+            sa.Column('Cantidad', sa.Integer(), nullable=False),
+            sa.Column('Comprado', sa.Boolean(), nullable=False),
+            sa.Column('CreadoEn', sa.DateTime(), nullable=False),
+            sa.Column('ActualizadoEn', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['IDLista'], ['listas_compras.IDLista']),
+            sa.ForeignKeyConstraint(['IDProducto'], ['productos.IDProducto']),
+            sa.PrimaryKeyConstraint('IDProductoLista')
+        )
+
+
+def downgrade():
+    op.drop_table('producto_lista')
+    op.drop_table('listas_compras')
+    op.drop_table('productos')
+    op.drop_table('usuarios')
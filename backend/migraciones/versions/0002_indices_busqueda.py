@@ -0,0 +1,43 @@
+"""Índices para las búsquedas por usuario, por lista, por nombre y por fecha de actualización
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 10:05:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# (nombre del índice, tabla, columnas)
+INDICES = [
+    ('ix_usuarios_ActualizadoEn', 'usuarios', ['ActualizadoEn']),
+    ('ix_productos_Nombre', 'productos', ['Nombre']),
+    ('ix_productos_ActualizadoEn', 'productos', ['ActualizadoEn']),
+    ('ix_listas_compras_IDUsuario', 'listas_compras', ['IDUsuario']),
+    ('ix_listas_compras_ActualizadoEn', 'listas_compras', ['ActualizadoEn']),
+    ('ix_producto_lista_IDLista_IDProducto', 'producto_lista', ['IDLista', 'IDProducto']),
+    ('ix_producto_lista_ActualizadoEn', 'producto_lista', ['ActualizadoEn']),
+]
+
+
+def _indices_existentes(tabla):
+    return {indice['name'] for indice in sa.inspect(op.get_bind()).get_indexes(tabla)}
+
+
+def upgrade():
+    # Se omiten los índices que ya existan (por ejemplo, en bases creadas con db.create_all())
+    for nombre, tabla, columnas in INDICES:
+        if nombre not in _indices_existentes(tabla):
+            op.create_index(nombre, tabla, columnas, unique=False)
+
+
+def downgrade():
+    for nombre, tabla, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla)
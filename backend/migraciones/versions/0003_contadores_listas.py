@@ -0,0 +1,49 @@
+"""Contadores de elementos en listas_compras (TotalItems, Comprados) y Completa derivado
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 11:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+COLUMNAS = ['TotalItems', 'Comprados']
+
+
+def _columnas_existentes(tabla):
+    return {columna['name'] for columna in sa.inspect(op.get_bind()).get_columns(tabla)}
+
+
+def upgrade():
+    # Se omiten las columnas que ya existan (por ejemplo, en bases creadas con db.create_all())
+    existentes = _columnas_existentes('listas_compras')
+    with op.batch_alter_table('listas_compras') as batch_op:
+        for nombre in COLUMNAS:
+            if nombre not in existentes:
+                batch_op.add_column(sa.Column(nombre, sa.Integer(), nullable=False, server_default='0'))
+
+    # Llenar los contadores con los datos existentes y derivar Completa de ellos
+    listas = sa.table('listas_compras', sa.column('IDLista'), sa.column('Completa', sa.Boolean()),
+                      sa.column('TotalItems'), sa.column('Comprados'))
+    items = sa.table('producto_lista', sa.column('IDLista'), sa.column('Comprado', sa.Boolean()))
+    del_lista = items.c.IDLista == listas.c.IDLista
+    op.execute(listas.update().values(
+        TotalItems=sa.select(sa.func.count()).where(del_lista).scalar_subquery(),
+        Comprados=sa.select(sa.func.count()).where(del_lista, items.c.Comprado == sa.true()).scalar_subquery(),
+    ))
+    op.execute(listas.update().values(
+        Completa=sa.case((listas.c.Comprados == listas.c.TotalItems, sa.true()), else_=sa.false())
+    ))
+
+def downgrade():
+    with op.batch_alter_table('listas_compras') as batch_op:
+        for nombre in reversed(COLUMNAS):
+            batch_op.drop_column(nombre)
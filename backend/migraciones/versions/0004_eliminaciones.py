@@ -0,0 +1,36 @@
+"""Tabla eliminaciones (tombstones) para la sincronización incremental
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 12:15:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Se omite si la tabla ya existe (por ejemplo, en bases creadas con db.create_all())
+    if sa.inspect(op.get_bind()).has_table('eliminaciones'):
+        return
+    op.create_table('eliminaciones',
+        sa.Column('IDEliminacion', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('Tabla', sa.String(length=30), nullable=False),
+        sa.Column('IDRegistro', sa.Integer(), nullable=False),
+        sa.Column('IDUsuario', sa.Integer(), nullable=True),
+        sa.Column('EliminadoEn', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('IDEliminacion')
+    )
+    op.create_index('ix_eliminaciones_IDUsuario', 'eliminaciones', ['IDUsuario'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_eliminaciones_IDUsuario', table_name='eliminaciones')
+    op.drop_table('eliminaciones')
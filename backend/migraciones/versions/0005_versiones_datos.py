@@ -0,0 +1,32 @@
+"""Tabla versiones_datos con la versión compartida del catálogo
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 23:40:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Se omite si la tabla ya existe (por ejemplo, en bases creadas con db.create_all())
+    if sa.inspect(op.get_bind()).has_table('versiones_datos'):
+        return
+    tabla = op.create_table('versiones_datos',
+        sa.Column('Nombre', sa.String(length=30), nullable=False),
+        sa.Column('Valor', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('Nombre')
+    )
+    op.bulk_insert(tabla, [{'Nombre': 'catalogo', 'Valor': 0}])
+
+
+def downgrade():
+    op.drop_table('versiones_datos')
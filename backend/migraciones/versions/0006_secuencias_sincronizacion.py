@@ -0,0 +1,63 @@
+"""Secuencias de cambios para la sincronización incremental (usuarios.SecuenciaCambios y columnas Secuencia)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+# (tabla, columna)
+COLUMNAS = [
+    ('usuarios', 'SecuenciaCambios'),
+    ('productos', 'Secuencia'),
+    ('listas_compras', 'Secuencia'),
+    ('producto_lista', 'Secuencia'),
+    ('eliminaciones', 'Secuencia'),
+]
+
+# (nombre del índice, tabla, columnas)
+INDICES = [
+    ('ix_productos_Secuencia', 'productos', ['Secuencia']),
+    ('ix_listas_compras_IDUsuario_Secuencia', 'listas_compras', ['IDUsuario', 'Secuencia']),
+    ('ix_producto_lista_IDLista_Secuencia', 'producto_lista', ['IDLista', 'Secuencia']),
+    ('ix_eliminaciones_IDUsuario_Secuencia', 'eliminaciones', ['IDUsuario', 'Secuencia']),
+    ('ix_eliminaciones_EliminadoEn', 'eliminaciones', ['EliminadoEn']),
+]
+
+
+def _columnas_existentes(tabla):
+    return {columna['name'] for columna in sa.inspect(op.get_bind()).get_columns(tabla)}
+
+
+def _indices_existentes(tabla):
+    return {indice['name'] for indice in sa.inspect(op.get_bind()).get_indexes(tabla)}
+
+
+def upgrade():
+    # Se omiten las columnas e índices que ya existan (por ejemplo, en bases creadas con db.create_all()).
+    # Las filas existentes quedan con secuencia 0: los cursores emitidos antes de esta revisión no tienen
+    # secuencias y piden una sincronización completa
+    for tabla, columna in COLUMNAS:
+        if columna not in _columnas_existentes(tabla):
+            with op.batch_alter_table(tabla) as batch_op:
+                batch_op.add_column(sa.Column(columna, sa.Integer(), nullable=False, server_default='0'))
+    for nombre, tabla, columnas in INDICES:
+        if nombre not in _indices_existentes(tabla):
+            op.create_index(nombre, tabla, columnas, unique=False)
+
+
+def downgrade():
+    for nombre, tabla, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla)
+    for tabla, columna in reversed(COLUMNAS):
+        with op.batch_alter_table(tabla) as batch_op:
+            batch_op.drop_column(columna)
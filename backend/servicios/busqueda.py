@@ -0,0 +1,221 @@
+import bisect
+import itertools
+import math
+import threading
+import unicodedata
+from collections import defaultdict
+from backend.app.modelos import db, Producto
+from backend.app.eventos_catalogo import al_cambiar_catalogo
+from backend.app.versiones import VERSION_CATALOGO, leer_version
+
+# Similitud mínima (Jaccard sobre trigramas) para considerar una coincidencia aproximada
+SIMILITUD_MINIMA = 0.3
+
+# Tope de candidatos verificados por búsqueda aproximada; acota la latencia cuando los trigramas
+# de la consulta son muy comunes en el catálogo, a cambio de perder algunas coincidencias lejanas
+MAXIMO_CANDIDATOS = 5000
+
+def normalizar(texto):
+    """
+    Normaliza un texto para búsqueda: sin acentos, en minúsculas y con espacios simples.
+    """
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    sin_acentos = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return ' '.join(sin_acentos.casefold().split())
+
+def trigramas(normalizado):
+    """
+    Conjunto de trigramas de un texto normalizado, con relleno para favorecer los inicios de palabra.
+    """
+    relleno = f"  {normalizado} "
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+class IndiceProductos:
+    """
+    IndiceProductos mantiene en memoria un índice de los nombres de productos para responder
+    búsquedas por prefijo y aproximadas (trigramas), sin distinguir acentos ni mayúsculas.
+
+    El índice se construye desde la base de datos la primera vez que se usa en cada proceso y
+    después se actualiza de forma incremental con los cambios confirmados en el propio proceso. Se
+    etiqueta con la versión compartida del catálogo (versiones_datos): si otro worker cambió el catálogo
+    la versión no coincide y se reconstruye. La reconstrucción arma un índice nuevo fuera del candado y
+    lo reemplaza al final, así que las búsquedas siguen respondiendo con el anterior mientras tanto.
+    """
+
+    def __init__(self):
+        self._candado = threading.RLock()
+        # Solo un hilo reconstruye a la vez; los demás siguen usando el índice anterior
+        self._construccion = threading.Lock()
+        self._reiniciar_estructuras()
+
+    def _reiniciar_estructuras(self):
+        self.construido = False
+        self.version = None
+        self._productos = {}     # id -> (nombre, tipo_medida, normalizado, cantidad de trigramas)
+        self._ordenados = []     # lista ordenada de (normalizado, id) para búsquedas por prefijo
+        self._por_trigrama = defaultdict(set)
+
+    def reiniciar(self):
+        """
+        Descarta el índice; se reconstruirá en la siguiente búsqueda.
+        """
+        with self._candado:
+            self._reiniciar_estructuras()
+
+    def construir(self, filas, version=None):
+        """
+        Construye el índice a partir de filas (id, nombre, tipo_medida), etiquetado con `version`.
+        """
+        # Se arma en un índice aparte, sin tomar el candado de las búsquedas, y se reemplaza al final
+        nuevo = IndiceProductos()
+        for id_producto, nombre, tipo_medida in filas:
+            nuevo._agregar(id_producto, nombre, tipo_medida, ordenar=False)
+        nuevo._ordenados.sort()
+        with self._candado:
+            self._productos = nuevo._productos
+            self._ordenados = nuevo._ordenados
+            self._por_trigrama = nuevo._por_trigrama
+            self.version = version
+            self.construido = True
+
+    def construir_desde_bd(self, tamano_lote=10000):
+        """
+        Construye el índice leyendo el catálogo por lotes desde la base de datos.
+        """
+        # La versión se lee antes que los productos: un cambio confirmado durante la lectura deja el
+        # índice con una versión vieja y la próxima búsqueda lo reconstruye
+        version = leer_version(db.session, VERSION_CATALOGO)
+        consulta = db.session.query(Producto.id, Producto.nombre, Producto.tipo_medida).execution_options(yield_per=tamano_lote)
+        self.construir(consulta, version)
+
+    def asegurar_construido(self):
+        """
+        Construye el índice si no existe o si la versión compartida del catálogo cambió.
+        """
+        version = leer_version(db.session, VERSION_CATALOGO)
+        if self.construido and self.version == version:
+            return
+        # Si ya hay un índice y otro hilo lo está reconstruyendo, se busca en el anterior
+        if not self._construccion.acquire(blocking=not self.construido):
+            return
+        try:
+            if not self.construido or self.version != version:
+                self.construir_desde_bd()
+        finally:
+            self._construccion.release()
+
+    def aplicar_cambios(self, cambios, versiones=None):
+        """
+        Aplica los cambios confirmados del catálogo. Con None se descarta el índice completo.
+
+        `versiones` es el par (anterior, confirmada) de la transacción: si el índice estaba en la versión
+        anterior pasa a la confirmada; si no, otro proceso cambió el catálogo entre medio y la versión
+        queda vieja para que la próxima búsqueda lo reconstruya.
+        """
+        with self._candado:
+            if cambios is None:
+                self._reiniciar_estructuras()
+                return
+            if not self.construido:
+                return
+            for accion, id_producto, nombre, tipo_medida in cambios:
+                self._quitar(id_producto)
+                if accion != 'eliminado':
+                    self._agregar(id_producto, nombre, tipo_medida)
+            if versiones is not None and self.version == versiones[0]:
+                self.version = versiones[1]
+
+    def buscar(self, consulta, limite=10):
+        """
+        Busca productos cuyo nombre empiece con `consulta` o se le parezca.
+
+        Retorna:
+            Hasta `limite` diccionarios {id, nombre, tipo_medida}; primero las coincidencias por
+            prefijo (en orden alfabético) y después las aproximadas de mayor a menor similitud.
+        """
+        normalizado = normalizar(consulta)
+        if not normalizado:
+            return []
+
+        with self._candado:
+            encontrados = self._buscar_prefijo(normalizado, limite)
+            if len(encontrados) < limite:
+                vistos = set(encontrados)
+                for id_producto in self._buscar_aproximado(normalizado):
+                    if id_producto not in vistos:
+                        encontrados.append(id_producto)
+                        if len(encontrados) >= limite:
+                            break
+            return [self._a_dict(id_producto) for id_producto in encontrados]
+
+    def __len__(self):
+        return len(self._productos)
+
+    def _agregar(self, id_producto, nombre, tipo_medida, ordenar=True):
+        normalizado = normalizar(nombre)
+        propios = trigramas(normalizado)
+        self._productos[id_producto] = (nombre, tipo_medida, normalizado, len(propios))
+        if ordenar:
+            bisect.insort(self._ordenados, (normalizado, id_producto))
+        else:
+            self._ordenados.append((normalizado, id_producto))
+        for trigrama in propios:
+            self._por_trigrama[trigrama].add(id_producto)
+
+    def _quitar(self, id_producto):
+        anterior = self._productos.pop(id_producto, None)
+        if anterior is None:
+            return
+        normalizado = anterior[2]
+        posicion = bisect.bisect_left(self._ordenados, (normalizado, id_producto))
+        if posicion < len(self._ordenados) and self._ordenados[posicion] == (normalizado, id_producto):
+            del self._ordenados[posicion]
+        for trigrama in trigramas(normalizado):
+            ids = self._por_trigrama.get(trigrama)
+            if ids is not None:
+                ids.discard(id_producto)
+                if not ids:
+                    del self._por_trigrama[trigrama]
+
+    def _buscar_prefijo(self, normalizado, limite):
+        encontrados = []
+        posicion = bisect.bisect_left(self._ordenados, (normalizado,))
+        while posicion < len(self._ordenados) and len(encontrados) < limite:
+            nombre, id_producto = self._ordenados[posicion]
+            if not nombre.startswith(normalizado):
+                break
+            encontrados.append(id_producto)
+            posicion += 1
+        return encontrados
+
+    def _buscar_aproximado(self, normalizado):
+        consulta = trigramas(normalizado)
+        # Un candidato con similitud >= SIMILITUD_MINIMA comparte al menos `minimo` trigramas con la
+        # consulta, así que aparece en alguna de las (len(consulta) - minimo + 1) listas más cortas.
+        # Solo se recorren esas listas y cada candidato se verifica después.
+        minimo = max(1, math.ceil(SIMILITUD_MINIMA * len(consulta)))
+        listas = sorted((self._por_trigrama.get(t, ()) for t in consulta), key=len)
+        candidatos = set()
+        for ids in listas[:len(consulta) - minimo + 1]:
+            candidatos.update(itertools.islice(ids, MAXIMO_CANDIDATOS - len(candidatos)))
+            if len(candidatos) >= MAXIMO_CANDIDATOS:
+                break
+
+        puntuados = []
+        for id_producto in candidatos:
+            comunes = sum(1 for ids in listas if id_producto in ids)
+            if comunes < minimo:
+                continue
+            similitud = comunes / (len(consulta) + self._productos[id_producto][3] - comunes)
+            if similitud >= SIMILITUD_MINIMA:
+                puntuados.append((-similitud, id_producto))
+        puntuados.sort()
+        return [id_producto for _, id_producto in puntuados]
+
+    def _a_dict(self, id_producto):
+        nombre, tipo_medida, _, _ = self._productos[id_producto]
+        return {'id': id_producto, 'nombre': nombre, 'tipo_medida': tipo_medida}
+
+# Índice compartido por todos los hilos del proceso
+indice_productos = IndiceProductos()
+al_cambiar_catalogo(indice_productos.aplicar_cambios)
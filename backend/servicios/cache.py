@@ -0,0 +1,48 @@
+import threading
+import time
+from collections import OrderedDict
+
+class CacheTTL:
+    """
+    CacheTTL es un caché LRU acotado en tamaño cuyas entradas expiran después de `ttl` segundos.
+    Es seguro para usarse desde varios hilos del mismo proceso.
+    """
+
+    def __init__(self, maximo=1024, ttl=300):
+        self.maximo = maximo
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._candado = threading.Lock()
+
+    def obtener(self, clave, por_defecto=None):
+        ahora = time.monotonic()
+        with self._candado:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return por_defecto
+            valor, expira = entrada
+            if expira <= ahora:
+                del self._entradas[clave]
+                return por_defecto
+            self._entradas.move_to_end(clave)
+            return valor
+
+    def guardar(self, clave, valor, ttl=None):
+        expira = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._candado:
+            self._entradas[clave] = (valor, expira)
+            self._entradas.move_to_end(clave)
+            # Descartar las entradas menos usadas recientemente cuando se excede el tamaño
+            while len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self, clave):
+        with self._candado:
+            self._entradas.pop(clave, None)
+
+    def limpiar(self):
+        with self._candado:
+            self._entradas.clear()
+
+    def __len__(self):
+        return len(self._entradas)
@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+from collections import namedtuple
+from backend.app.eventos_catalogo import al_cambiar_catalogo
+from backend.app.modelos import db
+from backend.app.versiones import VERSION_CATALOGO, leer_version
+
+try:
+    import fcntl
+except ImportError:  # Windows: el archivo de versión se escribe sin bloqueo
+    fcntl = None
+
+# Copia inmutable del catálogo ya serializado
+Instantanea = namedtuple('Instantanea', ['version', 'cuerpo', 'etag', 'ultima_modificacion'])
+
+class CacheCatalogo:
+    """
+    CacheCatalogo guarda una instantánea inmutable del catálogo de productos ya serializada a JSON,
+    etiquetada con la versión del catálogo con la que se construyó.
+
+    Cada commit que modifica productos incrementa la versión. Por defecto la versión compartida es una
+    fila de versiones_datos que se incrementa en la misma transacción que el cambio: cada consulta del
+    catálogo la lee (una búsqueda por clave primaria) y cualquier worker, en cualquier host, reconstruye
+    su instantánea de forma perezosa cuando cambió. Con CATALOGO_ARCHIVO_VERSION la versión vive en
+    cambio en un archivo compartido por los workers del mismo host (un stat por consulta). Con
+    CATALOGO_VERSION_COMPARTIDA desactivado la versión es local al proceso (un solo worker).
+    """
+
+    def __init__(self, app=None):
+        self._candado = threading.Lock()
+        self._archivo = None
+        self._compartida = True
+        self._version_local = 0
+        self._estado_archivo = None
+        self._version_archivo = 0
+        self._instantanea = None
+        self.aciertos = 0
+        self.fallos = 0
+        self.reconstrucciones = 0
+        self.segundos_reconstruccion = 0.0
+        self.segundos_ultima_reconstruccion = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CATALOGO_ARCHIVO_VERSION', None)
+        app.config.setdefault('CATALOGO_VERSION_COMPARTIDA', True)
+        with self._candado:
+            self._archivo = app.config['CATALOGO_ARCHIVO_VERSION']
+            self._compartida = app.config['CATALOGO_VERSION_COMPARTIDA']
+            self._estado_archivo = None
+            self._instantanea = None
+        app.extensions['cache_catalogo'] = self
+
+    def version(self):
+        """
+        Versión vigente del catálogo: (versión local del proceso, versión compartida).
+        """
+        return (self._version_local, self._leer_compartida())
+
+    def invalidar(self, cambios=None, versiones=None):
+        """
+        Incrementa la versión del catálogo; las instantáneas anteriores dejan de ser válidas.
+        """
+        with self._candado:
+            self._version_local += 1
+            self._instantanea = None
+        if self._archivo:
+            self._incrementar_archivo()
+
+    def obtener(self, construir):
+        """
+        Devuelve la instantánea vigente, reconstruyéndola con `construir()` si la versión cambió.
+
+        `construir` debe devolver una tupla (cuerpo en bytes, etag, ultima_modificacion).
+        """
+        version = self.version()
+        instantanea = self._instantanea
+        if instantanea is not None and instantanea.version == version:
+            self.aciertos += 1
+            return instantanea
+
+        with self._candado:
+            # Otro hilo pudo haberla reconstruido mientras se esperaba el candado
+            instantanea = self._instantanea
+            if instantanea is not None and instantanea.version == version:
+                self.aciertos += 1
+                return instantanea
+
+            self.fallos += 1
+            inicio = time.perf_counter()
+            cuerpo, etag, ultima_modificacion = construir()
+            duracion = time.perf_counter() - inicio
+
+            self.reconstrucciones += 1
+            self.segundos_reconstruccion += duracion
+            self.segundos_ultima_reconstruccion = duracion
+            # Se etiqueta con la versión leída antes de construir: si hubo un cambio durante la
+            # construcción, la siguiente petición verá una versión distinta y reconstruirá
+            self._instantanea = Instantanea(version, cuerpo, etag, ultima_modificacion)
+            return self._instantanea
+
+    def estadisticas(self):
+        """
+        Contadores de uso del caché: aciertos, fallos, tasa de aciertos y tiempos de reconstrucción.
+        """
+        consultas = self.aciertos + self.fallos
+        instantanea = self._instantanea
+        return {
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+            "reconstrucciones": self.reconstrucciones,
+            "ms_reconstruccion_total": round(self.segundos_reconstruccion * 1000, 3),
+            "ms_ultima_reconstruccion": round(self.segundos_ultima_reconstruccion * 1000, 3),
+            "version": list(self.version()),
+            "bytes": len(instantanea.cuerpo) if instantanea is not None else 0,
+        }
+
+    def _leer_compartida(self):
+        if self._archivo:
+            return self._leer_archivo()
+        if self._compartida:
+            return leer_version(db.session, VERSION_CATALOGO)
+        return 0
+
+    def _leer_archivo(self):
+        try:
+            estado = os.stat(self._archivo)
+        except FileNotFoundError:
+            return 0
+        clave = (estado.st_ino, estado.st_mtime_ns, estado.st_size)
+        if clave == self._estado_archivo:
+            return self._version_archivo
+        try:
+            with open(self._archivo, 'rb') as archivo:
+                version = int(archivo.read() or 0)
+        except ValueError:
+            # El archivo se está reescribiendo: se considera una versión nueva y se vuelve a leer después
+            return -1
+        self._estado_archivo = clave
+        self._version_archivo = version
+        return version
+
+    def _incrementar_archivo(self):
+        descriptor = os.open(self._archivo, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(descriptor, fcntl.LOCK_EX)
+            actual = os.read(descriptor, 32).strip()
+            siguiente = int(actual or 0) + 1
+            os.lseek(descriptor, 0, os.SEEK_SET)
+            os.ftruncate(descriptor, 0)
+            os.write(descriptor, str(siguiente).encode('ascii'))
+        finally:
+            # Cerrar el descriptor libera el bloqueo
+            os.close(descriptor)
+
+# Instancia compartida, inicializada por crear_app
+cache_catalogo = CacheCatalogo()
+al_cambiar_catalogo(cache_catalogo.invalidar)
@@ -0,0 +1,111 @@
+import time
+from collections import Counter
+from flask import request, current_app, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Llave en el environ WSGI con las sentencias de la petición; no se usa `g` porque el contexto de
+# aplicación puede compartirse entre peticiones
+_CUENTA = 'consultas_sql.cuenta'
+
+# Acciones posibles cuando una sentencia se repite más de SQL_UMBRAL_REPETIDAS veces
+ADVERTIR = 'advertir'
+FALLAR = 'fallar'
+
+class ConsultasRepetidas(Exception):
+    """
+    Se lanza con SQL_ACCION_REPETIDAS = 'fallar' cuando una petición ejecuta la misma sentencia más veces
+    que el umbral configurado (por ejemplo, una carga perezosa por cada elemento de una lista: N+1).
+    """
+
+class _Cuenta:
+    __slots__ = ('consultas', 'segundos', 'formas', 'inicios')
+
+    def __init__(self):
+        self.consultas = 0
+        self.segundos = 0.0
+        # Veces que se ejecutó cada sentencia; el texto con parámetros es la "forma" de la consulta
+        self.formas = Counter()
+        self.inicios = []
+
+class ContabilidadSQL:
+    """
+    ContabilidadSQL cuenta las sentencias SQL y el tiempo en la base de datos de cada petición, con los
+    eventos de todos los engines (incluidas las réplicas).
+
+    Configuración:
+        SQL_CONTABILIDAD: activa el conteo por petición.
+        SQL_CABECERAS: agrega X-DB-Queries y X-DB-Time (ms) a las respuestas.
+        SQL_UMBRAL_REPETIDAS: cantidad de ejecuciones de una misma sentencia en una petición a partir de la
+            cual se considera un N+1.
+        SQL_ACCION_REPETIDAS: 'advertir' registra una advertencia; 'fallar' lanza ConsultasRepetidas.
+    """
+
+    def init_app(self, app):
+        app.config.setdefault('SQL_CONTABILIDAD', True)
+        app.config.setdefault('SQL_CABECERAS', False)
+        app.config.setdefault('SQL_UMBRAL_REPETIDAS', 10)
+        app.config.setdefault('SQL_ACCION_REPETIDAS', ADVERTIR)
+        if app.config['SQL_ACCION_REPETIDAS'] not in (ADVERTIR, FALLAR):
+            raise ValueError("SQL_ACCION_REPETIDAS debe ser 'advertir' o 'fallar'")
+        if app.config['SQL_CONTABILIDAD']:
+            app.before_request(self._al_iniciar)
+            app.after_request(self._al_responder)
+
+    @staticmethod
+    def cuenta_actual():
+        """
+        Conteo de la petición en curso, o None fuera de una petición o con la contabilidad desactivada.
+        """
+        if not has_request_context():
+            return None
+        return request.environ.get(_CUENTA)
+
+    @classmethod
+    def compartir_cuenta(cls, entorno):
+        """
+        Suma a la cuenta de la petición en curso las sentencias de una petición interna con el environ
+        `entorno` (por ejemplo, una operación de un lote), que no pasa por los hooks de la aplicación.
+        """
+        cuenta = cls.cuenta_actual()
+        if cuenta is not None:
+            entorno[_CUENTA] = cuenta
+
+    def _al_iniciar(self):
+        request.environ[_CUENTA] = _Cuenta()
+
+    def _al_responder(self, respuesta):
+        cuenta = request.environ.pop(_CUENTA, None)
+        if cuenta is None:
+            return respuesta
+        configuracion = current_app.config
+        if configuracion['SQL_CABECERAS']:
+            respuesta.headers['X-DB-Queries'] = str(cuenta.consultas)
+            respuesta.headers['X-DB-Time'] = f"{cuenta.segundos * 1000:.2f}"
+
+        if cuenta.formas:
+            sentencia, veces = cuenta.formas.most_common(1)[0]
+            if veces >= configuracion['SQL_UMBRAL_REPETIDAS']:
+                mensaje = (f"{request.method} {request.path} ejecutó {veces} veces la misma sentencia "
+                           f"({cuenta.consultas} en total): {' '.join(sentencia.split())[:300]}")
+                if configuracion['SQL_ACCION_REPETIDAS'] == FALLAR:
+                    raise ConsultasRepetidas(mensaje)
+                current_app.logger.warning("Posible N+1: %s", mensaje)
+        return respuesta
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _antes_de_ejecutar(conexion, cursor, sentencia, parametros, contexto, executemany):
+    cuenta = ContabilidadSQL.cuenta_actual()
+    if cuenta is not None:
+        cuenta.inicios.append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _despues_de_ejecutar(conexion, cursor, sentencia, parametros, contexto, executemany):
+    cuenta = ContabilidadSQL.cuenta_actual()
+    if cuenta is not None and cuenta.inicios:
+        cuenta.segundos += time.perf_counter() - cuenta.inicios.pop()
+        cuenta.consultas += 1
+        cuenta.formas[sentencia] += 1
+
+# Instancia compartida, inicializada por crear_app
+contabilidad_sql = ContabilidadSQL()
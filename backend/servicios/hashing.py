@@ -0,0 +1,110 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from flask import jsonify
+
+class ColaHashLlena(Exception):
+    """
+    Se lanza cuando el servicio de hash alcanzó su límite de admisión y no acepta más trabajo.
+    """
+
+# bcrypt se importa en el primer uso: los procesos del pool y las peticiones de login lo necesitan,
+# pero no el arranque de la aplicación
+def _hashear(contrasena):
+    # Se ejecuta en un proceso del pool: debe ser una función de módulo para poder serializarse
+    import bcrypt
+    return bcrypt.hashpw(contrasena, bcrypt.gensalt())
+
+def _verificar(contrasena, hash_contrasena):
+    import bcrypt
+    if isinstance(hash_contrasena, str):
+        hash_contrasena = hash_contrasena.encode('utf-8')
+    return bcrypt.checkpw(contrasena, hash_contrasena)
+
+class ServicioHash:
+    """
+    ServicioHash ejecuta el trabajo de bcrypt en un pool acotado de procesos, fuera de los hilos
+    que atienden peticiones, y limita cuántas operaciones pueden estar en curso a la vez.
+
+    Llevar bcrypt a otro proceso libera el GIL para los demás hilos del worker, no el hilo de la
+    petición: ese hilo queda bloqueado esperando el resultado, así que un login sigue ocupando un hilo
+    (o un greenlet) durante todo el cálculo. El límite de admisión es lo que evita que los logins
+    acaparen todos los hilos.
+
+    Configuración:
+        HASH_PROCESOS: tamaño del pool de procesos. Con 0 el hash se calcula en el hilo actual.
+        HASH_COLA_MAXIMA: operaciones admitidas simultáneamente (en ejecución o en espera).
+        HASH_RETRY_AFTER: segundos sugeridos al cliente en la cabecera Retry-After cuando la cola está llena.
+    """
+
+    def __init__(self, app=None):
+        self.procesos = 0
+        self.retry_after = 1
+        self.cola_maxima = None
+        self._cupos = None
+        self._ejecutor = None
+        self._candado = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('HASH_PROCESOS', 2)
+        app.config.setdefault('HASH_COLA_MAXIMA', 32)
+        app.config.setdefault('HASH_RETRY_AFTER', 1)
+
+        with self._candado:
+            if self._ejecutor is not None and self.procesos != app.config['HASH_PROCESOS']:
+                self._ejecutor.shutdown(wait=False)
+                self._ejecutor = None
+            self.procesos = app.config['HASH_PROCESOS']
+            self.retry_after = app.config['HASH_RETRY_AFTER']
+            # El semáforo se reemplaza solo si cambia el límite; las operaciones en curso liberan el que tomaron
+            if self._cupos is None or self.cola_maxima != app.config['HASH_COLA_MAXIMA']:
+                self.cola_maxima = app.config['HASH_COLA_MAXIMA']
+                self._cupos = threading.BoundedSemaphore(self.cola_maxima)
+
+        app.extensions['servicio_hash'] = self
+        app.register_error_handler(ColaHashLlena, self._respuesta_cola_llena)
+
+    def hashear(self, contrasena):
+        """
+        Genera el hash bcrypt de una contraseña en texto plano.
+        """
+        return self._ejecutar(_hashear, contrasena.encode('utf-8'))
+
+    def verificar(self, contrasena, hash_contrasena):
+        """
+        Verifica una contraseña en texto plano contra su hash bcrypt.
+        """
+        return self._ejecutar(_verificar, contrasena.encode('utf-8'), hash_contrasena)
+
+    def _ejecutar(self, funcion, *args):
+        # Sin cupo disponible se rechaza de inmediato en lugar de encolar sin límite. Se libera el mismo
+        # semáforo que se tomó aunque init_app lo haya reemplazado mientras tanto
+        cupos = self._cupos
+        if cupos is not None and not cupos.acquire(blocking=False):
+            raise ColaHashLlena()
+        try:
+            if not self.procesos:
+                return funcion(*args)
+            return self._obtener_ejecutor().submit(funcion, *args).result()
+        finally:
+            if cupos is not None:
+                cupos.release()
+
+    def _obtener_ejecutor(self):
+        # El pool se crea de forma perezosa para no lanzar procesos al importar la aplicación
+        if self._ejecutor is None:
+            with self._candado:
+                if self._ejecutor is None:
+                    contexto = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+                    self._ejecutor = ProcessPoolExecutor(max_workers=self.procesos, mp_context=contexto)
+        return self._ejecutor
+
+    def _respuesta_cola_llena(self, error):
+        respuesta = jsonify({"error": "Servicio de autenticación saturado, intenta de nuevo más tarde"})
+        respuesta.headers['Retry-After'] = str(self.retry_after)
+        return respuesta, 503
+
+# Instancia compartida, inicializada por crear_app al igual que `db`
+servicio_hash = ServicioHash()
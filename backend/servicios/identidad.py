@@ -0,0 +1,48 @@
+from flask import g
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from backend.app.modelos import Usuario
+from backend.servicios.cache import CacheTTL
+
+# Nombre de la reclamación (claim) del JWT que transporta el IDUsuario
+CLAIM_ID_USUARIO = 'id_usuario'
+
+# Relación nombre de usuario -> IDUsuario para tokens emitidos sin la reclamación id_usuario
+cache_identidades = CacheTTL(maximo=1024, ttl=300)
+
+def claims_usuario(usuario):
+    """
+    Reclamaciones adicionales que se incluyen en el token de acceso de un usuario.
+    """
+    return {CLAIM_ID_USUARIO: usuario.id}
+
+def obtener_id_usuario_actual():
+    """
+    Devuelve el IDUsuario del token de la petición actual, o None si el usuario no existe.
+
+    El valor se toma de la reclamación id_usuario del token. Los tokens anteriores que solo traen
+    el nombre de usuario se resuelven una vez contra la base de datos y se guardan en un caché TTL/LRU.
+    Dentro de una misma petición el resultado se memoriza en `g`.
+    """
+    claims = get_jwt()
+    memorizado = g.get('identidad_actual')
+    if memorizado is not None and memorizado[0] == claims.get('jti'):
+        return memorizado[1]
+
+    id_usuario = claims.get(CLAIM_ID_USUARIO)
+    if id_usuario is None:
+        id_usuario = _resolver_por_nombre(get_jwt_identity())
+
+    g.identidad_actual = (claims.get('jti'), id_usuario)
+    return id_usuario
+
+def _resolver_por_nombre(nombre_usuario):
+    id_usuario = cache_identidades.obtener(nombre_usuario)
+    if id_usuario is not None:
+        return id_usuario
+
+    fila = Usuario.query.with_entities(Usuario.id).filter_by(nombre_usuario=nombre_usuario).first()
+    if fila is None:
+        # Los usuarios inexistentes no se guardan para no ocultar un registro posterior
+        return None
+    cache_identidades.guardar(nombre_usuario, fila.id)
+    return fila.id
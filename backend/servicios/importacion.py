@@ -0,0 +1,133 @@
+import codecs
+import csv
+import json
+from sqlalchemy import insert
+from backend.app.modelos import db, Producto
+from backend.app.eventos_catalogo import notificar_cambio_masivo
+from backend.app.versiones import VERSION_CATALOGO, incrementar_version
+
+# Tipos de contenido aceptados y el formato de importación que les corresponde
+FORMATOS_POR_TIPO = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+}
+
+# Solo se guarda el detalle de los primeros errores para que la memoria no crezca con el archivo
+MAXIMO_ERRORES_REPORTADOS = 100
+
+LONGITUD_NOMBRE = Producto.__table__.c.Nombre.type.length
+LONGITUD_TIPO_MEDIDA = Producto.__table__.c.TipoMedida.type.length
+
+class ResultadoImportacion:
+    """
+    Acumula el progreso de una importación: filas leídas, importadas, lotes confirmados y errores.
+    """
+
+    def __init__(self):
+        self.filas = 0
+        self.importados = 0
+        self.lotes = 0
+        self.total_errores = 0
+        self.errores = []
+
+    def registrar_error(self, fila, mensaje):
+        self.total_errores += 1
+        if len(self.errores) < MAXIMO_ERRORES_REPORTADOS:
+            self.errores.append({"fila": fila, "error": mensaje})
+
+    def a_dict(self):
+        return {
+            "filas": self.filas,
+            "importados": self.importados,
+            "lotes": self.lotes,
+            "total_errores": self.total_errores,
+            "errores": self.errores,
+        }
+
+def _lineas(flujo):
+    # Decodifica el flujo binario línea por línea sin leerlo completo en memoria
+    return codecs.iterdecode(iter(flujo.readline, b''), 'utf-8')
+
+def _filas_csv(flujo):
+    lector = csv.DictReader(_lineas(flujo))
+    for fila in lector:
+        # La fila 1 es el encabezado
+        yield lector.line_num, fila
+
+def _filas_ndjson(flujo):
+    for numero, linea in enumerate(_lineas(flujo), start=1):
+        if not linea.strip():
+            continue
+        try:
+            fila = json.loads(linea)
+        except ValueError:
+            yield numero, None
+            continue
+        yield numero, fila
+
+def _validar(fila):
+    if not isinstance(fila, dict):
+        return None, "Fila con formato inválido"
+    nombre = fila.get('nombre')
+    tipo_medida = fila.get('tipo_medida')
+    if not isinstance(nombre, str) or not nombre.strip() or not isinstance(tipo_medida, str) or not tipo_medida.strip():
+        return None, "Información proporcionada inválida o incompleta"
+    if len(nombre) > LONGITUD_NOMBRE or len(tipo_medida) > LONGITUD_TIPO_MEDIDA:
+        return None, "Nombre o tipo de medida demasiado largo"
+    return {"nombre": nombre.strip(), "tipo_medida": tipo_medida.strip()}, None
+
+def importar_productos(flujo, formato, tamano_lote=1000, al_progresar=None):
+    """
+    Importa productos desde un flujo binario CSV (columnas nombre,tipo_medida) o NDJSON.
+
+    El flujo se procesa de forma incremental y los productos se insertan en lotes de `tamano_lote`,
+    cada uno en su propia transacción, de modo que la memoria usada no depende del tamaño del archivo.
+
+    Parámetros:
+        flujo: objeto binario con `readline` (por ejemplo request.stream o un archivo abierto en modo 'rb').
+        formato: 'csv' o 'ndjson'.
+        al_progresar: función opcional que recibe el ResultadoImportacion después de cada lote.
+
+    Retorna:
+        Un ResultadoImportacion con los totales y el detalle de los errores por fila.
+    """
+    filas = _filas_csv(flujo) if formato == 'csv' else _filas_ndjson(flujo)
+    resultado = ResultadoImportacion()
+    lote = []
+    primera_fila_lote = None
+
+    for numero, fila in filas:
+        resultado.filas += 1
+        producto, error = _validar(fila)
+        if error:
+            resultado.registrar_error(numero, error)
+            continue
+        if not lote:
+            primera_fila_lote = numero
+        lote.append(producto)
+        if len(lote) >= tamano_lote:
+            _confirmar_lote(lote, primera_fila_lote, resultado, al_progresar)
+            lote = []
+
+    if lote:
+        _confirmar_lote(lote, primera_fila_lote, resultado, al_progresar)
+    return resultado
+
+def _confirmar_lote(lote, primera_fila, resultado, al_progresar):
+    try:
+        # La inserción masiva no pasa por los eventos del ORM: la versión compartida se incrementa aquí,
+        # antes de insertar, para que las filas nuevas queden marcadas con ella (Producto.secuencia)
+        incrementar_version(db.session.connection(), VERSION_CATALOGO)
+        db.session.execute(insert(Producto), lote)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        resultado.registrar_error(primera_fila, f"Error al insertar el lote de {len(lote)} productos: {e}")
+    else:
+        # La inserción masiva no pasa por los eventos del ORM: se avisa el cambio del catálogo
+        notificar_cambio_masivo()
+        resultado.importados += len(lote)
+        resultado.lotes += 1
+    if al_progresar is not None:
+        al_progresar(resultado)
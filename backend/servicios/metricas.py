@@ -0,0 +1,305 @@
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+from flask import request
+
+try:
+    import fcntl
+except ImportError:  # Windows: los archivos de workers terminados se suman sin bloqueo entre procesos
+    fcntl = None
+
+# Límites superiores (segundos) de los buckets del histograma de latencia
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Etiqueta de las peticiones que no coinciden con ninguna ruta (evita una serie por URL inexistente)
+SIN_RUTA = 'sin_ruta'
+
+# Llaves en el environ WSGI con el inicio de la petición y si se contó como en curso; no se usa `g`
+# porque el contexto de aplicación puede compartirse entre peticiones
+_INICIO = 'metricas.inicio'
+_EN_CURSO = 'metricas.en_curso'
+
+# Archivo con los contadores acumulados de los workers terminados y candado para fusionarlos
+ARCHIVO_RETIRADOS = 'metricas_retirados.json'
+_ARCHIVO_CANDADO = 'metricas.lock'
+
+class _Serie:
+    __slots__ = ('buckets', 'cantidad', 'segundos', 'bytes_peticion', 'bytes_respuesta')
+
+    def __init__(self, cantidad_buckets):
+        # Conteos por bucket sin acumular; el último es +Inf
+        self.buckets = [0] * (cantidad_buckets + 1)
+        self.cantidad = 0
+        self.segundos = 0.0
+        self.bytes_peticion = 0
+        self.bytes_respuesta = 0
+
+class MetricasPeticiones:
+    """
+    MetricasPeticiones mide cada petición atendida: histograma de latencia por blueprint, endpoint,
+    método y estado, bytes recibidos y enviados, y peticiones en curso. Las exporta en el formato de
+    texto de Prometheus en /metrics.
+
+    Registrar una petición es una búsqueda en un dict y unas sumas bajo un candado. Con varios workers,
+    METRICAS_DIRECTORIO es un directorio compartido donde cada proceso escribe su instantánea (como
+    mucho cada METRICAS_INTERVALO_ESCRITURA segundos, y siempre antes de exportar); /metrics suma las
+    de todos los procesos. Las peticiones en curso solo se cuentan para los procesos vivos.
+    """
+
+    def __init__(self, buckets=BUCKETS_LATENCIA):
+        self.buckets = tuple(buckets)
+        self.directorio = None
+        self.intervalo_escritura = 1.0
+        self._candado = threading.Lock()
+        self._series = {}
+        self._en_curso = 0
+        self._proxima_escritura = 0.0
+
+    def init_app(self, app):
+        app.config.setdefault('METRICAS_HABILITADAS', True)
+        app.config.setdefault('METRICAS_DIRECTORIO', None)
+        app.config.setdefault('METRICAS_INTERVALO_ESCRITURA', 1.0)
+        self.directorio = app.config['METRICAS_DIRECTORIO']
+        self.intervalo_escritura = app.config['METRICAS_INTERVALO_ESCRITURA']
+        if self.directorio:
+            os.makedirs(self.directorio, exist_ok=True)
+        if app.config['METRICAS_HABILITADAS']:
+            app.before_request(self._al_iniciar)
+            app.after_request(self._al_responder)
+            app.teardown_request(self._al_terminar)
+
+    def observar(self, blueprint, endpoint, metodo, estado, segundos, bytes_peticion=0, bytes_respuesta=0):
+        llave = (blueprint or '', endpoint or SIN_RUTA, metodo, estado)
+        indice = bisect.bisect_left(self.buckets, segundos)
+        with self._candado:
+            serie = self._series.get(llave)
+            if serie is None:
+                serie = self._series[llave] = _Serie(len(self.buckets))
+            serie.buckets[indice] += 1
+            serie.cantidad += 1
+            serie.segundos += segundos
+            serie.bytes_peticion += bytes_peticion
+            serie.bytes_respuesta += bytes_respuesta
+        if self.directorio and time.monotonic() >= self._proxima_escritura:
+            self.guardar_instantanea()
+
+    def instantanea(self):
+        """
+        Copia serializable de las métricas de este proceso.
+        """
+        with self._candado:
+            series = [
+                [list(llave), serie.buckets[:], serie.cantidad, serie.segundos, serie.bytes_peticion, serie.bytes_respuesta]
+                for llave, serie in self._series.items()
+            ]
+            pid, inicio = _identidad_proceso()
+            return {"pid": pid, "inicio": inicio, "buckets": list(self.buckets), "en_curso": self._en_curso,
+                    "series": series}
+
+    def guardar_instantanea(self):
+        """
+        Escribe la instantánea del proceso en METRICAS_DIRECTORIO (reemplazo atómico del archivo).
+        """
+        self._proxima_escritura = time.monotonic() + self.intervalo_escritura
+        pid, inicio = _identidad_proceso()
+        ruta = os.path.join(self.directorio, f"metricas_{pid}_{inicio}.json")
+        temporal = f"{ruta}.{threading.get_ident()}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(self.instantanea(), archivo, separators=(',', ':'))
+        os.replace(temporal, ruta)
+
+    def instantaneas(self):
+        """
+        Instantáneas de todos los procesos: la propia y, si hay METRICAS_DIRECTORIO, las de los demás
+        procesos vivos más los contadores acumulados de los terminados.
+        """
+        if not self.directorio:
+            return [self.instantanea()]
+        self.guardar_instantanea()
+        resultado = []
+        terminados = []
+        for ruta in glob.glob(os.path.join(self.directorio, 'metricas_*.json')):
+            datos = self._leer(ruta)
+            if datos is None or os.path.basename(ruta) == ARCHIVO_RETIRADOS:
+                continue
+            if _proceso_vivo(datos["pid"], datos.get("inicio")):
+                resultado.append(datos)
+            else:
+                terminados.append(ruta)
+        if terminados:
+            self._retirar(terminados)
+        retirados = self._leer(os.path.join(self.directorio, ARCHIVO_RETIRADOS))
+        if retirados is not None:
+            resultado.append(retirados)
+        return resultado
+
+    def _leer(self, ruta):
+        try:
+            with open(ruta, encoding='utf-8') as archivo:
+                datos = json.load(archivo)
+        except (OSError, ValueError):
+            # El archivo de un proceso que se está reemplazando o que se borró
+            return None
+        return datos if datos.get("buckets") == list(self.buckets) else None
+
+    def _retirar(self, rutas):
+        # Suma las instantáneas de los workers terminados al archivo de retirados y las borra. El candado
+        # evita que dos exportaciones simultáneas sumen el mismo archivo dos veces
+        ruta_retirados = os.path.join(self.directorio, ARCHIVO_RETIRADOS)
+        with open(os.path.join(self.directorio, _ARCHIVO_CANDADO), 'a') as candado:
+            if fcntl is not None:
+                fcntl.flock(candado, fcntl.LOCK_EX)
+            retirados = self._leer(ruta_retirados) or {"pid": None, "inicio": None, "buckets": list(self.buckets),
+                                                       "en_curso": 0, "series": []}
+            # Archivos ya sumados que no se pudieron borrar (por ejemplo, si el proceso murió entre ambos pasos)
+            sumados = set(retirados.get("sumados", [])) & {os.path.basename(ruta) for ruta in rutas}
+            series = {tuple(llave): valores for llave, *valores in retirados["series"]}
+            pendientes = []
+            for ruta in rutas:
+                nombre = os.path.basename(ruta)
+                datos = self._leer(ruta)
+                if datos is None:
+                    continue
+                pendientes.append(ruta)
+                if nombre in sumados:
+                    continue
+                sumados.add(nombre)
+                for llave, buckets, cantidad, segundos, bytes_peticion, bytes_respuesta in datos["series"]:
+                    total = series.setdefault(tuple(llave), [[0] * len(buckets), 0, 0.0, 0, 0])
+                    total[0] = [a + b for a, b in zip(total[0], buckets)]
+                    total[1] += cantidad
+                    total[2] += segundos
+                    total[3] += bytes_peticion
+                    total[4] += bytes_respuesta
+            retirados["series"] = [[list(llave)] + valores for llave, valores in series.items()]
+            retirados["sumados"] = sorted(sumados)
+            temporal = f"{ruta_retirados}.{os.getpid()}.tmp"
+            with open(temporal, 'w', encoding='utf-8') as archivo:
+                json.dump(retirados, archivo, separators=(',', ':'))
+            os.replace(temporal, ruta_retirados)
+            for ruta in pendientes:
+                try:
+                    os.remove(ruta)
+                except FileNotFoundError:
+                    pass
+
+    def exportar(self):
+        """
+        Métricas agregadas de todos los procesos en el formato de texto de Prometheus.
+        """
+        series = {}
+        en_curso = 0
+        for datos in self.instantaneas():
+            en_curso += datos["en_curso"]
+            for llave, buckets, cantidad, segundos, bytes_peticion, bytes_respuesta in datos["series"]:
+                total = series.setdefault(tuple(llave), [[0] * len(buckets), 0, 0.0, 0, 0])
+                total[0] = [a + b for a, b in zip(total[0], buckets)]
+                total[1] += cantidad
+                total[2] += segundos
+                total[3] += bytes_peticion
+                total[4] += bytes_respuesta
+
+        lineas = [
+            "# HELP app_peticiones_en_curso Peticiones HTTP que se están atendiendo.",
+            "# TYPE app_peticiones_en_curso gauge",
+            f"app_peticiones_en_curso {en_curso}",
+            "# HELP app_peticion_duracion_segundos Latencia de las peticiones HTTP.",
+            "# TYPE app_peticion_duracion_segundos histogram",
+        ]
+        ordenadas = sorted(series.items())
+        for llave, (buckets, cantidad, segundos, _, _) in ordenadas:
+            etiquetas = _etiquetas(llave)
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (float('inf'),), buckets):
+                acumulado += conteo
+                lineas.append(f'app_peticion_duracion_segundos_bucket{{{etiquetas},le="{_limite(limite)}"}} {acumulado}')
+            lineas.append(f"app_peticion_duracion_segundos_sum{{{etiquetas}}} {segundos!r}")
+            lineas.append(f"app_peticion_duracion_segundos_count{{{etiquetas}}} {cantidad}")
+        for nombre, posicion, ayuda in (
+            ("app_peticion_bytes_total", 3, "Bytes recibidos en el cuerpo de las peticiones."),
+            ("app_respuesta_bytes_total", 4, "Bytes enviados en el cuerpo de las respuestas (sin contar las respuestas en streaming)."),
+        ):
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} counter")
+            for llave, valores in ordenadas:
+                lineas.append(f"{nombre}{{{_etiquetas(llave)}}} {valores[posicion]}")
+        return "\n".join(lineas) + "\n"
+
+    def reiniciar(self):
+        with self._candado:
+            self._series.clear()
+            self._en_curso = 0
+
+    def _al_iniciar(self):
+        request.environ[_INICIO] = time.perf_counter()
+        request.environ[_EN_CURSO] = True
+        with self._candado:
+            self._en_curso += 1
+
+    def _al_responder(self, respuesta):
+        inicio = request.environ.pop(_INICIO, None)
+        if inicio is not None:
+            # Las respuestas en streaming no tienen largo conocido y se cuentan con 0 bytes
+            self.observar(request.blueprint, request.endpoint, request.method, respuesta.status_code,
+                          time.perf_counter() - inicio, request.content_length or 0,
+                          0 if respuesta.is_streamed else (respuesta.content_length or 0))
+        return respuesta
+
+    def _al_terminar(self, error=None):
+        if not request.environ.pop(_EN_CURSO, False):
+            return
+        with self._candado:
+            self._en_curso -= 1
+        inicio = request.environ.pop(_INICIO, None)
+        if inicio is not None:
+            # after_request no se ejecutó: la vista lanzó una excepción no manejada
+            self.observar(request.blueprint, request.endpoint, request.method, 500,
+                          time.perf_counter() - inicio, request.content_length or 0)
+
+def _etiquetas(llave):
+    blueprint, endpoint, metodo, estado = llave
+    return f'blueprint="{_escapar(blueprint)}",endpoint="{_escapar(endpoint)}",metodo="{metodo}",estado="{estado}"'
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _limite(valor):
+    return "+Inf" if valor == float('inf') else repr(valor)
+
+def _inicio_proceso(pid):
+    # Hora de inicio del proceso en ticks desde el arranque del sistema (campo 22 de /proc/<pid>/stat);
+    # None donde no hay /proc
+    try:
+        with open(f"/proc/{pid}/stat", encoding='ascii') as archivo:
+            estado = archivo.read()
+    except OSError:
+        return None
+    # El nombre del comando va entre paréntesis y puede contener espacios
+    return int(estado.rsplit(')', 1)[1].split()[19])
+
+_identidad = (None, None)
+
+def _identidad_proceso():
+    # (PID, inicio) del proceso actual; se recalcula después de un fork
+    global _identidad
+    pid = os.getpid()
+    if _identidad[0] != pid:
+        _identidad = (pid, _inicio_proceso(pid) or int(time.time()))
+    return _identidad
+
+def _proceso_vivo(pid, inicio=None):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    # Un PID reutilizado por otro proceso tiene otra hora de inicio
+    actual = _inicio_proceso(pid)
+    return actual is None or inicio is None or actual == inicio
+
+# Instancia compartida, inicializada por crear_app
+metricas_peticiones = MetricasPeticiones()
@@ -0,0 +1,144 @@
+import threading
+from collections import deque, namedtuple, OrderedDict
+from backend.app.eventos_listas import al_confirmar_eventos_lista
+
+# Evento publicado en una lista; `id` es consecutivo dentro de cada lista
+Evento = namedtuple('Evento', ['id', 'tipo', 'datos'])
+
+class _CanalLista:
+    def __init__(self, candado, capacidad):
+        self.condicion = threading.Condition(candado)
+        self.historial = deque(maxlen=capacidad)
+        self.ultimo_id = 0
+        self.suscriptores = 0
+
+class CentroEventosListas:
+    """
+    CentroEventosListas es un publicador/suscriptor en memoria para los eventos de las listas de compras.
+
+    Cada lista tiene un canal con su propia secuencia de IDs y un historial acotado (buffer circular),
+    para que un cliente que se reconecta con Last-Event-ID reciba lo que se perdió. Los suscriptores
+    esperan en una condición por lista, así que publicar solo despierta a los interesados en esa lista.
+
+    El centro es local al proceso: con varios workers, cada uno ve solo las escrituras que atendió.
+
+    Además cuenta las conexiones SSE abiertas para limitarlas: con workers de hilos, cada conexión
+    ocupa un hilo mientras espera.
+    """
+
+    def __init__(self, capacidad=256, maximo_listas=10000):
+        self.capacidad = capacidad
+        self.maximo_listas = maximo_listas
+        self._candado = threading.Lock()
+        self._canales = OrderedDict()
+        self.publicados = 0
+        self.conexiones = 0
+
+    def publicar(self, id_lista, tipo, datos):
+        with self._candado:
+            canal = self._canal(id_lista)
+            canal.ultimo_id += 1
+            canal.historial.append(Evento(canal.ultimo_id, tipo, datos))
+            self.publicados += 1
+            canal.condicion.notify_all()
+
+    def publicar_confirmados(self, eventos):
+        """
+        Publica los eventos (id_lista, tipo, datos) de una transacción confirmada.
+        """
+        for id_lista, tipo, datos in eventos:
+            self.publicar(id_lista, tipo, datos)
+
+    def eventos_desde(self, id_lista, ultimo_id):
+        """
+        Eventos de la lista posteriores a `ultimo_id`.
+
+        Retorna:
+            Una tupla (eventos, completos). `completos` es False cuando parte de los eventos pedidos ya
+            salió del historial (o el ID no corresponde a este proceso) y el cliente debe recargar la lista.
+        """
+        with self._candado:
+            return self._eventos_desde(self._canal(id_lista), ultimo_id)
+
+    def esperar(self, id_lista, ultimo_id, timeout):
+        """
+        Espera hasta `timeout` segundos a que haya eventos posteriores a `ultimo_id`.
+
+        Retorna:
+            La misma tupla que eventos_desde; una lista vacía si se agotó el tiempo.
+        """
+        with self._candado:
+            canal = self._canal(id_lista)
+            canal.suscriptores += 1
+            try:
+                canal.condicion.wait_for(lambda: canal.ultimo_id != ultimo_id, timeout)
+                return self._eventos_desde(canal, ultimo_id)
+            finally:
+                canal.suscriptores -= 1
+
+    def abrir_conexion(self, maximo=None):
+        """
+        Reserva un lugar para una conexión SSE. Retorna False si ya hay `maximo` conexiones abiertas.
+        """
+        with self._candado:
+            if maximo and self.conexiones >= maximo:
+                return False
+            self.conexiones += 1
+            return True
+
+    def cerrar_conexion(self):
+        with self._candado:
+            self.conexiones -= 1
+
+    def reiniciar(self):
+        """
+        Descarta los canales sin suscriptores junto con su historial.
+        """
+        with self._candado:
+            for id_lista in [id_lista for id_lista, canal in self._canales.items() if canal.suscriptores == 0]:
+                del self._canales[id_lista]
+
+    def ultimo_id(self, id_lista):
+        with self._candado:
+            return self._canal(id_lista).ultimo_id
+
+    def estadisticas(self):
+        with self._candado:
+            return {
+                "listas": len(self._canales),
+                "suscriptores": sum(canal.suscriptores for canal in self._canales.values()),
+                "conexiones": self.conexiones,
+                "publicados": self.publicados,
+            }
+
+    def _canal(self, id_lista):
+        canal = self._canales.get(id_lista)
+        if canal is None:
+            canal = self._canales[id_lista] = _CanalLista(self._candado, self.capacidad)
+            self._descartar_canales_inactivos()
+        else:
+            self._canales.move_to_end(id_lista)
+        return canal
+
+    def _descartar_canales_inactivos(self):
+        # Descarta los canales usados hace más tiempo que no tienen suscriptores
+        sobrantes = len(self._canales) - self.maximo_listas
+        for id_lista in list(self._canales):
+            if sobrantes <= 0:
+                break
+            if self._canales[id_lista].suscriptores == 0:
+                del self._canales[id_lista]
+                sobrantes -= 1
+
+    @staticmethod
+    def _eventos_desde(canal, ultimo_id):
+        if ultimo_id > canal.ultimo_id:
+            # El ID es de otro proceso o de antes de un reinicio
+            return list(canal.historial), False
+        eventos = [evento for evento in canal.historial if evento.id > ultimo_id]
+        completos = not eventos or eventos[0].id == ultimo_id + 1
+        return eventos, completos
+
+# Centro compartido por todos los hilos del proceso
+centro_eventos = CentroEventosListas()
+al_confirmar_eventos_lista(centro_eventos.publicar_confirmados)
@@ -0,0 +1,166 @@
+import cProfile
+import hashlib
+import hmac
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from flask import request, current_app
+
+# Cabecera con la que se pide perfilar una petición: "<timestamp>.<firma>"
+CABECERA_PERFILAR = 'X-Perfilar'
+# Cabecera de la respuesta con el nombre base de los archivos generados
+CABECERA_PERFIL = 'X-Perfil'
+
+# Llave en el environ WSGI con el perfilado en curso de la petición
+_PERFILADO = 'perfilador.perfilado'
+
+def firmar_perfilado(secreto, metodo, ruta, momento=None):
+    """
+    Valor de la cabecera X-Perfilar para una petición: la firma HMAC-SHA256 cubre el método, la ruta y
+    el momento, así que una cabecera capturada no sirve para otra ruta ni después de su vigencia.
+    """
+    momento = int(time.time() if momento is None else momento)
+    mensaje = f"{momento}:{metodo.upper()}:{ruta}".encode('utf-8')
+    return f"{momento}.{hmac.new(secreto.encode('utf-8'), mensaje, hashlib.sha256).hexdigest()}"
+
+def verificar_perfilado(secreto, valor, metodo, ruta, vigencia):
+    """
+    Indica si el valor de X-Perfilar es una firma válida y vigente para la petición.
+    """
+    momento, _, firma = (valor or '').partition('.')
+    if not momento.isdigit() or abs(time.time() - int(momento)) > vigencia:
+        return False
+    esperado = firmar_perfilado(secreto, metodo, ruta, int(momento))
+    return hmac.compare_digest(esperado, f"{momento}.{firma}")
+
+class MuestreadorPila:
+    """
+    MuestreadorPila toma la pila de un hilo cada `intervalo` segundos desde un hilo propio y cuenta las
+    pilas iguales. El resultado se exporta en el formato "colapsado" de los flamegraphs (una línea por
+    pila, funciones separadas por ';' desde la raíz, y la cantidad de muestras).
+
+    Con workers gevent todas las greenlets comparten el hilo, así que las muestras pueden incluir
+    trabajo de otras peticiones.
+    """
+
+    def __init__(self, id_hilo, intervalo=0.005):
+        self.id_hilo = id_hilo
+        self.intervalo = intervalo
+        self.pilas = Counter()
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, name='muestreador-pila', daemon=True)
+
+    def iniciar(self):
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._detener.set()
+        self._hilo.join()
+
+    def colapsadas(self):
+        return "".join(f"{';'.join(pila)} {cantidad}\n" for pila, cantidad in self.pilas.most_common())
+
+    def _muestrear(self):
+        while not self._detener.wait(self.intervalo):
+            marco = sys._current_frames().get(self.id_hilo)
+            pila = []
+            while marco is not None:
+                codigo = marco.f_code
+                pila.append(f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})")
+                marco = marco.f_back
+            if pila:
+                self.pilas[tuple(reversed(pila))] += 1
+
+class _Perfilado:
+    __slots__ = ('perfil', 'muestreador')
+
+    def __init__(self, perfil, muestreador):
+        self.perfil = perfil
+        self.muestreador = muestreador
+
+class PerfiladorPeticiones:
+    """
+    PerfiladorPeticiones ejecuta una petición bajo cProfile y un muestreador de pila, y guarda en
+    PERFILADOR_DIRECTORIO el perfil (.pstats) y las pilas colapsadas (.folded, para flamegraph.pl o
+    speedscope).
+
+    Se perfila una petición si PERFILADOR_HABILITADO está activo (todas las peticiones) o si trae la
+    cabecera X-Perfilar firmada con PERFILADOR_SECRETO (ver `flask firmar-perfilado`). Solo funciona si
+    la configuración lo permite con PERFILADOR_PERMITIDO; la configuración Produccion lo prohíbe.
+    """
+
+    def __init__(self):
+        self._secuencia = itertools.count(1)
+
+    def init_app(self, app):
+        app.config.setdefault('PERFILADOR_PERMITIDO', False)
+        app.config.setdefault('PERFILADOR_HABILITADO', False)
+        app.config.setdefault('PERFILADOR_SECRETO', None)
+        app.config.setdefault('PERFILADOR_DIRECTORIO', 'perfiles')
+        app.config.setdefault('PERFILADOR_VIGENCIA_FIRMA', 300)
+        app.config.setdefault('PERFILADOR_INTERVALO_MUESTREO', 0.005)
+
+        solicitado = app.config['PERFILADOR_HABILITADO'] or app.config['PERFILADOR_SECRETO']
+        if not solicitado:
+            return
+        if not app.config['PERFILADOR_PERMITIDO']:
+            raise ValueError("El perfilador de peticiones no está permitido en esta configuración. "
+                             "Quita PERFILADOR_HABILITADO y PERFILADOR_SECRETO.")
+        app.before_request(self._al_iniciar)
+        app.after_request(self._al_responder)
+        app.teardown_request(self._al_terminar)
+
+    def debe_perfilar(self):
+        configuracion = current_app.config
+        if configuracion['PERFILADOR_HABILITADO']:
+            return True
+        valor = request.headers.get(CABECERA_PERFILAR)
+        return bool(valor and configuracion['PERFILADOR_SECRETO']) and verificar_perfilado(
+            configuracion['PERFILADOR_SECRETO'], valor, request.method, request.path,
+            configuracion['PERFILADOR_VIGENCIA_FIRMA'])
+
+    def _al_iniciar(self):
+        if not self.debe_perfilar():
+            return
+        muestreador = MuestreadorPila(threading.get_ident(), current_app.config['PERFILADOR_INTERVALO_MUESTREO']).iniciar()
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:
+            # Otro perfilador ya está activo en este hilo
+            perfil = None
+        request.environ[_PERFILADO] = _Perfilado(perfil, muestreador)
+
+    def _al_responder(self, respuesta):
+        nombre = self._guardar(request.environ.pop(_PERFILADO, None))
+        if nombre:
+            respuesta.headers[CABECERA_PERFIL] = nombre
+        return respuesta
+
+    def _al_terminar(self, error=None):
+        # La vista lanzó una excepción y after_request no se ejecutó
+        self._guardar(request.environ.pop(_PERFILADO, None))
+
+    def _guardar(self, perfilado):
+        if perfilado is None:
+            return None
+        if perfilado.perfil is not None:
+            perfilado.perfil.disable()
+        perfilado.muestreador.detener()
+
+        directorio = current_app.config['PERFILADOR_DIRECTORIO']
+        os.makedirs(directorio, exist_ok=True)
+        endpoint = (request.endpoint or 'sin_ruta').replace('.', '-')
+        nombre = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.method}-{endpoint}-{os.getpid()}-{next(self._secuencia)}"
+        if perfilado.perfil is not None:
+            perfilado.perfil.dump_stats(os.path.join(directorio, f"{nombre}.pstats"))
+        with open(os.path.join(directorio, f"{nombre}.folded"), 'w', encoding='utf-8') as archivo:
+            archivo.write(perfilado.muestreador.colapsadas())
+        return nombre
+
+# Instancia compartida, inicializada por crear_app
+perfilador_peticiones = PerfiladorPeticiones()
@@ -0,0 +1,83 @@
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+class MetricasPool:
+    """
+    MetricasPool acumula cuánto esperan las peticiones para obtener una conexión del pool.
+    """
+
+    def __init__(self):
+        self._candado = threading.Lock()
+        self.esperas = 0
+        self.timeouts = 0
+        self.segundos_espera = 0.0
+        self.segundos_espera_maxima = 0.0
+
+    def registrar(self, segundos, agotado=False):
+        with self._candado:
+            self.esperas += 1
+            self.segundos_espera += segundos
+            if segundos > self.segundos_espera_maxima:
+                self.segundos_espera_maxima = segundos
+            if agotado:
+                self.timeouts += 1
+
+    def a_dict(self):
+        with self._candado:
+            return {
+                "esperas": self.esperas,
+                "timeouts": self.timeouts,
+                "ms_espera_total": round(self.segundos_espera * 1000, 3),
+                "ms_espera_promedio": round(self.segundos_espera * 1000 / self.esperas, 3) if self.esperas else 0.0,
+                "ms_espera_maxima": round(self.segundos_espera_maxima * 1000, 3),
+            }
+
+class PoolMedido(QueuePool):
+    """
+    QueuePool que mide el tiempo de cada checkout (incluye abrir una conexión nueva cuando el pool
+    crece dentro del desborde) y cuenta los que fallan por pool_timeout.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metricas = MetricasPool()
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except exc.TimeoutError:
+            self.metricas.registrar(time.perf_counter() - inicio, agotado=True)
+            raise
+        self.metricas.registrar(time.perf_counter() - inicio)
+        return conexion
+
+    def recreate(self):
+        # Al recrear el pool (por ejemplo, después de perder la base de datos) se conservan las métricas
+        nuevo = super().recreate()
+        nuevo.metricas = self.metricas
+        return nuevo
+
+def estadisticas_pool(engine):
+    """
+    Estado actual del pool de conexiones de un engine: tamaño, conexiones en uso, libres y de desborde,
+    más las métricas de espera si el pool es un PoolMedido.
+    """
+    pool = engine.pool
+    estadisticas = {"clase": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        estadisticas.update({
+            "tamano": pool.size(),
+            "en_uso": pool.checkedout(),
+            "libres": pool.checkedin(),
+            # overflow() es negativo mientras el pool no llegó a su tamaño
+            "desborde": max(pool.overflow(), 0),
+            "desborde_maximo": pool._max_overflow,
+            "timeout": pool._timeout,
+        })
+    metricas = getattr(pool, 'metricas', None)
+    if metricas is not None:
+        estadisticas.update(metricas.a_dict())
+    return estadisticas
@@ -0,0 +1,172 @@
+import itertools
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app, has_request_context, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event
+from backend.app.modelos import db
+from backend.app.sesion import SesionAplicacion, es_savepoint
+from backend.servicios.cache import CacheTTL
+
+# Prefijo de las llaves de SQLALCHEMY_BINDS creadas para las réplicas de lectura
+PREFIJO_REPLICA = 'replica_'
+
+# Momento (segundos epoch) de la última escritura confirmada del cliente. Se devuelve en una cookie y en
+# una cabecera, y el cliente puede reenviar cualquiera de las dos; el worker que atiende la lectura no
+# necesita haber visto la escritura
+COOKIE_ULTIMA_ESCRITURA = 'ultima_escritura'
+CABECERA_ULTIMA_ESCRITURA = 'X-Ultima-Escritura'
+
+# Llave en el environ WSGI con el momento de la escritura confirmada durante la petición
+_ESCRITURA = 'replicas.escritura'
+
+class EnrutadorReplicas:
+    """
+    EnrutadorReplicas envía las lecturas de los endpoints marcados con @solo_lectura a las réplicas
+    configuradas en REPLICAS_LECTURA (en turnos) y todo lo demás a la base de datos principal.
+
+    Después de que un usuario confirma una escritura, sus lecturas van a la principal durante
+    REPLICAS_VENTANA_LECTURA_PROPIA segundos, para que vea sus propios cambios aunque las réplicas
+    tengan retraso. La ventana viaja con el cliente: la respuesta a una escritura lleva el momento en
+    la cookie `ultima_escritura` y en la cabecera X-Ultima-Escritura, y @solo_lectura respeta
+    cualquiera de las dos, así que funciona aunque la lectura la atienda otro worker. El proceso que
+    recibió la escritura también la recuerda en memoria, para los clientes que no reenvían ninguna.
+    Un valor falsificado solo manda más lecturas a la principal.
+    """
+
+    def __init__(self, app=None):
+        self._turno = itertools.count()
+        self.escrituras_recientes = CacheTTL(maximo=10000, ttl=5)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Agrega las réplicas a SQLALCHEMY_BINDS; debe llamarse antes de db.init_app(app).
+        """
+        app.config.setdefault('REPLICAS_LECTURA', [])
+        app.config.setdefault('REPLICAS_VENTANA_LECTURA_PROPIA', 5)
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        llaves = []
+        for indice, url in enumerate(app.config['REPLICAS_LECTURA']):
+            llave = f"{PREFIJO_REPLICA}{indice}"
+            binds[llave] = url
+            llaves.append(llave)
+        app.config['SQLALCHEMY_BINDS'] = binds
+        self.escrituras_recientes.ttl = app.config['REPLICAS_VENTANA_LECTURA_PROPIA']
+        app.extensions['replicas_lectura'] = llaves
+        if llaves:
+            app.after_request(self._informar_escritura)
+
+    def elegir_replica(self):
+        """
+        Engine de la réplica que atiende la lectura actual, o None si se debe leer de la principal.
+        """
+        llaves = current_app.extensions.get('replicas_lectura')
+        if not llaves:
+            return None
+        # Las escrituras sin confirmar de la propia sesión (un lote en curso, un flush anterior en la
+        # petición) solo existen en la principal
+        if db.session.info.get('diferir_commit') or db.session.info.get('hubo_escrituras'):
+            return None
+        if self._escritura_reciente_del_cliente():
+            return None
+        identidad = _identidad_actual()
+        if identidad is not None and self.escrituras_recientes.obtener(identidad):
+            return None
+        return db.engines[llaves[next(self._turno) % len(llaves)]]
+
+    def registrar_escritura(self, identidad):
+        self.escrituras_recientes.guardar(identidad, True)
+
+    def _escritura_reciente_del_cliente(self):
+        if not has_request_context():
+            return False
+        valor = request.headers.get(CABECERA_ULTIMA_ESCRITURA) or request.cookies.get(COOKIE_ULTIMA_ESCRITURA)
+        try:
+            momento = float(valor)
+        except (TypeError, ValueError):
+            return False
+        # Un momento futuro (relojes desfasados o valor inventado) no extiende la ventana
+        return 0 <= time.time() - momento < self.escrituras_recientes.ttl
+
+    def _informar_escritura(self, respuesta):
+        momento = request.environ.get(_ESCRITURA)
+        if momento is not None:
+            valor = f"{momento:.3f}"
+            respuesta.headers[CABECERA_ULTIMA_ESCRITURA] = valor
+            respuesta.set_cookie(COOKIE_ULTIMA_ESCRITURA, valor, max_age=max(int(self.escrituras_recientes.ttl), 1),
+                                 httponly=True, samesite='Lax')
+        return respuesta
+
+def _identidad_actual():
+    if not has_request_context():
+        return None
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        # La petición no pasó por @jwt_required
+        return None
+
+def solo_lectura(vista):
+    """
+    Marca una vista que solo lee de la base de datos para que sus consultas puedan ir a una réplica.
+
+    Se aplica debajo de @jwt_required() para conocer al usuario y respetar su ventana de lectura propia.
+    """
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        replica = enrutador_replicas.elegir_replica()
+        if replica is None:
+            return vista(*args, **kwargs)
+        db.session.info['replica'] = replica
+        try:
+            return vista(*args, **kwargs)
+        finally:
+            db.session.info.pop('replica', None)
+    return envoltura
+
+@contextmanager
+def en_principal():
+    """
+    Envía a la base principal las consultas del bloque aunque la vista sea @solo_lectura. Se usa para
+    construir estados que se guardan en memoria y no deben quedar con el retraso de una réplica.
+    """
+    replica = db.session.info.pop('replica', None)
+    try:
+        yield
+    finally:
+        if replica is not None:
+            db.session.info['replica'] = replica
+
+@event.listens_for(SesionAplicacion, 'after_flush')
+def _registrar_escritura_pendiente(sesion, contexto):
+    sesion.info['hubo_escrituras'] = True
+
+@event.listens_for(SesionAplicacion, 'do_orm_execute')
+def _registrar_escritura_masiva(estado):
+    # INSERT/UPDATE/DELETE ejecutados con session.execute() no pasan por el flush
+    if estado.is_insert or estado.is_update or estado.is_delete:
+        estado.session.info['hubo_escrituras'] = True
+
+@event.listens_for(SesionAplicacion, 'after_commit')
+def _abrir_ventana_lectura_propia(sesion):
+    if es_savepoint(sesion):
+        return
+    if sesion.info.pop('hubo_escrituras', False):
+        if has_request_context():
+            request.environ[_ESCRITURA] = time.time()
+        identidad = _identidad_actual()
+        if identidad is not None:
+            enrutador_replicas.registrar_escritura(identidad)
+
+@event.listens_for(SesionAplicacion, 'after_soft_rollback')
+def _descartar_escrituras(sesion, transaccion_previa):
+    # Revertir un savepoint no deshace las escrituras anteriores de la transacción
+    if transaccion_previa.nested:
+        return
+    sesion.info.pop('hubo_escrituras', None)
+
+# Instancia compartida, inicializada por crear_app
+enrutador_replicas = EnrutadorReplicas()
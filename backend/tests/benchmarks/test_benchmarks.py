@@ -0,0 +1,36 @@
+from backend.app.modelos import ListaCompra, ProductoLista
+from backend.benchmarks.arnes import ejecutar, percentil, ClientePruebas
+from backend.benchmarks.datos import generar_datos
+from backend.benchmarks.escenarios import ESCENARIOS
+from backend.benchmarks.lineas_base import comparar
+
+def test_generar_datos_deterministas(app, session):
+    # Comprueba los tamaños generados, los contadores de las listas y que la semilla fija el contenido
+    datos = generar_datos(usuarios=3, productos=50, listas_por_usuario=2, items_por_lista=4, semilla=7)
+    assert len(datos.usuarios) == len(datos.tokens) == 3
+    assert len(datos.ids_productos) == 50
+    assert [len(listas) for listas in datos.listas_por_usuario] == [2, 2, 2]
+    assert all(len(items) == 4 for items in datos.items_por_lista.values())
+    assert {lista.total_items for lista in ListaCompra.query} == {4}
+    primeras = [(fila.id_lista, fila.id_producto, fila.cantidad) for fila in ProductoLista.query.order_by(ProductoLista.id).limit(5)]
+    assert primeras == [(1, 45, 1), (1, 33, 5), (1, 40, 4), (1, 42, 4), (2, 4, 4)]
+
+def test_ejecutar_escenarios_con_el_cliente_de_pruebas(app, session):
+    # Comprueba que los escenarios de lectura responden sin errores y se resumen los percentiles
+    datos = generar_datos(usuarios=2, productos=30, listas_por_usuario=1, items_por_lista=3)
+    for nombre in ('productos', 'buscar', 'listas', 'lista', 'marcar'):
+        resultado = ejecutar(ESCENARIOS[nombre], datos, lambda: ClientePruebas(app), peticiones=5, calentamiento=1, modo='prueba')
+        assert resultado['peticiones'] == 5
+        assert resultado['errores'] == 0, nombre
+        assert 0 < resultado['p50_ms'] <= resultado['p95_ms'] <= resultado['p99_ms']
+
+def test_percentil_y_comparacion_con_linea_base():
+    # Comprueba el percentil por rango más cercano y que solo los cambios fuera de la tolerancia son regresiones
+    assert percentil(list(range(1, 101)), 95) == 95
+    assert percentil([3.0], 99) == 3.0
+    base = {"resultados": [{"escenario": "productos", "modo": "prueba", "concurrencia": 1, "rps": 100.0,
+                            "p95_ms": 10.0, "p99_ms": 20.0, "errores": 0}]}
+    actual = [{"escenario": "productos", "modo": "prueba", "concurrencia": 1, "rps": 95.0,
+               "p95_ms": 13.0, "p99_ms": 21.0, "errores": 0}]
+    regresiones = {c["metrica"] for c in comparar(actual, base, tolerancia=0.15) if c["regresion"]}
+    assert regresiones == {"p95_ms"}
@@ -1,5 +1,9 @@
 import pytest
-from backend.app import crear_app, db
+from backend.app import crear_app, cargar_entorno, db
+from backend.servicios.identidad import cache_identidades
+
+# Los módulos de pruebas importan db_config al recolectarse, antes del primer crear_app
+cargar_entorno()
 
 @pytest.fixture(scope='module')
 def app():
@@ -19,4 +23,5 @@ def session(app):
         db.session.begin_nested()
         yield db.session
         db.session.rollback()
-        db.drop_all()  # Drop all tables
\ No newline at end of file
+        db.drop_all()  # Drop all tables
+        cache_identidades.limpiar()  # Los IDs cacheados no sobreviven a la base de datos
\ No newline at end of file
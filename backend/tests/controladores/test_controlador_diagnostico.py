@@ -0,0 +1,78 @@
+from backend.app import crear_app
+from backend.config import db_config
+
+class TestsDiagnostico:
+    def test_estadisticas_catalogo(self, client, session):
+        """
+        Prueba para verificar que se exponen los contadores del caché del catálogo.
+        """
+        response = client.get("/v1/diagnostico/catalogo")
+        assert response.status_code == 200
+        assert {'aciertos', 'fallos', 'tasa_aciertos', 'ms_ultima_reconstruccion'} <= set(response.get_json())
+
+    def test_estadisticas_eventos(self, client, session):
+        """
+        Prueba para verificar que se exponen los contadores del canal de eventos de las listas.
+        """
+        response = client.get("/v1/diagnostico/eventos")
+        assert response.status_code == 200
+        assert {'listas', 'suscriptores', 'publicados'} <= set(response.get_json())
+
+    def test_estado_pool(self, client, session):
+        """
+        Prueba para verificar que se expone el estado del pool de conexiones de cada base de datos.
+        """
+        response = client.get("/v1/diagnostico/pool")
+        assert response.status_code == 200
+        assert 'clase' in response.get_json()['principal']
+
+    def test_tiempos_arranque(self, client, session):
+        """
+        Prueba para verificar que se expone el desglose del tiempo de arranque por fase.
+        """
+        response = client.get("/v1/diagnostico/arranque")
+        assert response.status_code == 200
+        assert {'configuracion', 'base_de_datos', 'servicios', 'rutas'} <= set(response.get_json()['fases_ms'])
+
+    def test_metricas_prometheus(self, client, session):
+        """
+        Prueba para verificar que /metrics expone la latencia de las peticiones atendidas por endpoint.
+        """
+        client.get("/v1/diagnostico/catalogo")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        texto = response.get_data(as_text=True)
+        assert 'endpoint="diagnostico_bp.estadisticas_catalogo",metodo="GET",estado="200"' in texto
+        assert 'app_peticiones_en_curso 1' in texto
+
+    def test_diagnostico_deshabilitado(self, monkeypatch):
+        """
+        Prueba para verificar que sin DIAGNOSTICO_HABILITADO los puntos de diagnóstico no se registran
+        (el valor por defecto en producción), mientras /metrics sigue disponible.
+        """
+        assert db_config.Produccion.DIAGNOSTICO_HABILITADO is False
+        monkeypatch.setattr(db_config.PruebasEfimeras, 'DIAGNOSTICO_HABILITADO', False)
+        app = crear_app('pruebas-caja-arena')
+        with app.test_client() as client:
+            for ruta in ("/v1/diagnostico/catalogo", "/v1/diagnostico/eventos", "/v1/diagnostico/pool",
+                         "/v1/diagnostico/arranque"):
+                assert client.get(ruta).status_code == 404
+            assert client.get("/metrics").status_code == 200
+
+    def test_metricas_con_token(self, monkeypatch):
+        """
+        Prueba para verificar que con METRICAS_TOKEN /metrics exige el token y que en producción sin
+        token no se registra.
+        """
+        assert db_config.Produccion.METRICAS_PUBLICAS is False
+        monkeypatch.setattr(db_config.PruebasEfimeras, 'METRICAS_TOKEN', 'secreto')
+        monkeypatch.setattr(db_config.PruebasEfimeras, 'METRICAS_PUBLICAS', False)
+        with crear_app('pruebas-caja-arena').test_client() as client:
+            assert client.get("/metrics").status_code == 401
+            assert client.get("/metrics", headers={'Authorization': 'Bearer otro'}).status_code == 401
+            assert client.get("/metrics", headers={'Authorization': 'Bearer secreto'}).status_code == 200
+
+        monkeypatch.setattr(db_config.PruebasEfimeras, 'METRICAS_TOKEN', None)
+        with crear_app('pruebas-caja-arena').test_client() as client:
+            assert client.get("/metrics").status_code == 404
@@ -1,8 +1,10 @@
 import pytest
 from flask import json
+from sqlalchemy import event
 from backend.controladores.controlador_listacompras import ControladorListaCompras
-from backend.app.modelos import Usuario, ListaCompra, Producto, ProductoLista
+from backend.app.modelos import db, Usuario, ListaCompra, Producto, ProductoLista
 from flask_jwt_extended import create_access_token
+from backend.servicios.notificaciones import centro_eventos
 
 class TestCrearListaCompras:
     @pytest.fixture
@@ -49,6 +51,14 @@ class TestCrearListaCompras:
         assert response.status_code == 404
         assert 'Usuario no encontrado' in response.get_json()['error']
 
+    def test_crear_lista_compras_con_id_en_token(self, client, usuario):
+        """ Prueba que el IDUsuario de la reclamación del token se usa sin buscar el usuario por nombre. """
+        token = create_access_token(identity="otro-nombre", additional_claims={'id_usuario': usuario.id})
+        data = {'nombre': 'Groceries'}
+        response = client.post('/v1/listascompras', headers={'Authorization': f'Bearer {token}'}, data=json.dumps(data), content_type='application/json')
+        assert response.status_code == 201
+        assert ListaCompra.query.first().id_usuario == usuario.id
+
     def test_crear_lista_compras_sin_token(self, client):
         """ Prueba la respuesta cuando no se proporciona un token. """
         data = {'nombre': 'Groceries'}
@@ -139,3 +149,381 @@ class TestAgregarProductoALista:
         response = client.post(f'/v1/listascompras/{lista_compras.id}/productos', data=json.dumps(data), content_type='application/json')
         assert response.status_code == 401
         assert 'Missing Authorization Header' in response.get_json()['msg']
+
+class TestAgregarProductosALista:
+    @pytest.fixture
+    def usuario(self, session):
+        usuario = Usuario(nombre_usuario="testuser", hash_contrasena="hashedpassword")
+        session.add(usuario)
+        session.commit()
+        return usuario
+
+    @pytest.fixture
+    def headers(self, usuario):
+        return {'Authorization': f'Bearer {create_access_token(identity=usuario.nombre_usuario)}'}
+
+    @pytest.fixture
+    def productos(self, session):
+        productos = [Producto(nombre="Milk", tipo_medida="Liters"), Producto(nombre="Bread", tipo_medida="Units")]
+        session.add_all(productos)
+        session.commit()
+        return productos
+
+    @pytest.fixture
+    def lista_compras(self, session, usuario):
+        lista_compras = ListaCompra(nombre="Groceries", id_usuario=usuario.id)
+        session.add(lista_compras)
+        session.commit()
+        return lista_compras
+
+    def test_agregar_varios_productos_exitoso(self, client, headers, lista_compras, productos):
+        """ Prueba que varios productos se agregan en una sola petición. """
+        data = [{'id_producto': producto.id, 'cantidad': 2} for producto in productos]
+        response = client.post(f'/v1/listascompras/{lista_compras.id}/productos:bulk', headers=headers, data=json.dumps(data), content_type='application/json')
+        assert response.status_code == 201
+        assert response.get_json()['agregados'] == 2
+        assert response.get_json()['errores'] == []
+        assert ProductoLista.query.filter_by(id_lista=lista_compras.id).count() == 2
+
+    def test_agregar_varios_productos_con_errores_parciales(self, client, headers, lista_compras, productos):
+        """ Prueba que los elementos inválidos se reportan sin impedir agregar los válidos. """
+        data = [
+            {'id_producto': productos[0].id, 'cantidad': 1},
+            {'id_producto': 999, 'cantidad': 1},
+            {'cantidad': 3},
+        ]
+        response = client.post(f'/v1/listascompras/{lista_compras.id}/productos:bulk', headers=headers, data=json.dumps(data), content_type='application/json')
+        assert response.status_code == 201
+        assert response.get_json()['agregados'] == 1
+        assert [error['indice'] for error in response.get_json()['errores']] == [1, 2]
+        assert ProductoLista.query.count() == 1
+
+    def test_agregar_varios_productos_todos_invalidos(self, client, headers, lista_compras):
+        """ Prueba que se responde 400 cuando ningún elemento es válido. """
+        data = [{'id_producto': 999, 'cantidad': 1}]
+        response = client.post(f'/v1/listascompras/{lista_compras.id}/productos:bulk', headers=headers, data=json.dumps(data), content_type='application/json')
+        assert response.status_code == 400
+        assert ProductoLista.query.count() == 0
+
+    def test_agregar_varios_productos_lista_inexistente(self, client, headers, productos):
+        """ Prueba agregar productos a una lista que no existe. """
+        data = [{'id_producto': productos[0].id, 'cantidad': 1}]
+        response = client.post('/v1/listascompras/999/productos:bulk', headers=headers, data=json.dumps(data), content_type='application/json')
+        assert response.status_code == 404
+
+    def test_agregar_varios_productos_lista_de_otro_usuario(self, client, session, lista_compras, productos):
+        """ Prueba que no se pueden agregar productos a una lista ajena. """
+        otro = Usuario(nombre_usuario="otro", hash_contrasena="hashedpassword")
+        session.add(otro)
+        session.commit()
+        headers = {'Authorization': f'Bearer {create_access_token(identity=otro.nombre_usuario)}'}
+        data = [{'id_producto': productos[0].id, 'cantidad': 1}]
+        response = client.post(f'/v1/listascompras/{lista_compras.id}/productos:bulk', headers=headers, data=json.dumps(data), content_type='application/json')
+        assert response.status_code == 404
+        assert ProductoLista.query.count() == 0
+
+    def test_agregar_varios_productos_rechaza_booleanos(self, client, headers, lista_compras, productos):
+        """ Prueba que true/false no se aceptan como ID de producto ni como cantidad. """
+        data = [{'id_producto': True, 'cantidad': 1}, {'id_producto': productos[0].id, 'cantidad': True}]
+        response = client.post(f'/v1/listascompras/{lista_compras.id}/productos:bulk', headers=headers, data=json.dumps(data), content_type='application/json')
+        assert response.status_code == 400
+        assert [error['indice'] for error in response.get_json()['errores']] == [0, 1]
+
+    def test_agregar_varios_productos_actualiza_contadores(self, client, headers, lista_compras, productos):
+        """ Prueba que la inserción masiva mantiene los contadores de la lista. """
+        data = [{'id_producto': producto.id, 'cantidad': 1} for producto in productos]
+        client.post(f'/v1/listascompras/{lista_compras.id}/productos:bulk', headers=headers, data=json.dumps(data), content_type='application/json')
+        assert (lista_compras.total_items, lista_compras.comprados, lista_compras.completa) == (2, 0, False)
+
+class TestConsultarListaCompras:
+    @pytest.fixture
+    def usuario(self, session):
+        usuario = Usuario(nombre_usuario="testuser", hash_contrasena="hashedpassword")
+        session.add(usuario)
+        session.commit()
+        return usuario
+
+    @pytest.fixture
+    def headers(self, usuario):
+        # El IDUsuario viaja en el token, así que resolver la identidad no consulta la base de datos
+        token = create_access_token(identity=usuario.nombre_usuario, additional_claims={'id_usuario': usuario.id})
+        return {'Authorization': f'Bearer {token}'}
+
+    @pytest.fixture
+    def contar_consultas(self, app):
+        # Cuenta las sentencias SQL ejecutadas por el motor mientras dura la prueba
+        consultas = []
+        def registrar(conn, cursor, statement, parameters, context, executemany):
+            consultas.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', registrar)
+        yield consultas
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+
+    def crear_lista(self, session, usuario, cantidad):
+        productos = [Producto(nombre=f"Producto {i}", tipo_medida="Units") for i in range(cantidad)]
+        lista = ListaCompra(nombre="Groceries", id_usuario=usuario.id)
+        session.add_all(productos + [lista])
+        session.flush()
+        session.add_all([ProductoLista(id_lista=lista.id, id_producto=producto.id, cantidad=1) for producto in productos])
+        session.commit()
+        session.expire_all()
+        return lista.id
+
+    def test_consultar_lista_con_productos(self, client, session, usuario, headers):
+        """ Prueba que la lista se devuelve con sus elementos y el producto de cada uno. """
+        lista_id = self.crear_lista(session, usuario, 2)
+        response = client.get(f'/v1/listascompras/{lista_id}', headers=headers)
+        assert response.status_code == 200
+        datos = response.get_json()
+        assert datos['id'] == lista_id
+        assert datos['nombre'] == 'Groceries'
+        assert [item['producto']['nombre'] for item in datos['productos']] == ['Producto 0', 'Producto 1']
+        assert datos['productos'][0]['cantidad'] == 1
+        assert datos['productos'][0]['comprado'] is False
+
+    def test_consultar_lista_cantidad_fija_de_consultas(self, client, session, usuario, headers, contar_consultas):
+        """ Prueba que la cantidad de consultas no depende de la cantidad de elementos de la lista. """
+        lista_chica = self.crear_lista(session, usuario, 1)
+        lista_grande = self.crear_lista(session, usuario, 20)
+
+        del contar_consultas[:]
+        assert client.get(f'/v1/listascompras/{lista_chica}', headers=headers).status_code == 200
+        consultas_chica = len(contar_consultas)
+
+        session.expire_all()
+        del contar_consultas[:]
+        response = client.get(f'/v1/listascompras/{lista_grande}', headers=headers)
+        assert response.status_code == 200
+        assert len(response.get_json()['productos']) == 20
+        assert len(contar_consultas) == consultas_chica
+        assert consultas_chica <= 2
+
+    def test_consultar_lista_cabeceras_de_consultas(self, client, session, usuario, headers):
+        """ Prueba que X-DB-Queries reporta las mismas consultas para una lista chica y una grande. """
+        lista_chica = self.crear_lista(session, usuario, 1)
+        lista_grande = self.crear_lista(session, usuario, 20)
+        chica = client.get(f'/v1/listascompras/{lista_chica}', headers=headers)
+        session.expire_all()
+        grande = client.get(f'/v1/listascompras/{lista_grande}', headers=headers)
+        assert int(grande.headers['X-DB-Queries']) == int(chica.headers['X-DB-Queries']) <= 2
+        assert float(grande.headers['X-DB-Time']) >= 0
+
+    def test_consultar_lista_de_otro_usuario(self, client, session, usuario):
+        """ Prueba que la lista de otro usuario no se expone. """
+        lista_id = self.crear_lista(session, usuario, 1)
+        otro = Usuario(nombre_usuario="otro", hash_contrasena="hashedpassword")
+        session.add(otro)
+        session.commit()
+        token = create_access_token(identity=otro.nombre_usuario)
+        response = client.get(f'/v1/listascompras/{lista_id}', headers={'Authorization': f'Bearer {token}'})
+        assert response.status_code == 404
+
+    def test_consultar_lista_inexistente(self, client, headers):
+        """ Prueba consultar una lista que no existe. """
+        response = client.get('/v1/listascompras/999', headers=headers)
+        assert response.status_code == 404
+
+class TestConsultarListasCompras:
+    @pytest.fixture
+    def usuario(self, session):
+        usuario = Usuario(nombre_usuario="testuser", hash_contrasena="hashedpassword")
+        session.add(usuario)
+        session.commit()
+        return usuario
+
+    @pytest.fixture
+    def headers(self, usuario):
+        return {'Authorization': f'Bearer {create_access_token(identity=usuario.nombre_usuario)}'}
+
+    @pytest.fixture
+    def listas(self, session, usuario):
+        # Tres listas: una con un elemento de dos comprado, una con todo comprado y una vacía
+        producto = Producto(nombre="Milk", tipo_medida="Liters")
+        listas = [ListaCompra(nombre=f"Lista {i}", id_usuario=usuario.id) for i in range(3)]
+        otro = Usuario(nombre_usuario="otro", hash_contrasena="hashedpassword")
+        session.add_all([producto, otro] + listas)
+        session.flush()
+        session.add(ListaCompra(nombre="Ajena", id_usuario=otro.id))
+        session.add_all([
+            ProductoLista(id_lista=listas[0].id, id_producto=producto.id, cantidad=1, comprado=True),
+            ProductoLista(id_lista=listas[0].id, id_producto=producto.id, cantidad=1, comprado=False),
+            ProductoLista(id_lista=listas[1].id, id_producto=producto.id, cantidad=3, comprado=True),
+        ])
+        session.commit()
+        return listas
+
+    def test_consultar_listas_con_contadores(self, client, headers, listas):
+        """ Prueba que cada lista del usuario incluye sus contadores de elementos. """
+        response = client.get('/v1/listascompras', headers=headers)
+        assert response.status_code == 200
+        datos = response.get_json()
+        assert datos['next_cursor'] is None
+        resumen = {lista['nombre']: (lista['total_items'], lista['comprados'], lista['completa']) for lista in datos['listas']}
+        assert resumen == {'Lista 0': (2, 1, False), 'Lista 1': (1, 1, True), 'Lista 2': (0, 0, True)}
+        assert all(lista['actualizado_en'] for lista in datos['listas'])
+
+    def test_consultar_listas_filtro_completa(self, client, headers, listas):
+        """ Prueba el filtro por listas completas e incompletas. """
+        completas = client.get('/v1/listascompras?completa=true', headers=headers).get_json()['listas']
+        incompletas = client.get('/v1/listascompras?completa=false', headers=headers).get_json()['listas']
+        assert [lista['nombre'] for lista in completas] == ['Lista 1', 'Lista 2']
+        assert [lista['nombre'] for lista in incompletas] == ['Lista 0']
+        assert client.get('/v1/listascompras?completa=quizas', headers=headers).status_code == 400
+
+    def test_consultar_listas_paginadas(self, client, headers, listas):
+        """ Prueba la paginación por cursor del índice de listas. """
+        primera = client.get('/v1/listascompras?limit=2', headers=headers).get_json()
+        assert [lista['id'] for lista in primera['listas']] == [listas[0].id, listas[1].id]
+        assert primera['next_cursor'] == listas[1].id
+        segunda = client.get(f"/v1/listascompras?limit=2&after={primera['next_cursor']}", headers=headers).get_json()
+        assert [lista['id'] for lista in segunda['listas']] == [listas[2].id]
+        assert segunda['next_cursor'] is None
+
+class TestMarcarProductosComprados:
+    @pytest.fixture
+    def usuario(self, session):
+        usuario = Usuario(nombre_usuario="testuser", hash_contrasena="hashedpassword")
+        session.add(usuario)
+        session.commit()
+        return usuario
+
+    @pytest.fixture
+    def headers(self, usuario):
+        return {'Authorization': f'Bearer {create_access_token(identity=usuario.nombre_usuario)}'}
+
+    @pytest.fixture
+    def items(self, session, usuario):
+        producto = Producto(nombre="Milk", tipo_medida="Liters")
+        lista = ListaCompra(nombre="Groceries", id_usuario=usuario.id)
+        session.add_all([producto, lista])
+        session.flush()
+        items = [ProductoLista(id_lista=lista.id, id_producto=producto.id, cantidad=1) for _ in range(3)]
+        session.add_all(items)
+        session.commit()
+        return items
+
+    def marcar(self, client, headers, lista_id, data):
+        return client.patch(f'/v1/listascompras/{lista_id}/productos:comprado', headers=headers, data=json.dumps(data), content_type='application/json')
+
+    def test_marcar_varios_comprados(self, client, session, headers, items):
+        """ Prueba que se marcan varios elementos y se devuelven los contadores de la lista. """
+        lista_id = items[0].id_lista
+        response = self.marcar(client, headers, lista_id, {'ids': [items[0].id, items[1].id], 'comprado': True})
+        assert response.status_code == 200
+        assert response.get_json() == {'actualizados': 2, 'total_items': 3, 'comprados': 2, 'completa': False}
+        session.expire_all()
+        assert [item.comprado for item in items] == [True, True, False]
+
+        # Repetir la operación no cambia nada; completar la lista la marca como completa
+        assert self.marcar(client, headers, lista_id, {'ids': [items[0].id], 'comprado': True}).get_json()['actualizados'] == 0
+        datos = self.marcar(client, headers, lista_id, {'ids': [item.id for item in items], 'comprado': True}).get_json()
+        assert datos == {'actualizados': 1, 'total_items': 3, 'comprados': 3, 'completa': True}
+
+        datos = self.marcar(client, headers, lista_id, {'ids': [items[2].id], 'comprado': False}).get_json()
+        assert datos == {'actualizados': 1, 'total_items': 3, 'comprados': 2, 'completa': False}
+
+    def test_marcar_ignora_elementos_de_otra_lista(self, client, session, usuario, headers, items):
+        """ Prueba que los IDs de elementos de otras listas no se modifican. """
+        otra = ListaCompra(nombre="Otra", id_usuario=usuario.id)
+        session.add(otra)
+        session.commit()
+        response = self.marcar(client, headers, otra.id, {'ids': [items[0].id], 'comprado': True})
+        assert response.get_json()['actualizados'] == 0
+        session.expire_all()
+        assert items[0].comprado is False
+
+    def test_marcar_datos_invalidos(self, client, headers, items):
+        """ Prueba la validación del cuerpo de la petición. """
+        lista_id = items[0].id_lista
+        assert self.marcar(client, headers, lista_id, {'ids': [items[0].id]}).status_code == 400
+        assert self.marcar(client, headers, lista_id, {'ids': [], 'comprado': True}).status_code == 400
+        assert self.marcar(client, headers, lista_id, {'ids': ['a'], 'comprado': True}).status_code == 400
+
+    def test_marcar_lista_de_otro_usuario(self, client, session, items):
+        """ Prueba que no se pueden marcar elementos de una lista ajena. """
+        otro = Usuario(nombre_usuario="otro", hash_contrasena="hashedpassword")
+        session.add(otro)
+        session.commit()
+        headers = {'Authorization': f'Bearer {create_access_token(identity=otro.nombre_usuario)}'}
+        assert self.marcar(client, headers, items[0].id_lista, {'ids': [items[0].id], 'comprado': True}).status_code == 404
+
+class TestEventosLista:
+    @pytest.fixture
+    def usuario(self, session):
+        usuario = Usuario(nombre_usuario="testuser", hash_contrasena="hashedpassword")
+        session.add(usuario)
+        session.commit()
+        return usuario
+
+    @pytest.fixture
+    def headers(self, usuario):
+        return {'Authorization': f'Bearer {create_access_token(identity=usuario.nombre_usuario)}'}
+
+    @pytest.fixture
+    def lista_compras(self, session, usuario, app, monkeypatch):
+        # Conexiones cortas para que la respuesta termine y pueda leerse completa
+        monkeypatch.setitem(app.config, 'SSE_LATIDO_SEGUNDOS', 0.05)
+        monkeypatch.setitem(app.config, 'SSE_DURACION_MAXIMA', 0.2)
+        centro_eventos.reiniciar()
+        lista_compras = ListaCompra(nombre="Groceries", id_usuario=usuario.id)
+        session.add(lista_compras)
+        session.commit()
+        yield lista_compras
+        centro_eventos.reiniciar()
+
+    @pytest.fixture
+    def producto(self, session):
+        producto = Producto(nombre="Milk", tipo_medida="Liters")
+        session.add(producto)
+        session.commit()
+        return producto
+
+    def test_reanudar_con_last_event_id(self, client, headers, lista_compras, producto):
+        """ Prueba que los eventos confirmados se reenvían a partir de Last-Event-ID. """
+        data = {'id_producto': producto.id, 'cantidad': 2}
+        client.post(f'/v1/listascompras/{lista_compras.id}/productos', headers=headers, data=json.dumps(data), content_type='application/json')
+        item = ProductoLista.query.one()
+        client.patch(f'/v1/listascompras/{lista_compras.id}/productos:comprado', headers=headers, data=json.dumps({'ids': [item.id], 'comprado': True}), content_type='application/json')
+
+        response = client.get(f'/v1/listascompras/{lista_compras.id}/eventos', headers=dict(headers, **{'Last-Event-ID': '1'}))
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        cuerpo = response.get_data(as_text=True)
+        assert 'retry: ' in cuerpo
+        assert 'event: producto_agregado' not in cuerpo
+        evento = cuerpo.split('id: 2\nevent: productos_marcados\ndata: ')[1].split('\n')[0]
+        assert json.loads(evento) == {'comprado': True, 'ids': [item.id]}
+        assert ': latido' in cuerpo
+
+    def test_conexion_nueva_no_repite_eventos(self, client, headers, lista_compras, producto):
+        """ Prueba que sin Last-Event-ID solo se envían los eventos nuevos. """
+        data = {'id_producto': producto.id, 'cantidad': 2}
+        client.post(f'/v1/listascompras/{lista_compras.id}/productos', headers=headers, data=json.dumps(data), content_type='application/json')
+        cuerpo = client.get(f'/v1/listascompras/{lista_compras.id}/eventos', headers=headers).get_data(as_text=True)
+        assert 'event: ' not in cuerpo
+
+    def test_last_event_id_desconocido_pide_reinicio(self, client, headers, lista_compras):
+        """ Prueba que un Last-Event-ID que ya no está en el historial produce un evento de reinicio. """
+        cuerpo = client.get(f'/v1/listascompras/{lista_compras.id}/eventos', headers=dict(headers, **{'Last-Event-ID': '50'})).get_data(as_text=True)
+        assert 'id: 0\nevent: reinicio' in cuerpo
+
+    def test_limite_de_conexiones(self, app, client, headers, lista_compras, monkeypatch):
+        """ Prueba que al llegar a SSE_MAXIMO_CONEXIONES se responde 503 hasta que se cierre una conexión. """
+        monkeypatch.setitem(app.config, 'SSE_MAXIMO_CONEXIONES', 1)
+        ruta = f'/v1/listascompras/{lista_compras.id}/eventos'
+        abierta = client.get(ruta, headers=headers, buffered=False)
+        assert abierta.status_code == 200
+        rechazada = client.get(ruta, headers=headers)
+        assert rechazada.status_code == 503
+        assert rechazada.headers['Retry-After'] == '3'
+        abierta.close()
+        assert centro_eventos.estadisticas()['conexiones'] == 0
+        assert client.get(ruta, headers=headers).status_code == 200
+
+    def test_eventos_lista_de_otro_usuario(self, client, session, lista_compras):
+        """ Prueba que no se puede escuchar una lista ajena. """
+        otro = Usuario(nombre_usuario="otro", hash_contrasena="hashedpassword")
+        session.add(otro)
+        session.commit()
+        headers = {'Authorization': f'Bearer {create_access_token(identity=otro.nombre_usuario)}'}
+        assert client.get(f'/v1/listascompras/{lista_compras.id}/eventos', headers=headers).status_code == 404
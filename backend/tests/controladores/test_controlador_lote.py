@@ -0,0 +1,187 @@
+import pytest
+from flask import json, jsonify
+from backend.app import eventos_catalogo, eventos_listas
+from backend.app.modelos import db, Usuario, ListaCompra, Producto, ProductoLista
+from backend.servicios.catalogo import cache_catalogo
+from backend.servicios.metricas import metricas_peticiones
+from backend.servicios.notificaciones import centro_eventos
+from flask_jwt_extended import create_access_token
+
+class TestEjecutarLote:
+    @pytest.fixture
+    def usuario(self, session):
+        usuario = Usuario(nombre_usuario="testuser", hash_contrasena="hashedpassword")
+        session.add(usuario)
+        session.commit()
+        return usuario
+
+    @pytest.fixture
+    def headers(self, usuario):
+        return {'Authorization': f'Bearer {create_access_token(identity=usuario.nombre_usuario)}'}
+
+    def _lote(self, client, headers, operaciones, atomico=False):
+        data = {'operaciones': operaciones, 'atomico': atomico}
+        return client.post('/v1/batch', headers=headers, data=json.dumps(data), content_type='application/json')
+
+    def test_lote_exitoso(self, client, headers):
+        """ Prueba que las operaciones se ejecutan en orden y se devuelven sus respuestas. """
+        response = self._lote(client, headers, [
+            {'metodo': 'POST', 'ruta': '/v1/productos', 'cuerpo': {'nombre': 'Milk', 'tipo_medida': 'Liters'}},
+            {'metodo': 'POST', 'ruta': '/v1/listascompras', 'cuerpo': {'nombre': 'Groceries'}},
+            {'metodo': 'GET', 'ruta': '/v1/productos?fields=nombre'},
+        ])
+        assert response.status_code == 200
+        resultado = response.get_json()
+        assert resultado['confirmado'] is True
+        assert [r['estado'] for r in resultado['resultados']] == [201, 201, 200]
+        assert resultado['resultados'][2]['cuerpo'] == [{'nombre': 'Milk'}]
+        assert Producto.query.count() == 1
+        assert ListaCompra.query.count() == 1
+
+    def test_lote_atomico_deshace_todo_si_falla(self, client, headers):
+        """ Prueba que en modo atómico un fallo deshace las operaciones anteriores y omite las siguientes. """
+        response = self._lote(client, headers, [
+            {'metodo': 'POST', 'ruta': '/v1/productos', 'cuerpo': {'nombre': 'Milk', 'tipo_medida': 'Liters'}},
+            {'metodo': 'POST', 'ruta': '/v1/listascompras', 'cuerpo': {}},
+            {'metodo': 'POST', 'ruta': '/v1/productos', 'cuerpo': {'nombre': 'Bread', 'tipo_medida': 'Units'}},
+        ], atomico=True)
+        resultado = response.get_json()
+        assert resultado['confirmado'] is False
+        assert [r['estado'] for r in resultado['resultados']] == [201, 400, 424]
+        assert Producto.query.count() == 0
+
+    def test_lote_no_atomico_conserva_las_exitosas(self, client, headers):
+        """ Prueba que sin modo atómico solo se descartan las operaciones fallidas. """
+        response = self._lote(client, headers, [
+            {'metodo': 'POST', 'ruta': '/v1/productos', 'cuerpo': {'nombre': 'Milk', 'tipo_medida': 'Liters'}},
+            {'metodo': 'PUT', 'ruta': '/v1/productos/999', 'cuerpo': {'nombre': 'Nada'}},
+            {'metodo': 'POST', 'ruta': '/v1/productos', 'cuerpo': {'nombre': 'Bread', 'tipo_medida': 'Units'}},
+        ])
+        resultado = response.get_json()
+        assert resultado['confirmado'] is True
+        assert [r['estado'] for r in resultado['resultados']] == [201, 404, 201]
+        assert Producto.query.count() == 2
+
+    def test_lote_rechaza_rutas_no_permitidas(self, client, headers):
+        """ Prueba que no se pueden anidar lotes ni invocar rutas inexistentes. """
+        response = self._lote(client, headers, [
+            {'metodo': 'POST', 'ruta': '/v1/batch', 'cuerpo': {'operaciones': []}},
+            {'metodo': 'GET', 'ruta': '/v1/inexistente'},
+        ])
+        assert [r['estado'] for r in response.get_json()['resultados']] == [404, 404]
+
+    def test_lote_sin_operaciones(self, client, headers):
+        """ Prueba que se rechaza un lote vacío. """
+        response = self._lote(client, headers, [])
+        assert response.status_code == 400
+
+    def test_lote_sin_token(self, client, session):
+        """ Prueba que el lote requiere autenticación. """
+        response = client.post('/v1/batch', data=json.dumps({'operaciones': []}), content_type='application/json')
+        assert response.status_code == 401
+
+    def test_operaciones_no_repiten_los_hooks(self, client, headers):
+        """ Prueba que las operaciones llaman a la vista directamente: se mide una sola petición y las
+        sentencias SQL de todas las operaciones se suman a la cuenta del lote. """
+        def total_medidas():
+            return sum(serie[2] for serie in metricas_peticiones.instantanea()['series'])
+
+        antes = total_medidas()
+        response = self._lote(client, headers, [
+            {'metodo': 'POST', 'ruta': '/v1/productos', 'cuerpo': {'nombre': 'Milk', 'tipo_medida': 'Liters'}},
+            {'metodo': 'GET', 'ruta': '/v1/productos/999'},
+            {'metodo': 'GET', 'ruta': '/v1/productos'},
+        ])
+        assert [r['estado'] for r in response.get_json()['resultados']] == [201, 404, 200]
+        assert total_medidas() == antes + 1
+        assert int(response.headers['X-DB-Queries']) >= 3
+
+    def test_rollback_dentro_de_una_operacion_anula_el_lote(self, app, client, headers, monkeypatch):
+        """ Prueba que si una operación deshace la transacción el lote no se informa como confirmado. """
+        def vista_que_deshace(productoID):
+            db.session.rollback()
+            return jsonify({"mensaje": "Producto eliminado exitosamente."}), 200
+
+        monkeypatch.setitem(app.view_functions, 'productos_bp.eliminar_producto', vista_que_deshace)
+        response = self._lote(client, headers, [
+            {'metodo': 'POST', 'ruta': '/v1/productos', 'cuerpo': {'nombre': 'Milk', 'tipo_medida': 'Liters'}},
+            {'metodo': 'DELETE', 'ruta': '/v1/productos/1'},
+            {'metodo': 'POST', 'ruta': '/v1/productos', 'cuerpo': {'nombre': 'Bread', 'tipo_medida': 'Units'}},
+        ], atomico=True)
+        resultado = response.get_json()
+        assert resultado['confirmado'] is False
+        assert [r['estado'] for r in resultado['resultados']] == [201, 200, 424]
+        assert Producto.query.count() == 0
+
+    def test_catalogo_dentro_del_lote_no_usa_la_instantanea(self, client, headers):
+        """ Prueba que un GET del catálogo dentro de un lote ve los cambios sin confirmar pero no construye
+        la instantánea compartida con ellos. """
+        reconstrucciones = cache_catalogo.estadisticas()['reconstrucciones']
+        response = self._lote(client, headers, [
+            {'metodo': 'POST', 'ruta': '/v1/productos', 'cuerpo': {'nombre': 'Milk', 'tipo_medida': 'Liters'}},
+            {'metodo': 'GET', 'ruta': '/v1/productos'},
+            {'metodo': 'POST', 'ruta': '/v1/listascompras', 'cuerpo': {}},
+        ], atomico=True)
+        resultado = response.get_json()
+        assert resultado['confirmado'] is False
+        assert [p['nombre'] for p in resultado['resultados'][1]['cuerpo']] == ['Milk']
+        assert cache_catalogo.estadisticas()['reconstrucciones'] == reconstrucciones
+        assert client.get('/v1/productos', headers=headers).get_json() == []
+
+    def test_lote_rechaza_respuestas_en_flujo(self, client, headers, usuario):
+        """ Prueba que los endpoints en flujo (SSE, stream=1) se rechazan sin leer el generador ni retener
+        el cupo de conexiones SSE. """
+        lista = ListaCompra(nombre="Groceries", id_usuario=usuario.id)
+        db.session.add(lista)
+        db.session.commit()
+        conexiones = centro_eventos.conexiones
+        response = self._lote(client, headers, [
+            {'metodo': 'GET', 'ruta': f'/v1/listascompras/{lista.id}/eventos'},
+            {'metodo': 'GET', 'ruta': '/v1/productos?stream=1'},
+            {'metodo': 'GET', 'ruta': '/v1/productos'},
+        ])
+        resultado = response.get_json()
+        assert [r['estado'] for r in resultado['resultados']] == [400, 400, 200]
+        assert centro_eventos.conexiones == conexiones
+
+    def test_lote_revertido_no_publica_efectos(self, app, client, headers, usuario, monkeypatch):
+        """ Prueba que los savepoints confirmados de un lote que después se revierte no publican eventos de
+        listas ni cambios del catálogo, y que un savepoint revertido conserva los efectos anteriores. """
+        producto = Producto(nombre="Milk", tipo_medida="Liters")
+        lista = ListaCompra(nombre="Groceries", id_usuario=usuario.id)
+        db.session.add_all([producto, lista])
+        db.session.flush()
+        item = ProductoLista(id_lista=lista.id, id_producto=producto.id, cantidad=1)
+        otro = ProductoLista(id_lista=lista.id, id_producto=producto.id, cantidad=2)
+        db.session.add_all([item, otro])
+        db.session.commit()
+        eventos, cambios = [], []
+        monkeypatch.setattr(eventos_listas, '_suscriptores', [eventos.extend])
+        monkeypatch.setattr(eventos_catalogo, '_suscriptores', [lambda lista_cambios, versiones: cambios.append(lista_cambios)])
+
+        def vista_que_deshace(productoID):
+            db.session.rollback()
+            return jsonify({"mensaje": "Producto eliminado exitosamente."}), 200
+
+        monkeypatch.setitem(app.view_functions, 'productos_bp.eliminar_producto', vista_que_deshace)
+        def marcar(id_item):
+            return {'metodo': 'PATCH', 'ruta': f'/v1/listascompras/{lista.id}/productos:comprado',
+                    'cuerpo': {'ids': [id_item], 'comprado': True}}
+
+        resultado = self._lote(client, headers, [
+            marcar(item.id),
+            {'metodo': 'POST', 'ruta': '/v1/productos', 'cuerpo': {'nombre': 'Bread', 'tipo_medida': 'Units'}},
+            {'metodo': 'DELETE', 'ruta': f'/v1/productos/{producto.id}'},
+        ]).get_json()
+        assert resultado['confirmado'] is False
+        assert eventos == [] and cambios == []
+
+        # Otro elemento: con SQLite los savepoints no quedan dentro de la transacción externa
+        resultado = self._lote(client, headers, [
+            marcar(otro.id),
+            {'metodo': 'POST', 'ruta': '/v1/productos', 'cuerpo': {'nombre': 'Bread', 'tipo_medida': 'Units'}},
+            {'metodo': 'PUT', 'ruta': '/v1/productos/999', 'cuerpo': {'nombre': 'Nada'}},
+        ]).get_json()
+        assert resultado['confirmado'] is True
+        assert [tipo for _, tipo, _ in eventos] == ['productos_marcados']
+        assert [[accion for accion, *_ in lista_cambios] for lista_cambios in cambios] == [['agregado']]
@@ -1,5 +1,8 @@
 import json
+from sqlalchemy import insert
 from backend.app.modelos import Producto
+from backend.app.versiones import VERSION_CATALOGO, incrementar_version
+from backend.servicios.busqueda import indice_productos
 from flask_jwt_extended import create_access_token
 
 class TestsAgregarProducto:
@@ -103,6 +106,66 @@ class TestsConsultarProductos:
         response = client.get("/v1/productos")
         assert response.status_code == 401
 
+class TestsPaginacionProductos:
+    def _headers(self):
+        token = create_access_token(identity="testUser")
+        return {'Authorization': f'Bearer {token}'}
+
+    def _crear_productos(self, session, cantidad):
+        for i in range(cantidad):
+            session.add(Producto(nombre=f"Producto{i}", tipo_medida="Unidades"))
+        session.commit()
+
+    def test_paginacion_por_cursor(self, client, session):
+        """
+        Test para verificar que la paginación por cursor recorre todo el catálogo sin repetir productos.
+        """
+        self._crear_productos(session, 5)
+
+        response = client.get("/v1/productos?limit=2", headers=self._headers())
+        assert response.status_code == 200
+        pagina = response.get_json()
+        assert [p['nombre'] for p in pagina['productos']] == ["Producto0", "Producto1"]
+        assert pagina['next_cursor'] is not None
+
+        vistos = [p['id'] for p in pagina['productos']]
+        while pagina['next_cursor'] is not None:
+            response = client.get(f"/v1/productos?limit=2&after={pagina['next_cursor']}", headers=self._headers())
+            pagina = response.get_json()
+            vistos.extend(p['id'] for p in pagina['productos'])
+
+        assert len(vistos) == 5
+        assert vistos == sorted(set(vistos))
+
+    def test_paginacion_ultima_pagina_sin_cursor(self, client, session):
+        """
+        Test para verificar que la última página no devuelve cursor siguiente.
+        """
+        self._crear_productos(session, 2)
+
+        response = client.get("/v1/productos?limit=2", headers=self._headers())
+        assert response.status_code == 200
+        assert len(response.get_json()['productos']) == 2
+        assert response.get_json()['next_cursor'] is None
+
+    def test_proyeccion_de_campos(self, client, session):
+        """
+        Test para verificar que `fields` limita las columnas devueltas.
+        """
+        self._crear_productos(session, 1)
+
+        response = client.get("/v1/productos?fields=nombre", headers=self._headers())
+        assert response.status_code == 200
+        assert response.get_json() == [{'nombre': "Producto0"}]
+
+    def test_parametros_invalidos(self, client, session):
+        """
+        Test para verificar que se rechazan parámetros de paginación o campos inválidos.
+        """
+        assert client.get("/v1/productos?limit=abc", headers=self._headers()).status_code == 400
+        assert client.get("/v1/productos?limit=0", headers=self._headers()).status_code == 400
+        assert client.get("/v1/productos?fields=precio", headers=self._headers()).status_code == 400
+
 class TestsConsultarProductoPorID:
     def test_consultar_producto_por_id_exitoso(self, client, session):
         """
@@ -320,3 +383,242 @@ class TestsEliminarProducto:
         # Verificar que se requiere autenticación
         assert response.status_code == 401
         assert "msg" in response.get_json()  # Suponiendo que Flask-JWT-Extended usa mensajes de error predeterminados
+
+class TestsImportarCatalogo:
+    def _headers(self, content_type):
+        token = create_access_token(identity="testUser")
+        return {'Authorization': f'Bearer {token}', 'Content-Type': content_type}
+
+    def test_importar_csv_exitoso(self, client, session):
+        """
+        Prueba para verificar que se importan productos desde un CSV.
+        """
+        cuerpo = "nombre,tipo_medida\nCafe,Kilogramos\nLeche,Litros\n"
+        response = client.post("/v1/productos:importar", data=cuerpo.encode('utf-8'), headers=self._headers('text/csv'))
+        assert response.status_code == 201
+        assert response.get_json()['importados'] == 2
+        assert Producto.query.count() == 2
+
+    def test_importar_ndjson_en_lotes_con_errores(self, client, session, app, monkeypatch):
+        """
+        Prueba para verificar que el NDJSON se importa en lotes y reporta las filas inválidas.
+        """
+        monkeypatch.setitem(app.config, 'IMPORTACION_TAMANO_LOTE', 2)
+        lineas = [
+            {"nombre": "Cafe", "tipo_medida": "Kilogramos"},
+            {"nombre": "Leche"},
+            {"nombre": "Pan", "tipo_medida": "Unidades"},
+            {"nombre": "Arroz", "tipo_medida": "Kilogramos"},
+        ]
+        cuerpo = "\n".join(json.dumps(linea) for linea in lineas) + "\nno es json\n"
+        response = client.post("/v1/productos:importar", data=cuerpo.encode('utf-8'), headers=self._headers('application/x-ndjson'))
+        assert response.status_code == 201
+        resultado = response.get_json()
+        assert resultado['importados'] == 3
+        assert resultado['lotes'] == 2
+        assert [error['fila'] for error in resultado['errores']] == [2, 5]
+        assert Producto.query.count() == 3
+
+    def test_importar_formato_no_soportado(self, client, session):
+        """
+        Prueba para verificar que se rechazan tipos de contenido no soportados.
+        """
+        response = client.post("/v1/productos:importar", data=b"{}", headers=self._headers('application/xml'))
+        assert response.status_code == 415
+
+class TestsBuscarProductos:
+    def _headers(self):
+        token = create_access_token(identity="testUser")
+        return {'Authorization': f'Bearer {token}'}
+
+    def test_buscar_refleja_cambios_del_catalogo(self, client, session):
+        """
+        Prueba para verificar que la búsqueda ve los productos agregados, actualizados y eliminados.
+        """
+        session.add(Producto(nombre="Azúcar", tipo_medida="Kilos"))
+        session.commit()
+
+        response = client.get("/v1/productos/buscar?q=azu", headers=self._headers())
+        assert response.status_code == 200
+        assert [p['nombre'] for p in response.get_json()] == ["Azúcar"]
+
+        data = {"nombre": "Azúcar morena", "tipo_medida": "Kilos"}
+        client.post("/v1/productos", data=json.dumps(data), headers=self._headers(), content_type='application/json')
+        response = client.get("/v1/productos/buscar?q=azucar", headers=self._headers())
+        assert [p['nombre'] for p in response.get_json()] == ["Azúcar", "Azúcar morena"]
+
+        producto = Producto.query.filter_by(nombre="Azúcar").first()
+        client.delete(f"/v1/productos/{producto.id}", headers=self._headers())
+        response = client.get("/v1/productos/buscar?q=azucar", headers=self._headers())
+        assert [p['nombre'] for p in response.get_json()] == ["Azúcar morena"]
+
+    def test_buscar_ve_cambios_de_otro_worker(self, client, session):
+        """
+        Prueba para verificar que el índice se reconstruye cuando otro proceso cambió el catálogo, y que los
+        cambios propios no lo reconstruyen.
+        """
+        session.add(Producto(nombre="Arroz", tipo_medida="Kilos"))
+        session.commit()
+        assert [p['nombre'] for p in client.get("/v1/productos/buscar?q=arr", headers=self._headers()).get_json()] == ["Arroz"]
+        version = indice_productos.version
+
+        client.post("/v1/productos", json={"nombre": "Arroz integral", "tipo_medida": "Kilos"}, headers=self._headers())
+        assert indice_productos.version == version + 1
+
+        # Otro worker inserta un producto: este proceso no recibe el aviso, solo la versión compartida avanza
+        incrementar_version(session.connection(), VERSION_CATALOGO)
+        session.execute(insert(Producto).values(nombre="Arroz yamaní", tipo_medida="Kilos"))
+        session.commit()
+        response = client.get("/v1/productos/buscar?q=arroz", headers=self._headers())
+        assert [p['nombre'] for p in response.get_json()] == ["Arroz", "Arroz integral", "Arroz yamaní"]
+        assert indice_productos.version == version + 2
+
+    def test_buscar_sin_consulta(self, client, session):
+        """
+        Prueba para verificar que el parámetro q es requerido.
+        """
+        response = client.get("/v1/productos/buscar", headers=self._headers())
+        assert response.status_code == 400
+
+class TestsConsultasCondicionales:
+    def _headers(self, **extra):
+        token = create_access_token(identity="testUser")
+        return {'Authorization': f'Bearer {token}', **extra}
+
+    def test_catalogo_sin_cambios_responde_304(self, client, session):
+        """
+        Prueba para verificar que If-None-Match con el ETag vigente devuelve 304 sin cuerpo.
+        """
+        session.add(Producto(nombre="Cafe", tipo_medida="Kilogramos"))
+        session.commit()
+
+        response = client.get("/v1/productos", headers=self._headers())
+        etag = response.headers['ETag']
+        assert 'Last-Modified' in response.headers
+
+        response = client.get("/v1/productos", headers=self._headers(**{'If-None-Match': etag}))
+        assert response.status_code == 304
+        assert response.data == b''
+
+    def test_catalogo_modificado_cambia_el_etag(self, client, session):
+        """
+        Prueba para verificar que agregar un producto invalida el ETag anterior.
+        """
+        session.add(Producto(nombre="Cafe", tipo_medida="Kilogramos"))
+        session.commit()
+        etag = client.get("/v1/productos", headers=self._headers()).headers['ETag']
+
+        session.add(Producto(nombre="Leche", tipo_medida="Litros"))
+        session.commit()
+
+        response = client.get("/v1/productos", headers=self._headers(**{'If-None-Match': etag}))
+        assert response.status_code == 200
+        assert len(response.get_json()) == 2
+
+    def test_edicion_en_el_mismo_segundo_cambia_el_etag(self, client, session):
+        """
+        Prueba para verificar que editar un producto sin cambiar la cantidad, el ID máximo ni la última
+        actualización (dos ediciones dentro del mismo segundo) también invalida el ETag.
+        """
+        producto = Producto(nombre="Cafe", tipo_medida="Kilogramos")
+        session.add(producto)
+        session.commit()
+        etag = client.get("/v1/productos?limit=10", headers=self._headers()).headers['ETag']
+
+        producto.nombre = "Cafe molido"
+        producto.actualizado_en = producto.actualizado_en
+        session.commit()
+
+        response = client.get("/v1/productos?limit=10", headers=self._headers(**{'If-None-Match': etag}))
+        assert response.status_code == 200
+        assert response.get_json()['productos'][0]['nombre'] == "Cafe molido"
+
+    def test_etag_depende_de_los_parametros(self, client, session):
+        """
+        Prueba para verificar que distintas páginas o proyecciones tienen ETags distintos.
+        """
+        session.add(Producto(nombre="Cafe", tipo_medida="Kilogramos"))
+        session.commit()
+        etag = client.get("/v1/productos", headers=self._headers()).headers['ETag']
+
+        response = client.get("/v1/productos?fields=nombre", headers=self._headers(**{'If-None-Match': etag}))
+        assert response.status_code == 200
+
+    def test_producto_por_id_if_modified_since(self, client, session):
+        """
+        Prueba para verificar que If-Modified-Since con la fecha vigente devuelve 304.
+        """
+        producto = Producto(nombre="Cafe", tipo_medida="Kilogramos")
+        session.add(producto)
+        session.commit()
+
+        response = client.get(f"/v1/productos/{producto.id}", headers=self._headers())
+        ultima_modificacion = response.headers['Last-Modified']
+
+        response = client.get(f"/v1/productos/{producto.id}", headers=self._headers(**{'If-Modified-Since': ultima_modificacion}))
+        assert response.status_code == 304
+
+    def test_catalogo_completo_desde_cache(self, client, session, app):
+        """
+        Prueba para verificar que el catálogo completo se sirve del caché y se invalida al modificarlo.
+        """
+        cache = app.extensions['cache_catalogo']
+        session.add(Producto(nombre="Cafe", tipo_medida="Kilogramos"))
+        session.commit()
+
+        client.get("/v1/productos", headers=self._headers())
+        aciertos = cache.aciertos
+        response = client.get("/v1/productos", headers=self._headers())
+        assert cache.aciertos == aciertos + 1
+        assert response.get_json() == [{'id': 1, 'nombre': "Cafe", 'tipo_medida': "Kilogramos"}]
+
+        data = {"nombre": "Cafe Molido"}
+        client.put("/v1/productos/1", data=json.dumps(data), headers=self._headers(), content_type='application/json')
+        response = client.get("/v1/productos", headers=self._headers())
+        assert response.get_json()[0]['nombre'] == "Cafe Molido"
+
+class TestsRespuestasEnFlujo:
+    def _headers(self):
+        token = create_access_token(identity="testUser")
+        return {'Authorization': f'Bearer {token}'}
+
+    def _crear_productos(self, session, cantidad):
+        for i in range(cantidad):
+            session.add(Producto(nombre=f"Producto{i}", tipo_medida="Unidades"))
+        session.commit()
+
+    def test_consultar_productos_en_flujo(self, client, session):
+        """
+        Test para verificar que el modo flujo devuelve el mismo arreglo que la consulta normal.
+        """
+        self._crear_productos(session, 3)
+        response = client.get("/v1/productos?stream=1", headers=self._headers())
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.get_json() == client.get("/v1/productos", headers=self._headers()).get_json()
+
+    def test_consultar_productos_en_flujo_vacio(self, client, session):
+        """
+        Test para verificar que el modo flujo produce un arreglo vacío válido.
+        """
+        response = client.get("/v1/productos?stream=1&fields=nombre", headers=self._headers())
+        assert response.get_json() == []
+
+    def test_exportar_ndjson(self, client, session):
+        """
+        Test para verificar que la exportación NDJSON escribe un producto por línea.
+        """
+        self._crear_productos(session, 2)
+        response = client.get("/v1/productos:exportar?fields=nombre", headers=self._headers())
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        lineas = response.get_data(as_text=True).splitlines()
+        assert [json.loads(linea) for linea in lineas] == [{'nombre': 'Producto0'}, {'nombre': 'Producto1'}]
+
+    def test_exportar_csv(self, client, session):
+        """
+        Test para verificar que la exportación CSV incluye el encabezado y una fila por producto.
+        """
+        self._crear_productos(session, 2)
+        response = client.get("/v1/productos:exportar?formato=csv&fields=nombre,tipo_medida", headers=self._headers())
+        assert response.get_data(as_text=True).splitlines() == ["nombre,tipo_medida", "Producto0,Unidades", "Producto1,Unidades"]
@@ -0,0 +1,156 @@
+import base64
+import json
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from flask_jwt_extended import create_access_token
+from backend.app.modelos import Usuario, ListaCompra, Producto, ProductoLista, Eliminacion
+
+class TestSincronizar:
+    @pytest.fixture
+    def usuario(self, session):
+        usuario = Usuario(nombre_usuario="testuser", hash_contrasena="hashedpassword")
+        otro = Usuario(nombre_usuario="otro", hash_contrasena="hashedpassword")
+        session.add_all([usuario, otro])
+        session.commit()
+        return usuario
+
+    @pytest.fixture
+    def headers(self, usuario):
+        return {'Authorization': f'Bearer {create_access_token(identity=usuario.nombre_usuario)}'}
+
+    @pytest.fixture
+    def datos(self, session, usuario):
+        producto = Producto(nombre="Milk", tipo_medida="Liters")
+        lista = ListaCompra(nombre="Groceries", id_usuario=usuario.id)
+        ajena = ListaCompra(nombre="Ajena", id_usuario=usuario.id + 1)
+        session.add_all([producto, lista, ajena])
+        session.flush()
+        item = ProductoLista(id_lista=lista.id, id_producto=producto.id, cantidad=1)
+        session.add(item)
+        session.commit()
+        return producto, lista, item
+
+    def cursor_emitido_hace(self, cursor, **antiguedad):
+        # Reescribe la fecha de emisión del cursor para simular un cliente que no sincroniza hace tiempo
+        contenido = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        contenido['t'] = (datetime.fromisoformat(contenido['t']) - timedelta(**antiguedad)).isoformat()
+        return base64.urlsafe_b64encode(json.dumps(contenido).encode()).rstrip(b'=').decode()
+
+    def test_sincronizacion_completa(self, client, headers, datos):
+        """ Prueba que sin cursor se devuelven todas las filas del usuario y el catálogo. """
+        producto, lista, item = datos
+        response = client.get('/v1/sync', headers=headers)
+        assert response.status_code == 200
+        cuerpo = response.get_json()
+        assert [p['id'] for p in cuerpo['productos']] == [producto.id]
+        assert [l['id'] for l in cuerpo['listas']] == [lista.id]
+        assert [i['id'] for i in cuerpo['productos_lista']] == [item.id]
+        assert cuerpo['eliminados'] == {}
+        assert cuerpo['cursor']
+
+    def test_sincronizacion_incremental(self, client, session, headers, datos):
+        """ Prueba que con cursor solo se devuelven los cambios y las eliminaciones posteriores. """
+        producto, lista, item = datos
+        cursor = client.get('/v1/sync', headers=headers).get_json()['cursor']
+
+        assert client.get(f'/v1/sync?since={cursor}', headers=headers).get_json() == {
+            'productos': [], 'listas': [], 'productos_lista': [], 'eliminados': {}, 'cursor': cursor}
+
+        nuevo = Producto(nombre="Bread", tipo_medida="Units")
+        session.add(nuevo)
+        session.delete(item)
+        session.commit()
+
+        cuerpo = client.get(f'/v1/sync?since={cursor}', headers=headers).get_json()
+        assert [p['id'] for p in cuerpo['productos']] == [nuevo.id]
+        assert cuerpo['eliminados'] == {'producto_lista': [item.id]}
+        # La lista cambió porque sus contadores se ajustaron al quitar el elemento
+        assert [l['id'] for l in cuerpo['listas']] == [lista.id]
+
+        # Las eliminaciones ya informadas no se repiten con el cursor siguiente
+        siguiente = client.get(f"/v1/sync?since={cuerpo['cursor']}", headers=headers).get_json()
+        assert siguiente['eliminados'] == {}
+
+    def test_eliminaciones_de_otros_usuarios_no_se_informan(self, client, session, headers, usuario, datos):
+        """ Prueba que las eliminaciones de listas ajenas no se incluyen y las de productos sí. """
+        descontinuado = Producto(nombre="Soda", tipo_medida="Units")
+        session.add(descontinuado)
+        session.commit()
+        cursor = client.get('/v1/sync', headers=headers).get_json()['cursor']
+        session.delete(ListaCompra.query.filter_by(nombre="Ajena").one())
+        session.delete(descontinuado)
+        session.commit()
+        assert Eliminacion.query.filter_by(tabla='listas_compras').one().id_usuario == usuario.id + 1
+
+        eliminados = client.get(f'/v1/sync?since={cursor}', headers=headers).get_json()['eliminados']
+        assert eliminados == {'productos': [descontinuado.id]}
+
+    def test_cursor_invalido(self, client, headers):
+        """ Prueba que un cursor mal formado se rechaza. """
+        response = client.get('/v1/sync?since=no-es-un-cursor', headers=headers)
+        assert response.status_code == 400
+
+    def test_cambio_con_fecha_anterior_al_cursor(self, client, session, headers, datos):
+        """ Prueba que un cambio confirmado después del cursor se entrega aunque su ActualizadoEn sea anterior. """
+        producto, lista, item = datos
+        cursor = client.get('/v1/sync', headers=headers).get_json()['cursor']
+
+        # Una transacción lenta: su marca de tiempo es de antes del cursor pero se confirma después
+        item.cantidad = 5
+        session.flush()
+        session.execute(update(ProductoLista).values(actualizado_en=datetime.utcnow() - timedelta(hours=1)))
+        session.commit()
+
+        cuerpo = client.get(f'/v1/sync?since={cursor}', headers=headers).get_json()
+        assert [i['id'] for i in cuerpo['productos_lista']] == [item.id]
+        assert cuerpo['productos'] == []
+
+    def test_operaciones_masivas_se_sincronizan(self, client, session, headers, datos):
+        """ Prueba que el alta masiva y el marcado de comprados se entregan con el cursor. """
+        producto, lista, item = datos
+        cursor = client.get('/v1/sync', headers=headers).get_json()['cursor']
+
+        response = client.patch(f'/v1/listascompras/{lista.id}/productos:comprado', headers=headers,
+                                json={"ids": [item.id], "comprado": True})
+        assert response.status_code == 200
+        cuerpo = client.get(f'/v1/sync?since={cursor}', headers=headers).get_json()
+        assert [i['id'] for i in cuerpo['productos_lista']] == [item.id]
+
+        cursor = cuerpo['cursor']
+        response = client.post(f'/v1/listascompras/{lista.id}/productos:bulk', headers=headers,
+                               json=[{"id_producto": producto.id, "cantidad": 2}])
+        assert response.status_code == 201
+        cuerpo = client.get(f'/v1/sync?since={cursor}', headers=headers).get_json()
+        assert len(cuerpo['productos_lista']) == 1
+        assert cuerpo['productos_lista'][0]['id'] != item.id
+
+    def test_cursor_expirado(self, client, app, headers, datos):
+        """ Prueba que un cursor más antiguo que la retención de tombstones pide sincronizar desde cero. """
+        cursor = client.get('/v1/sync', headers=headers).get_json()['cursor']
+        dias = app.config['SINCRONIZACION_RETENCION_DIAS']
+
+        assert client.get(f"/v1/sync?since={self.cursor_emitido_hace(cursor, days=dias - 1)}", headers=headers).status_code == 200
+        response = client.get(f"/v1/sync?since={self.cursor_emitido_hace(cursor, days=dias + 1)}", headers=headers)
+        assert response.status_code == 410
+        assert response.get_json()['resincronizar'] is True
+
+    def test_cursor_de_formato_anterior(self, client, headers):
+        """ Prueba que un cursor por fecha de la versión anterior pide sincronizar desde cero. """
+        anterior = base64.urlsafe_b64encode(json.dumps({"t": datetime.utcnow().isoformat(), "e": 0}).encode()).decode()
+        response = client.get(f'/v1/sync?since={anterior}', headers=headers)
+        assert response.status_code == 410
+
+    def test_podar_eliminaciones(self, app, session, datos):
+        """ Prueba que el comando borra solo los tombstones más antiguos que la retención. """
+        producto, lista, item = datos
+        session.delete(item)
+        session.commit()
+        viejo = Eliminacion(tabla='productos', id_registro=999,
+                            eliminado_en=datetime.utcnow() - timedelta(days=app.config['SINCRONIZACION_RETENCION_DIAS'] + 2))
+        session.add(viejo)
+        session.commit()
+
+        resultado = app.test_cli_runner().invoke(args=['podar-eliminaciones'])
+        assert "Tombstones borrados: 1" in resultado.output
+        assert [e.id_registro for e in Eliminacion.query.all()] == [item.id]
@@ -1,4 +1,5 @@
 import json
+from flask_jwt_extended import decode_token
 from backend.app.modelos import Usuario
 
 class TestsRegistroUsuario:
@@ -65,6 +66,7 @@ class TestsLoginUsuario:
 
         assert response.status_code == 200
         assert "token" in response.get_json()
+        assert decode_token(response.get_json()["token"])["id_usuario"] == usuario.id
 
     def test_login_usuario_no_existente(self, client, session):
         """
@@ -112,3 +114,20 @@ class TestsLoginUsuario:
 
         assert response.status_code == 400
         assert {"error": "Nombre de usuario y contraseña son requeridos"} == response.get_json()
+
+    def test_login_servicio_hash_saturado(self, client, session, mocker):
+        """
+        Prueba para verificar que el inicio de sesión responde 503 cuando la cola de hash está llena.
+        """
+        nombre_usuario = "usuarioSaturado"
+        usuario = Usuario(nombre_usuario=nombre_usuario)
+        usuario.hashear_contrasena("contrasenaValida")
+        session.add(usuario)
+        session.commit()
+
+        mocker.patch('backend.servicios.hashing.servicio_hash._cupos.acquire', return_value=False)
+        data = {"nombreUsuario": nombre_usuario, "contrasena": "contrasenaValida"}
+        response = client.post("/v1/login", data=json.dumps(data), content_type='application/json')
+
+        assert response.status_code == 503
+        assert 'Retry-After' in response.headers
@@ -0,0 +1,87 @@
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import event
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from flask_migrate import upgrade
+from backend.app.arranque import preparar_esquema, EsquemaDesactualizado
+from backend.app.modelos import db
+
+@pytest.fixture
+def base_vacia(app):
+    # Deja la base sin tablas antes y después de cada prueba de migraciones
+    db.session.remove()
+    db.drop_all()
+    yield
+    db.session.remove()
+    db.drop_all()
+    with db.engine.begin() as conexion:
+        conexion.execute(sa.text("DROP TABLE IF EXISTS alembic_version"))
+
+def test_migraciones_coinciden_con_los_modelos(app, base_vacia):
+    # Comprueba que aplicar todas las migraciones produce el mismo esquema que los modelos
+    upgrade()
+    with db.engine.connect() as conexion:
+        diferencias = compare_metadata(MigrationContext.configure(conexion), db.metadata)
+    assert diferencias == []
+
+def test_migraciones_crean_los_indices(app, base_vacia):
+    # Comprueba que las columnas de búsqueda frecuente quedan indexadas
+    upgrade()
+    inspector = sa.inspect(db.engine)
+    assert 'ix_listas_compras_IDUsuario' in {i['name'] for i in inspector.get_indexes('listas_compras')}
+    assert 'ix_producto_lista_IDLista_IDProducto' in {i['name'] for i in inspector.get_indexes('producto_lista')}
+    assert 'ix_productos_Nombre' in {i['name'] for i in inspector.get_indexes('productos')}
+
+def test_migraciones_sobre_base_creada_con_create_all(app, base_vacia):
+    # Comprueba que una base existente creada con create_all() puede migrarse en sitio
+    db.create_all()
+    upgrade()
+    with db.engine.connect() as conexion:
+        assert MigrationContext.configure(conexion).get_current_revision() is not None
+
+def test_migracion_llena_los_contadores_de_listas(app, base_vacia):
+    # Comprueba que la migración de contadores los calcula a partir de los elementos existentes
+    upgrade(revision='0002')
+    with db.engine.begin() as conexion:
+        conexion.execute(sa.text("INSERT INTO usuarios (IDUsuario, NombreUsuario, HashContrasena, CreadoEn, ActualizadoEn) VALUES (1, 'ana', 'x', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"))
+        conexion.execute(sa.text("INSERT INTO productos (IDProducto, Nombre, TipoMedida, CreadoEn, ActualizadoEn) VALUES (1, 'Leche', 'Litros', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"))
+        for id_lista in (1, 2):
+            conexion.execute(sa.text("INSERT INTO listas_compras (IDLista, IDUsuario, Nombre, Completa, CreadoEn, ActualizadoEn) VALUES (:id, 1, 'Lista', 1, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"), {'id': id_lista})
+        for comprado in (True, False):
+            conexion.execute(sa.text("INSERT INTO producto_lista (IDProducto, IDLista, Cantidad, Comprado, CreadoEn, ActualizadoEn) VALUES (1, 1, 1, :comprado, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"), {'comprado': comprado})
+
+    upgrade()
+
+    with db.engine.connect() as conexion:
+        filas = conexion.execute(sa.text("SELECT IDLista, TotalItems, Comprados, Completa FROM listas_compras ORDER BY IDLista")).all()
+    assert [tuple(fila) for fila in filas] == [(1, 2, 1, False), (2, 0, 0, True)]
+
+def test_arranque_solo_migra_si_el_esquema_esta_desactualizado(app, base_vacia):
+    # Comprueba que el primer arranque migra y los siguientes solo leen la revisión guardada, sin DDL
+    assert preparar_esquema('verificar') == 'migrado'
+    sentencias = []
+    def registrar(conexion, cursor, sentencia, *args):
+        sentencias.append(sentencia.strip().split()[0].upper())
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        assert preparar_esquema('verificar') == 'al_dia'
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+    assert set(sentencias) <= {'SELECT', 'PRAGMA'}
+
+def test_arranque_exigir_no_migra_una_base_desactualizada(app, base_vacia):
+    # Comprueba que en modo exigir el arranque falla sin crear tablas
+    with pytest.raises(EsquemaDesactualizado):
+        preparar_esquema('exigir')
+    assert 'usuarios' not in sa.inspect(db.engine).get_table_names()
+    upgrade()
+    assert preparar_esquema('exigir') == 'al_dia'
+
+def test_arranque_respeta_una_base_con_revision_mas_nueva(app, base_vacia):
+    # Comprueba que una revisión desconocida (código anterior en un reinicio escalonado) no se migra
+    upgrade()
+    with db.engine.begin() as conexion:
+        conexion.execute(sa.text("UPDATE alembic_version SET version_num = '9999'"))
+    assert preparar_esquema('verificar') == 'adelantado'
+    assert preparar_esquema('omitir') == 'omitido'
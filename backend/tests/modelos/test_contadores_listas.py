@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy import update
+from backend.app.modelos import ListaCompra, Producto, ProductoLista, Usuario
+
+@pytest.fixture
+def lista(session):
+    usuario = Usuario(nombre_usuario="testuser", hash_contrasena="testpassword")
+    session.add(usuario)
+    session.commit()
+    lista = ListaCompra(nombre="Semana", id_usuario=usuario.id)
+    session.add(lista)
+    session.commit()
+    return lista
+
+@pytest.fixture
+def producto(session):
+    producto = Producto(nombre="Leche", tipo_medida="Litros")
+    session.add(producto)
+    session.commit()
+    return producto
+
+def contadores(lista):
+    return lista.total_items, lista.comprados, lista.completa
+
+def test_lista_nueva_sin_elementos(lista):
+    # Comprueba que una lista vacía empieza con contadores en cero y completa
+    assert contadores(lista) == (0, 0, True)
+
+def test_contadores_al_agregar_marcar_y_quitar(session, lista, producto):
+    # Comprueba que los contadores se mantienen al agregar, marcar como comprado y quitar elementos
+    leche = ProductoLista(id_lista=lista.id, id_producto=producto.id, cantidad=1)
+    pan = ProductoLista(id_lista=lista.id, id_producto=producto.id, cantidad=2, comprado=True)
+    session.add_all([leche, pan])
+    session.commit()
+    assert contadores(lista) == (2, 1, False)
+
+    leche.comprado = True
+    session.commit()
+    assert contadores(lista) == (2, 2, True)
+
+    session.delete(pan)
+    session.commit()
+    assert contadores(lista) == (1, 1, True)
+
+    leche.comprado = False
+    session.commit()
+    assert contadores(lista) == (1, 0, False)
+
+def test_contadores_al_cambiar_de_lista(session, lista, producto):
+    # Comprueba que mover un elemento a otra lista ajusta los contadores de ambas
+    otra = ListaCompra(nombre="Mes", id_usuario=lista.id_usuario)
+    item = ProductoLista(id_lista=lista.id, id_producto=producto.id, cantidad=1)
+    session.add_all([otra, item])
+    session.commit()
+
+    item.id_lista = otra.id
+    session.commit()
+    assert contadores(lista) == (0, 0, True)
+    assert contadores(otra) == (1, 0, False)
+
+def test_contadores_con_valor_anterior_expirado(session, lista, producto):
+    # Comprueba que los contadores se mantienen aunque el valor anterior estuviera expirado
+    item = ProductoLista(id_lista=lista.id, id_producto=producto.id, cantidad=1)
+    session.add(item)
+    session.commit()
+    session.expire(item, ['comprado'])
+    item.comprado = True
+    session.commit()
+    assert contadores(lista) == (1, 1, True)
+
+def test_comando_reconciliar_contadores(app, session, lista, producto):
+    # Comprueba que el comando corrige contadores desfasados por escrituras fuera del ORM
+    session.add(ProductoLista(id_lista=lista.id, id_producto=producto.id, cantidad=1))
+    session.commit()
+    session.execute(update(ListaCompra).where(ListaCompra.id == lista.id).values(total_items=7, comprados=7, completa=True))
+    session.commit()
+
+    resultado = app.test_cli_runner().invoke(args=['reconciliar-contadores'])
+
+    assert resultado.exit_code == 0
+    assert "1 listas corregidas" in resultado.output
+    session.expire_all()
+    assert contadores(lista) == (1, 0, False)
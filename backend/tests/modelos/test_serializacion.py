@@ -0,0 +1,72 @@
+import json
+import pytest
+from datetime import datetime
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from backend.app.modelos import Producto, ListaCompra, ProductoLista, Usuario
+from backend.app.serializacion import ProveedorJSON, Serializador, serializar, serializador_de, orjson
+
+def test_serializar_modelos(session):
+    """
+    Prueba que cada modelo se serializa con su forma declarada y sin exponer campos internos
+    """
+    usuario = Usuario(nombre_usuario='ana', hash_contrasena='x')
+    producto = Producto(nombre='Arroz', tipo_medida='kg')
+    session.add_all([usuario, producto])
+    session.commit()
+    lista = ListaCompra(id_usuario=usuario.id, nombre='Semana')
+    session.add(lista)
+    session.commit()
+    item = ProductoLista(id_lista=lista.id, id_producto=producto.id, cantidad=2)
+    session.add(item)
+    session.commit()
+
+    assert serializar(producto) == {'id': producto.id, 'nombre': 'Arroz', 'tipo_medida': 'kg'}
+    assert serializar(usuario) == {'id': usuario.id, 'nombre_usuario': 'ana'}
+    assert serializar(item) == {'id': item.id, 'id_lista': lista.id, 'id_producto': producto.id, 'cantidad': 2, 'comprado': False}
+    datos_lista = serializar(lista)
+    assert datos_lista['nombre'] == 'Semana'
+    assert datos_lista['creado_en'] == lista.creado_en.isoformat()
+
+def test_serializador_con_campos():
+    """
+    Prueba que los subconjuntos de campos se compilan una sola vez y rechazan campos desconocidos
+    """
+    serializador = serializador_de(Producto)
+    subconjunto = serializador.con_campos(['nombre'])
+    assert subconjunto is serializador.con_campos(['nombre'])
+    assert subconjunto.a_dict(Producto(id=1, nombre='Pan', tipo_medida='unidad')) == {'nombre': 'Pan'}
+    with pytest.raises(ValueError):
+        serializador.con_campos(['hash_contrasena'])
+    with pytest.raises(ValueError):
+        Serializador(['id; import os'])
+
+def test_serializador_con_campos_normaliza_la_llave():
+    """
+    Prueba que los campos repetidos o en otro orden reutilizan el mismo subconjunto, en el orden declarado
+    """
+    serializador = Serializador(['id', 'nombre', 'tipo_medida'])
+    subconjunto = serializador.con_campos(['nombre', 'id'])
+    assert subconjunto is serializador.con_campos(['id', 'id', 'nombre'])
+    assert subconjunto.campos == ('id', 'nombre')
+    assert serializador.con_campos(['tipo_medida', 'nombre', 'id', 'id']) is serializador
+    assert len(serializador._subconjuntos) == 1
+
+@pytest.mark.parametrize('usar_orjson', [True, False])
+def test_proveedor_equivale_al_por_defecto(usar_orjson):
+    """
+    Prueba que ProveedorJSON produce el mismo documento que el proveedor por defecto de Flask
+    """
+    app = Flask(__name__)
+    app.config['JSON_USAR_ORJSON'] = usar_orjson
+    proveedor = ProveedorJSON(app)
+    assert proveedor.usar_orjson == (usar_orjson and orjson is not None)
+
+    documento = {'b': 1, 'a': [1.5, None, True], 'fecha': datetime(2024, 5, 1, 10, 30), 'texto': 'ñandú'}
+    esperado = json.loads(DefaultJSONProvider(app).dumps(documento))
+    assert json.loads(proveedor.dumps_bytes(documento)) == esperado
+    assert proveedor.loads(proveedor.dumps(documento)) == esperado
+    with app.app_context():
+        respuesta = proveedor.response(documento)
+        assert respuesta.mimetype == 'application/json'
+        assert json.loads(respuesta.get_data()) == esperado
@@ -0,0 +1,56 @@
+from backend.servicios.busqueda import IndiceProductos, normalizar
+
+def crear_indice():
+    indice = IndiceProductos()
+    indice.construir([
+        (1, "Leche", "Litros"),
+        (2, "Leche de almendras", "Litros"),
+        (3, "Café molido", "Gramos"),
+        (4, "Pan integral", "Unidades"),
+    ])
+    return indice
+
+def test_normalizar_quita_acentos_y_mayusculas():
+    assert normalizar("  Café   MOLIDO ") == "cafe molido"
+
+def test_busqueda_por_prefijo():
+    # Comprueba que las coincidencias por prefijo aparecen primero y en orden alfabético
+    indice = crear_indice()
+    assert [p['id'] for p in indice.buscar("lec")] == [1, 2]
+
+def test_busqueda_sin_acentos():
+    indice = crear_indice()
+    assert indice.buscar("cafe")[0]['nombre'] == "Café molido"
+
+def test_busqueda_aproximada():
+    # Comprueba que un error de escritura todavía encuentra el producto
+    indice = crear_indice()
+    assert indice.buscar("pan integrl")[0]['id'] == 4
+
+def test_actualizacion_incremental():
+    # Comprueba que agregar, actualizar y eliminar productos se refleja sin reconstruir el índice
+    indice = crear_indice()
+    indice.aplicar_cambios([
+        ('agregado', 5, "Lentejas", "Kilogramos"),
+        ('actualizado', 1, "Yogur", "Litros"),
+        ('eliminado', 2, "Leche de almendras", "Litros"),
+    ])
+    assert [p['id'] for p in indice.buscar("le")] == [5]
+    assert indice.buscar("yogur")[0]['id'] == 1
+    assert len(indice) == 4
+
+def test_cambio_masivo_descarta_el_indice():
+    indice = crear_indice()
+    indice.aplicar_cambios(None)
+    assert indice.construido is False
+    assert len(indice) == 0
+
+def test_cambios_de_la_version_siguiente_avanzan_la_version():
+    # Comprueba que los cambios propios avanzan la versión y que un salto (otro proceso) la deja vieja
+    indice = IndiceProductos()
+    indice.construir([(1, "Leche", "Litros")], version=3)
+    indice.aplicar_cambios([('agregado', 2, "Lentejas", "Kilogramos")], (3, 4))
+    assert indice.version == 4
+    indice.aplicar_cambios([('agregado', 3, "Pan", "Unidades")], (5, 6))
+    assert indice.version == 4
+    assert len(indice) == 3
@@ -0,0 +1,23 @@
+from backend.servicios.cache import CacheTTL
+
+def test_cache_guarda_y_expira(mocker):
+    # Comprueba que las entradas expiran después del TTL
+    reloj = mocker.patch('backend.servicios.cache.time.monotonic', return_value=100.0)
+    cache = CacheTTL(maximo=10, ttl=5)
+    cache.guardar('usuario', 1)
+    assert cache.obtener('usuario') == 1
+
+    reloj.return_value = 106.0
+    assert cache.obtener('usuario') is None
+    assert len(cache) == 0
+
+def test_cache_descarta_la_entrada_menos_usada():
+    # Comprueba que al exceder el tamaño máximo se descarta la entrada menos usada recientemente
+    cache = CacheTTL(maximo=2, ttl=60)
+    cache.guardar('a', 1)
+    cache.guardar('b', 2)
+    cache.obtener('a')
+    cache.guardar('c', 3)
+    assert cache.obtener('a') == 1
+    assert cache.obtener('b') is None
+    assert cache.obtener('c') == 3
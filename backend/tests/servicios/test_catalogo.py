@@ -0,0 +1,58 @@
+from flask import Flask
+from backend.app.modelos import Producto
+from backend.app.versiones import VERSION_CATALOGO, incrementar_version, leer_version
+from backend.servicios.catalogo import CacheCatalogo
+
+def crear_cache(archivo=None):
+    app = Flask(__name__)
+    app.config['CATALOGO_ARCHIVO_VERSION'] = archivo
+    app.config['CATALOGO_VERSION_COMPARTIDA'] = False
+    return CacheCatalogo(app)
+
+def constructor(contador):
+    def construir():
+        contador.append(1)
+        return f"[{len(contador)}]".encode('utf-8'), f"etag-{len(contador)}", None
+    return construir
+
+def test_instantanea_se_reutiliza_hasta_invalidar():
+    # Comprueba que la instantánea solo se reconstruye cuando cambia la versión
+    cache = crear_cache()
+    construcciones = []
+    assert cache.obtener(constructor(construcciones)).cuerpo == b"[1]"
+    assert cache.obtener(constructor(construcciones)).cuerpo == b"[1]"
+    cache.invalidar()
+    assert cache.obtener(constructor(construcciones)).cuerpo == b"[2]"
+
+    estadisticas = cache.estadisticas()
+    assert estadisticas['aciertos'] == 1
+    assert estadisticas['fallos'] == 2
+    assert estadisticas['reconstrucciones'] == 2
+
+def test_version_compartida_entre_procesos(tmp_path):
+    # Comprueba que un cambio registrado por otro worker (otra instancia) invalida la instantánea
+    archivo = str(tmp_path / "catalogo.version")
+    worker_a = crear_cache(archivo)
+    worker_b = crear_cache(archivo)
+    construcciones = []
+
+    worker_a.obtener(constructor(construcciones))
+    worker_b.invalidar()
+    assert worker_a.obtener(constructor(construcciones)).cuerpo == b"[2]"
+    assert worker_a.obtener(constructor(construcciones)).cuerpo == b"[2]"
+
+def test_version_compartida_en_base_de_datos(app, session):
+    # Comprueba que el commit de un producto incrementa la versión de la base de datos y que un cambio
+    # hecho por otro worker (que solo se ve en la base) invalida la instantánea de este proceso
+    version_inicial = leer_version(session, VERSION_CATALOGO)
+    session.add(Producto(nombre="Leche", tipo_medida="Litros"))
+    session.commit()
+    assert leer_version(session, VERSION_CATALOGO) == version_inicial + 1
+
+    worker = CacheCatalogo()
+    construcciones = []
+    worker.obtener(constructor(construcciones))
+    assert worker.obtener(constructor(construcciones)).cuerpo == b"[1]"
+    incrementar_version(session.connection(), VERSION_CATALOGO)
+    session.commit()
+    assert worker.obtener(constructor(construcciones)).cuerpo == b"[2]"
@@ -0,0 +1,50 @@
+import logging
+import pytest
+from flask import Response
+from backend.app.modelos import ListaCompra, Usuario
+from backend.servicios.consultas_sql import contabilidad_sql, ConsultasRepetidas
+
+def crear_listas(session, cantidad):
+    usuario = Usuario(nombre_usuario="testuser", hash_contrasena="x")
+    session.add(usuario)
+    session.flush()
+    session.add_all([ListaCompra(nombre=f"Lista {i}", id_usuario=usuario.id) for i in range(cantidad)])
+    session.commit()
+    session.expire_all()
+
+def recorrer_listas_con_carga_perezosa():
+    # Una consulta por las listas y una más por los productos de cada una (N+1)
+    return [len(lista.productos) for lista in ListaCompra.query.all()]
+
+def test_contabilidad_cuenta_las_consultas_de_la_peticion(app, session):
+    # Comprueba que se cuentan las sentencias y el tiempo de la petición en las cabeceras
+    crear_listas(session, 2)
+    with app.test_request_context('/'):
+        contabilidad_sql._al_iniciar()
+        ListaCompra.query.all()
+        ListaCompra.query.count()
+        respuesta = contabilidad_sql._al_responder(Response())
+    assert respuesta.headers['X-DB-Queries'] == '2'
+    assert float(respuesta.headers['X-DB-Time']) >= 0
+
+def test_contabilidad_falla_con_consultas_repetidas(app, session, monkeypatch):
+    # Comprueba que una carga perezosa por cada lista supera el umbral y falla en modo 'fallar'
+    crear_listas(session, 4)
+    monkeypatch.setitem(app.config, 'SQL_UMBRAL_REPETIDAS', 3)
+    with app.test_request_context('/v1/listascompras'):
+        contabilidad_sql._al_iniciar()
+        recorrer_listas_con_carga_perezosa()
+        with pytest.raises(ConsultasRepetidas, match="4 veces"):
+            contabilidad_sql._al_responder(Response())
+
+def test_contabilidad_advierte_con_consultas_repetidas(app, session, monkeypatch, caplog):
+    # Comprueba que en modo 'advertir' el N+1 se registra sin interrumpir la respuesta
+    crear_listas(session, 4)
+    monkeypatch.setitem(app.config, 'SQL_UMBRAL_REPETIDAS', 3)
+    monkeypatch.setitem(app.config, 'SQL_ACCION_REPETIDAS', 'advertir')
+    with app.test_request_context('/v1/listascompras'), caplog.at_level(logging.WARNING):
+        contabilidad_sql._al_iniciar()
+        recorrer_listas_con_carga_perezosa()
+        respuesta = contabilidad_sql._al_responder(Response())
+    assert respuesta.headers['X-DB-Queries'] == '5'
+    assert "Posible N+1" in caplog.text
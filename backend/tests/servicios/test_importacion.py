@@ -0,0 +1,12 @@
+from backend.app.modelos import Producto
+
+def test_comando_importar_productos(app, session, tmp_path):
+    # Comprueba que el comando de línea de comandos importa un archivo CSV
+    archivo = tmp_path / "catalogo.csv"
+    archivo.write_text("nombre,tipo_medida\nCafe,Kilogramos\n,Litros\nPan,Unidades\n", encoding='utf-8')
+
+    resultado = app.test_cli_runner().invoke(args=['importar-productos', str(archivo), '--tamano-lote', '1'])
+
+    assert resultado.exit_code == 0
+    assert "2 productos en 2 lotes, 1 errores" in resultado.output
+    assert Producto.query.count() == 2
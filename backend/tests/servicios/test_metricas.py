@@ -0,0 +1,93 @@
+import json
+import os
+from backend.servicios import metricas as modulo_metricas
+from backend.servicios.metricas import MetricasPeticiones, ARCHIVO_RETIRADOS
+
+def test_metricas_histograma_en_formato_prometheus():
+    # Comprueba que los buckets del histograma se exportan acumulados, con suma, conteo y bytes
+    metricas = MetricasPeticiones(buckets=(0.1, 1.0))
+    metricas.observar('productos_bp', 'productos_bp.consultar_productos', 'GET', 200, 0.05, 0, 120)
+    metricas.observar('productos_bp', 'productos_bp.consultar_productos', 'GET', 200, 0.5, 10, 80)
+    metricas.observar('productos_bp', 'productos_bp.consultar_productos', 'GET', 200, 3.0)
+
+    texto = metricas.exportar()
+    etiquetas = 'blueprint="productos_bp",endpoint="productos_bp.consultar_productos",metodo="GET",estado="200"'
+    assert f'app_peticion_duracion_segundos_bucket{{{etiquetas},le="0.1"}} 1' in texto
+    assert f'app_peticion_duracion_segundos_bucket{{{etiquetas},le="1.0"}} 2' in texto
+    assert f'app_peticion_duracion_segundos_bucket{{{etiquetas},le="+Inf"}} 3' in texto
+    assert f'app_peticion_duracion_segundos_count{{{etiquetas}}} 3' in texto
+    assert f'app_peticion_duracion_segundos_sum{{{etiquetas}}} 3.55' in texto
+    assert f'app_peticion_bytes_total{{{etiquetas}}} 10' in texto
+    assert f'app_respuesta_bytes_total{{{etiquetas}}} 200' in texto
+
+def test_metricas_suman_los_procesos_del_directorio(tmp_path):
+    # Comprueba que se agregan las instantáneas de otros workers y se ignoran sus peticiones en curso si terminaron
+    otro_worker = MetricasPeticiones(buckets=(0.1,))
+    otro_worker.directorio = str(tmp_path)
+    otro_worker.observar('', None, 'GET', 404, 0.01)
+    instantanea = otro_worker.instantanea()
+    instantanea['pid'] = 2 ** 22 + 1  # Un PID que no existe
+    instantanea['en_curso'] = 5
+    with open(os.path.join(tmp_path, 'metricas_otro.json'), 'w', encoding='utf-8') as archivo:
+        json.dump(instantanea, archivo)
+
+    metricas = MetricasPeticiones(buckets=(0.1,))
+    metricas.directorio = str(tmp_path)
+    metricas.observar('', None, 'GET', 404, 0.02)
+
+    texto = metricas.exportar()
+    assert 'app_peticion_duracion_segundos_count{blueprint="",endpoint="sin_ruta",metodo="GET",estado="404"} 2' in texto
+    assert 'app_peticiones_en_curso 0' in texto
+    assert os.path.exists(tmp_path / f"metricas_{os.getpid()}_{metricas.instantanea()['inicio']}.json")
+    # El archivo del worker terminado se sumó a los retirados y se borró
+    assert not os.path.exists(tmp_path / 'metricas_otro.json')
+    assert os.path.exists(tmp_path / ARCHIVO_RETIRADOS)
+
+def test_metricas_retiradas_se_conservan_sin_duplicarse(tmp_path):
+    # Comprueba que los contadores de los workers terminados se suman una sola vez entre exportaciones
+    for numero in range(3):
+        terminado = MetricasPeticiones(buckets=(0.1,))
+        terminado.observar('', None, 'GET', 404, 0.01)
+        instantanea = terminado.instantanea()
+        instantanea['pid'] = 2 ** 22 + 1 + numero
+        with open(os.path.join(tmp_path, f'metricas_{numero}.json'), 'w', encoding='utf-8') as archivo:
+            json.dump(instantanea, archivo)
+
+    metricas = MetricasPeticiones(buckets=(0.1,))
+    metricas.directorio = str(tmp_path)
+    linea = 'app_peticion_duracion_segundos_count{blueprint="",endpoint="sin_ruta",metodo="GET",estado="404"} 3'
+    assert linea in metricas.exportar()
+    assert linea in metricas.exportar()
+    assert sorted(os.listdir(tmp_path)) == sorted([ARCHIVO_RETIRADOS, 'metricas.lock',
+                                                   f"metricas_{os.getpid()}_{metricas.instantanea()['inicio']}.json"])
+
+def test_metricas_pid_reutilizado(tmp_path):
+    # Comprueba que el archivo de un worker terminado no se toma como vivo si otro proceso reutiliza su PID
+    anterior = MetricasPeticiones(buckets=(0.1,))
+    anterior.observar('', None, 'GET', 200, 0.01)
+    instantanea = anterior.instantanea()
+    instantanea['inicio'] -= 1
+    instantanea['en_curso'] = 4
+    with open(os.path.join(tmp_path, 'metricas_anterior.json'), 'w', encoding='utf-8') as archivo:
+        json.dump(instantanea, archivo)
+
+    metricas = MetricasPeticiones(buckets=(0.1,))
+    metricas.directorio = str(tmp_path)
+    texto = metricas.exportar()
+    assert 'app_peticiones_en_curso 0' in texto
+    assert not os.path.exists(tmp_path / 'metricas_anterior.json')
+
+def test_metricas_sin_fcntl(tmp_path, monkeypatch):
+    # Comprueba que sin fcntl (Windows) los archivos de workers terminados se suman igual
+    monkeypatch.setattr(modulo_metricas, 'fcntl', None)
+    terminado = MetricasPeticiones(buckets=(0.1,))
+    terminado.observar('', None, 'GET', 404, 0.01)
+    instantanea = terminado.instantanea()
+    instantanea['pid'] = 2 ** 22 + 1
+    with open(os.path.join(tmp_path, 'metricas_otro.json'), 'w', encoding='utf-8') as archivo:
+        json.dump(instantanea, archivo)
+
+    metricas = MetricasPeticiones(buckets=(0.1,))
+    metricas.directorio = str(tmp_path)
+    assert 'estado="404"} 1' in metricas.exportar()
+    assert not os.path.exists(tmp_path / 'metricas_otro.json')
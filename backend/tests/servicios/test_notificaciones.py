@@ -0,0 +1,63 @@
+import threading
+from backend.app import crear_app  # noqa: F401  (carga la aplicación antes que los servicios)
+from backend.servicios.notificaciones import CentroEventosListas
+
+def test_eventos_desde_un_id():
+    # Comprueba que se devuelven solo los eventos posteriores al último ID recibido
+    centro = CentroEventosListas()
+    centro.publicar(1, 'producto_agregado', {'id': 10})
+    centro.publicar(1, 'producto_comprado', {'id': 10})
+    centro.publicar(2, 'producto_agregado', {'id': 11})
+
+    eventos, completos = centro.eventos_desde(1, 1)
+    assert [(evento.id, evento.tipo) for evento in eventos] == [(2, 'producto_comprado')]
+    assert completos
+    assert centro.ultimo_id(2) == 1
+
+def test_historial_acotado_indica_eventos_perdidos():
+    # Comprueba que si los eventos pedidos ya salieron del historial se indica que no están completos
+    centro = CentroEventosListas(capacidad=2)
+    for numero in range(5):
+        centro.publicar(1, 'producto_agregado', {'id': numero})
+
+    eventos, completos = centro.eventos_desde(1, 1)
+    assert [evento.id for evento in eventos] == [4, 5]
+    assert not completos
+    # Un ID mayor al último publicado (por ejemplo, después de reiniciar el proceso) tampoco es válido
+    assert centro.eventos_desde(1, 99)[1] is False
+
+def test_esperar_despierta_al_publicar():
+    # Comprueba que un suscriptor en espera recibe el evento publicado desde otro hilo
+    centro = CentroEventosListas()
+    recibidos = []
+    suscriptor = threading.Thread(target=lambda: recibidos.append(centro.esperar(1, 0, timeout=5)))
+    suscriptor.start()
+    centro.publicar(1, 'producto_eliminado', {'id': 3})
+    suscriptor.join(timeout=5)
+
+    eventos, completos = recibidos[0]
+    assert [evento.tipo for evento in eventos] == ['producto_eliminado']
+    assert completos
+
+def test_esperar_sin_eventos_agota_el_tiempo():
+    # Comprueba que la espera termina sin eventos al agotarse el tiempo
+    centro = CentroEventosListas()
+    assert centro.esperar(1, 0, timeout=0.01) == ([], True)
+    assert centro.estadisticas()['suscriptores'] == 0
+
+def test_canales_inactivos_se_descartan():
+    # Comprueba que el número de canales se mantiene acotado
+    centro = CentroEventosListas(maximo_listas=2)
+    for id_lista in range(5):
+        centro.publicar(id_lista, 'producto_agregado', {})
+    assert centro.estadisticas()['listas'] == 2
+
+def test_conexiones_limitadas():
+    # Comprueba que no se abren más conexiones que el máximo y que cerrar una libera su lugar
+    centro = CentroEventosListas()
+    assert centro.abrir_conexion(2) and centro.abrir_conexion(2)
+    assert not centro.abrir_conexion(2)
+    centro.cerrar_conexion()
+    assert centro.abrir_conexion(2)
+    assert centro.abrir_conexion(None)
+    assert centro.estadisticas()['conexiones'] == 3
@@ -0,0 +1,55 @@
+import os
+import time
+import pstats
+import pytest
+from flask import Flask
+from backend.config.db_config import Produccion
+from backend.servicios.perfilador import (PerfiladorPeticiones, firmar_perfilado, verificar_perfilado,
+                                          CABECERA_PERFILAR, CABECERA_PERFIL)
+
+def crear_app_perfilada(tmp_path, **configuracion):
+    app = Flask(__name__)
+    app.config.update(PERFILADOR_PERMITIDO=True, PERFILADOR_DIRECTORIO=str(tmp_path), PERFILADOR_INTERVALO_MUESTREO=0.001,
+                      **configuracion)
+    PerfiladorPeticiones().init_app(app)
+
+    @app.route('/lenta')
+    def lenta():
+        time.sleep(0.03)
+        return "ok"
+    return app
+
+def test_firma_de_perfilado():
+    # Comprueba que la firma solo vale para el mismo método y ruta, y mientras está vigente
+    valor = firmar_perfilado('secreto', 'GET', '/v1/productos')
+    assert verificar_perfilado('secreto', valor, 'GET', '/v1/productos', 300)
+    assert not verificar_perfilado('secreto', valor, 'GET', '/v1/listascompras', 300)
+    assert not verificar_perfilado('otro', valor, 'GET', '/v1/productos', 300)
+    antiguo = firmar_perfilado('secreto', 'GET', '/v1/productos', time.time() - 600)
+    assert not verificar_perfilado('secreto', antiguo, 'GET', '/v1/productos', 300)
+    assert not verificar_perfilado('secreto', 'basura', 'GET', '/v1/productos', 300)
+
+def test_perfilado_con_cabecera_firmada(tmp_path):
+    # Comprueba que solo la petición firmada se perfila y que se guardan el pstats y las pilas colapsadas
+    app = crear_app_perfilada(tmp_path, PERFILADOR_SECRETO='secreto')
+    with app.test_client() as client:
+        assert CABECERA_PERFIL not in client.get('/lenta').headers
+        assert CABECERA_PERFIL not in client.get('/lenta', headers={CABECERA_PERFILAR: '1.falsa'}).headers
+        respuesta = client.get('/lenta', headers={CABECERA_PERFILAR: firmar_perfilado('secreto', 'GET', '/lenta')})
+
+    nombre = respuesta.headers[CABECERA_PERFIL]
+    assert sorted(os.listdir(tmp_path)) == [f"{nombre}.folded", f"{nombre}.pstats"]
+    assert any('lenta' in funcion[2] for funcion in pstats.Stats(str(tmp_path / f"{nombre}.pstats")).stats)
+    with open(tmp_path / f"{nombre}.folded", encoding='utf-8') as archivo:
+        lineas = archivo.read().splitlines()
+    assert any('lenta (test_perfilador.py' in linea for linea in lineas)
+    assert all(linea.rsplit(' ', 1)[1].isdigit() for linea in lineas)
+
+def test_perfilador_prohibido_en_produccion():
+    # Comprueba que la configuración Produccion no permite activar el perfilador
+    app = Flask(__name__)
+    app.config.from_object(Produccion)
+    assert app.config['PERFILADOR_HABILITADO'] is False
+    app.config['PERFILADOR_HABILITADO'] = True
+    with pytest.raises(ValueError):
+        PerfiladorPeticiones().init_app(app)
@@ -0,0 +1,35 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+from backend.servicios.pool import PoolMedido, estadisticas_pool
+from backend.config.db_config import opciones_pool
+
+def test_pool_medido_registra_esperas_y_timeouts(tmp_path):
+    # Comprueba que se miden los checkouts y se cuentan los que agotan pool_timeout
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=PoolMedido, pool_size=1, max_overflow=0, pool_timeout=0.05)
+    conexion = engine.connect()
+    conexion.execute(text("SELECT 1"))
+
+    estadisticas = estadisticas_pool(engine)
+    assert estadisticas['clase'] == 'PoolMedido'
+    assert estadisticas['en_uso'] == 1
+    assert estadisticas['esperas'] == 1
+
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    conexion.close()
+
+    estadisticas = estadisticas_pool(engine)
+    assert estadisticas['timeouts'] == 1
+    assert estadisticas['en_uso'] == 0
+    assert estadisticas['ms_espera_maxima'] >= 50
+    engine.dispose()
+
+def test_opciones_pool_desde_variables_de_entorno(monkeypatch):
+    # Comprueba que las variables DB_POOL_* tienen prioridad sobre los valores del entorno
+    monkeypatch.setenv('DB_POOL_TAMANO', '20')
+    monkeypatch.setenv('DB_POOL_PRE_PING', '0')
+    opciones = opciones_pool(tamano=5, desborde=3)
+    assert opciones['pool_size'] == 20
+    assert opciones['max_overflow'] == 3
+    assert opciones['pool_pre_ping'] is False
+    assert opciones['poolclass'] is PoolMedido
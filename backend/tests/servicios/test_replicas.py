@@ -0,0 +1,96 @@
+import pytest
+from flask import json
+from sqlalchemy import text
+from flask_jwt_extended import create_access_token
+from backend.app import crear_app, db
+from backend.app.modelos import Producto
+from backend.config import db_config
+from backend.servicios.replicas import enrutador_replicas, CABECERA_ULTIMA_ESCRITURA
+from backend.servicios.catalogo import cache_catalogo
+
+@pytest.fixture
+def app_con_replica(tmp_path, monkeypatch):
+    # Dos bases SQLite locales: la principal y una réplica con datos distintos para distinguirlas
+    monkeypatch.setattr(db_config.PruebasEfimeras, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'principal.db'}")
+    monkeypatch.setattr(db_config.PruebasEfimeras, 'REPLICAS_LECTURA', [f"sqlite:///{tmp_path / 'replica.db'}"])
+    app = crear_app('pruebas-caja-arena')
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines['replica_0'])
+        db.session.add(Producto(id=1, nombre='Leche principal', tipo_medida='Litros'))
+        db.session.commit()
+        with db.engines['replica_0'].begin() as conexion:
+            conexion.execute(text("INSERT INTO productos (IDProducto, Nombre, TipoMedida, CreadoEn, ActualizadoEn) "
+                                  "VALUES (1, 'Leche replica', 'Litros', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"))
+        yield app
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    enrutador_replicas.escrituras_recientes.limpiar()
+    cache_catalogo.invalidar()
+
+def encabezados(usuario):
+    return {'Authorization': f'Bearer {create_access_token(identity=usuario)}'}
+
+def nombre_producto(client, usuario):
+    return client.get('/v1/productos/1', headers=encabezados(usuario)).get_json()['nombre']
+
+def test_lecturas_van_a_la_replica(app_con_replica):
+    # Comprueba que los endpoints de solo lectura consultan la réplica
+    with app_con_replica.test_client() as client:
+        assert nombre_producto(client, 'ana') == 'Leche replica'
+        listas = client.get('/v1/listascompras', headers=encabezados('ana'))
+        assert listas.status_code == 200
+
+def test_lectura_propia_despues_de_escribir(app_con_replica):
+    # Comprueba que quien acaba de escribir lee de la principal durante la ventana configurada
+    with app_con_replica.test_client() as client:
+        data = {'nombre': 'Pan', 'tipo_medida': 'Unidades'}
+        response = client.post('/v1/productos', headers=encabezados('ana'), data=json.dumps(data), content_type='application/json')
+        assert response.status_code == 201
+        assert db.session.query(Producto).count() == 2
+
+        assert nombre_producto(client, 'ana') == 'Leche principal'
+    with app_con_replica.test_client() as client:
+        assert nombre_producto(client, 'beto') == 'Leche replica'
+
+    enrutador_replicas.escrituras_recientes.limpiar()
+    with app_con_replica.test_client() as client:
+        assert nombre_producto(client, 'ana') == 'Leche replica'
+
+def test_lectura_propia_en_otro_worker(app_con_replica):
+    # Comprueba que la ventana viaja con el cliente (cookie o cabecera) aunque el proceso no recuerde la escritura
+    with app_con_replica.test_client() as client:
+        data = {'nombre': 'Pan', 'tipo_medida': 'Unidades'}
+        response = client.post('/v1/productos', headers=encabezados('ana'), data=json.dumps(data), content_type='application/json')
+        momento = response.headers[CABECERA_ULTIMA_ESCRITURA]
+        # Simula que la lectura la atiende otro worker, sin la escritura en memoria
+        enrutador_replicas.escrituras_recientes.limpiar()
+        assert nombre_producto(client, 'ana') == 'Leche principal'
+
+    with app_con_replica.test_client() as client:
+        response = client.get('/v1/productos/1', headers={**encabezados('ana'), CABECERA_ULTIMA_ESCRITURA: momento})
+        assert response.get_json()['nombre'] == 'Leche principal'
+        vencido = str(float(momento) - 60)
+        response = client.get('/v1/productos/1', headers={**encabezados('ana'), CABECERA_ULTIMA_ESCRITURA: vencido})
+        assert response.get_json()['nombre'] == 'Leche replica'
+
+def test_catalogo_completo_se_construye_desde_la_principal(app_con_replica):
+    # Comprueba que la instantánea del catálogo, que se guarda en memoria, no se construye con la réplica
+    with app_con_replica.test_client() as client:
+        productos = client.get('/v1/productos', headers=encabezados('ana')).get_json()
+        assert [producto['nombre'] for producto in productos] == ['Leche principal']
+
+def test_lote_lee_sus_escrituras_sin_confirmar(app_con_replica):
+    # Comprueba que dentro de un lote las lecturas van a la principal y ven las escrituras aún sin confirmar
+    operaciones = [
+        {'metodo': 'POST', 'ruta': '/v1/productos', 'cuerpo': {'nombre': 'Pan', 'tipo_medida': 'Unidades'}},
+        {'metodo': 'GET', 'ruta': '/v1/productos/1'},
+        {'metodo': 'GET', 'ruta': '/v1/productos/2'},
+    ]
+    with app_con_replica.test_client() as client:
+        response = client.post('/v1/batch', headers=encabezados('ana'), json={'operaciones': operaciones, 'atomico': True})
+        resultados = response.get_json()['resultados']
+        assert [r['estado'] for r in resultados] == [201, 200, 200]
+        assert resultados[1]['cuerpo']['nombre'] == 'Leche principal'
+        assert resultados[2]['cuerpo']['nombre'] == 'Pan'
@@ -0,0 +1,52 @@
+import pytest
+from flask import Flask
+from backend.servicios.hashing import ServicioHash, ColaHashLlena
+
+def crear_servicio(procesos, cola=4):
+    app = Flask(__name__)
+    app.config.update(HASH_PROCESOS=procesos, HASH_COLA_MAXIMA=cola, HASH_RETRY_AFTER=7)
+    return app, ServicioHash(app)
+
+def test_hash_y_verificacion_en_pool_de_procesos():
+    # Comprueba que el hash calculado en el pool de procesos se verifica correctamente
+    _, servicio = crear_servicio(procesos=1)
+    hash_contrasena = servicio.hashear("contrasenaSegura")
+    assert servicio.verificar("contrasenaSegura", hash_contrasena) == True
+    assert servicio.verificar("otraContrasena", hash_contrasena.decode('utf-8')) == False
+
+def test_cola_llena_rechaza_trabajo():
+    # Comprueba que sin cupos disponibles el servicio rechaza de inmediato
+    _, servicio = crear_servicio(procesos=0, cola=1)
+    servicio._cupos.acquire()
+    with pytest.raises(ColaHashLlena):
+        servicio.hashear("contrasena")
+    servicio._cupos.release()
+    assert servicio.hashear("contrasena") is not None
+
+def test_cola_llena_responde_503_con_retry_after():
+    # Comprueba que la excepción se traduce en un 503 con la cabecera Retry-After configurada
+    app, _ = crear_servicio(procesos=0)
+
+    @app.route('/hash')
+    def hash_saturado():
+        raise ColaHashLlena()
+
+    response = app.test_client().get('/hash')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '7'
+
+def test_reinicializar_durante_una_operacion():
+    # Comprueba que una operación en curso libera su semáforo aunque init_app se llame mientras tanto
+    _, servicio = crear_servicio(procesos=0, cola=1)
+    otra, _ = crear_servicio(procesos=0, cola=2)
+
+    def hashear_y_reinicializar(contrasena):
+        servicio.init_app(otra)
+        return contrasena
+
+    # Con un BoundedSemaphore compartido, liberar el semáforo nuevo lanzaría ValueError
+    assert servicio._ejecutar(hashear_y_reinicializar, b"contrasena") == b"contrasena"
+    cupos = servicio._cupos
+    # El mismo límite no recrea el semáforo
+    servicio.init_app(otra)
+    assert servicio._cupos is cupos